@@ -0,0 +1,92 @@
+"""Flattening of a synthetic predictions.jsonl of 1M windows, row loop vs vectorized.
+
+The log is generated in memory with the layout the API writes (records of
+`--batch-size` windows of 48 values, one output list per window), then
+flattened by the former `iterrows` implementation and by `flatten_predictions`.
+The loop is timed on `--loop-windows` windows and extrapolated, it takes
+minutes on the full log.
+
+    uv run python -m benchmarks.bench_flatten
+    uv run python -m benchmarks.bench_flatten --windows 200000 --loop-windows 200000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from tabulate import tabulate
+
+from src.monitoring.ml_monitoring import flatten_predictions
+
+WINDOW_SIZE = 48
+
+
+def synthetic_log(n_windows: int, batch_size: int, horizon: int = 4, seed: int = 0) -> pd.DataFrame:
+    """Prediction records as `pd.read_json(..., lines=True)` returns them."""
+    rng = np.random.default_rng(seed)
+    n_records = n_windows // batch_size
+    windows = rng.normal(60000, 8000, size=(n_records, batch_size, WINDOW_SIZE)).round(1)
+    outputs = rng.normal(60000, 8000, size=(n_records, batch_size, horizon)).round(1)
+    return pd.DataFrame({
+        "prediction_id": [f"{i:032x}" for i in range(n_records)],
+        "inputs": windows.tolist(),
+        "outputs": outputs.tolist(),
+    })
+
+
+def loop_flatten(df: pd.DataFrame) -> pd.DataFrame:
+    """The previous implementation, one dict per window."""
+    rows = []
+    for _, row in df.iterrows():
+        inputs = row.get("inputs", [])
+        outputs = row.get("outputs", [])
+        if not isinstance(inputs, list) or not isinstance(outputs, list):
+            continue
+        for idx, (inp, out) in enumerate(zip(inputs, outputs)):
+            if not isinstance(inp, list):
+                continue
+            first_val = out[0] if isinstance(out, list) and len(out) > 0 else out
+            entry = {f"consumption_{i + 1}": v for i, v in enumerate(inp)}
+            entry.update({"prediction_id": f"{row['prediction_id']}_{idx}", "target": first_val})
+            rows.append(entry)
+    return pd.DataFrame(rows)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--windows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=16, help="Windows per logged request")
+    parser.add_argument("--loop-windows", type=int, default=50_000, help="Windows flattened by the loop, 0 to skip it")
+    args = parser.parse_args()
+
+    df = synthetic_log(args.windows, args.batch_size)
+    n_windows = len(df) * args.batch_size
+
+    flat, vectorized_s = timed(flatten_predictions, df)
+    assert len(flat) == n_windows
+    rows = [["vectorized", n_windows, f"{vectorized_s:.2f}", f"{n_windows / vectorized_s:,.0f}"]]
+
+    if args.loop_windows:
+        subset = df.iloc[: max(1, args.loop_windows // args.batch_size)]
+        loop_flat, loop_s = timed(loop_flatten, subset)
+        np.testing.assert_allclose(
+            loop_flat.filter(like="consumption_").to_numpy(),
+            flat.filter(like="consumption_").to_numpy()[: len(loop_flat)],
+            rtol=1e-6,
+        )
+        loop_rate = len(loop_flat) / loop_s
+        rows.insert(0, ["iterrows loop", len(loop_flat), f"{loop_s:.2f}", f"{loop_rate:,.0f}"])
+        rows.append(["loop, extrapolated", n_windows, f"{n_windows / loop_rate:.2f}", f"{loop_rate:,.0f}"])
+
+    print(tabulate(rows, headers=["Implementation", "Windows", "Seconds", "Windows/s"]))  # noqa: T201
+    print(f"Flattened matrix: {flat.filter(like='consumption_').to_numpy().nbytes / 2**20:.0f} MiB float32")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
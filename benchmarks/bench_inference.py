@@ -0,0 +1,60 @@
+"""Per-call latency of the pyfunc and native XGBoost serving paths.
+
+Trains a small synthetic model, saves it in the MLflow xgboost format and
+loads it back through both paths of the API, so no MLflow server is needed.
+
+    uv run python -m benchmarks.bench_inference
+"""
+import os
+import tempfile
+import time
+
+import mlflow
+import numpy as np
+from tabulate import tabulate
+from xgboost import XGBRegressor
+
+from src.edf_forecasting_api.model_manager import load_native_model
+
+WINDOW_SIZE = 48
+BATCH_SIZES = [1, 10, 100, 1_000, 10_000]
+N_ESTIMATORS = 300
+
+
+def train_synthetic_model(seed: int = 42) -> XGBRegressor:
+    rng = np.random.default_rng(seed)
+    X = rng.normal(60000, 8000, size=(20_000, WINDOW_SIZE)).astype(np.float32)
+    y = X[:, -1] + rng.normal(0, 200, size=len(X))
+    return XGBRegressor(n_estimators=N_ESTIMATORS, max_depth=6).fit(X, y)
+
+
+def time_per_call(predict, X, repeats: int) -> float:
+    predict(X)  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        predict(X)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    model = train_synthetic_model()
+    model_dir = os.path.join(tempfile.mkdtemp(), "model")
+    mlflow.xgboost.save_model(model, model_dir)
+
+    pyfunc_model = mlflow.pyfunc.load_model(model_dir)
+    native_model = load_native_model(model_dir)
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for batch_size in BATCH_SIZES:
+        X = rng.normal(60000, 8000, size=(batch_size, WINDOW_SIZE))
+        repeats = max(5, 2000 // batch_size)
+        pyfunc_ms = time_per_call(pyfunc_model.predict, X, repeats)
+        native_ms = time_per_call(native_model.predict, X, repeats)
+        rows.append([batch_size, f"{pyfunc_ms:.3f}", f"{native_ms:.3f}", f"{pyfunc_ms / native_ms:.1f}x"])
+
+    print(tabulate(rows, headers=["Batch size", "pyfunc (ms)", "native (ms)", "Speed-up"]))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Load generator for /predict.
+
+`--concurrency` async workers send requests, optionally paced to `--rate`
+requests per second, with a mix of batch sizes and horizons or the recorded
+traffic of a predictions.jsonl (`--replay`). Without `--url` the app runs
+in-process through httpx's ASGI transport, serving a synthetic XGBoost model
+saved to a local directory: no server, registry or network is needed.
+
+    uv run python -m benchmarks.load_test --concurrency 32 --duration 20
+    uv run python -m benchmarks.load_test --rate 200 --batch-sizes 1,16 --horizons 1,48
+    uv run python -m benchmarks.load_test --url http://localhost:8000 --replay src/logs/predictions.jsonl
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+
+import httpx
+import numpy as np
+
+WINDOW_SIZE = 48
+
+
+def synthetic_payloads(batch_sizes, horizons, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    while True:
+        batch_size = int(rng.choice(batch_sizes))
+        base = rng.normal(60000, 8000, size=(batch_size, 1))
+        windows = base + rng.normal(0, 300, size=(batch_size, WINDOW_SIZE)).cumsum(axis=1)
+        yield {"features": windows.round(1).tolist(), "n_predictions": int(rng.choice(horizons))}
+
+
+def replay_payloads(path: str):
+    """Requests recorded in a predictions.jsonl log, in a loop."""
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            payloads.append({"features": record["inputs"], "n_predictions": record.get("n_predictions", 1)})
+    if not payloads:
+        raise ValueError(f"No request recorded in {path}")
+    return itertools.cycle(payloads)
+
+
+class Pacer:
+    """Spaces request starts 1 / rate seconds apart across all workers, no pacing if rate is 0."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_start = time.perf_counter()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        now = time.perf_counter()
+        start = max(now, self.next_start)
+        self.next_start = start + self.interval
+        await asyncio.sleep(start - now)
+
+
+def save_synthetic_model(path: str):
+    import mlflow
+    from xgboost import XGBRegressor
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(60000, 8000, size=(5_000, WINDOW_SIZE)).astype(np.float32)
+    model = XGBRegressor(n_estimators=100, max_depth=6).fit(X, X[:, -1] + rng.normal(0, 200, size=len(X)))
+    mlflow.xgboost.save_model(model, path)
+
+
+@asynccontextmanager
+async def in_process_client(model_uri: str, micro_batching: bool):
+    """Client on the app itself, started with its lifespan on a local model."""
+    tmp_dir = tempfile.mkdtemp(prefix="load-test-")
+    if model_uri is None:
+        model_uri = os.path.join(tmp_dir, "model")
+        save_synthetic_model(model_uri)
+
+    # Read by the API modules at import time
+    log_dir = os.path.join(tmp_dir, "logs")
+    os.makedirs(log_dir)
+    os.environ.update({
+        "MODEL_URI": model_uri,
+        "MODEL_CACHE_DIR": "",
+        "LOG_DIR": log_dir,
+        "PREDICT_MICRO_BATCHING": str(micro_batching).lower(),
+    })
+    from src.edf_forecasting_api.main import app
+
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+                yield client
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+async def run(client, payloads, concurrency: int, rate: float, duration: float, max_requests: int):
+    pacer = Pacer(rate)
+    results = []
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline and (not max_requests or len(results) < max_requests):
+            await pacer.wait()
+            payload = next(payloads)
+            start = time.perf_counter()
+            try:
+                response = await client.post("/predict", json=payload)
+                outcome = response.status_code
+            except Exception as e:
+                outcome = type(e).__name__
+            results.append((time.perf_counter() - start, outcome, len(payload["features"])))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def report(results, elapsed: float):
+    if not results:
+        print("No request sent.")  # noqa: T201
+        return
+    latencies = np.array([latency for latency, _, _ in results]) * 1000
+    outcomes = Counter(outcome for _, outcome, _ in results)
+    errors = sum(count for outcome, count in outcomes.items() if outcome != 200)
+    windows = sum(n_windows for _, outcome, n_windows in results if outcome == 200)
+
+    print(f"Requests     : {len(results)} in {elapsed:.1f}s")  # noqa: T201
+    print(f"Throughput   : {len(results) / elapsed:.1f} req/s, {windows / elapsed:.1f} windows/s")  # noqa: T201
+    print(  # noqa: T201
+        f"Latency (ms) : p50 {np.percentile(latencies, 50):.2f} | p95 {np.percentile(latencies, 95):.2f}"
+        f" | p99 {np.percentile(latencies, 99):.2f} | max {latencies.max():.2f}"
+    )
+    print(f"Error rate   : {errors / len(results):.2%} {dict(outcomes)}")  # noqa: T201
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target a running API instead of the in-process app")
+    parser.add_argument("--model-uri", help="Local MLflow model served in-process (default: a synthetic model)")
+    parser.add_argument("--micro-batching", action="store_true", help="Enable micro-batching in-process")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0, help="Target requests per second, 0 for as fast as possible")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests")
+    parser.add_argument("--batch-sizes", default="1,8,64")
+    parser.add_argument("--horizons", default="1,4,48")
+    parser.add_argument("--replay", help="predictions.jsonl whose recorded requests are replayed")
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    # One INFO line per request would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if args.replay:
+        payloads = replay_payloads(args.replay)
+    else:
+        batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+        horizons = [int(horizon) for horizon in args.horizons.split(",")]
+        payloads = synthetic_payloads(batch_sizes, horizons)
+
+    if args.url:
+        client_context = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        client_context = in_process_client(args.model_uri, args.micro_batching)
+
+    async with client_context as client:
+        results, elapsed = await run(client, payloads, args.concurrency, args.rate, args.duration, args.requests)
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
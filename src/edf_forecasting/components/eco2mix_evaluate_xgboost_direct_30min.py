@@ -0,0 +1,44 @@
+import numpy as np
+from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
+from edf_forecasting.components.eco2mix_train_xgboost_direct_30min import create_direct_windows
+
+
+class XGBEvaluateDirect30min:
+    def __init__(self, model, df_test, windows_size, horizon, target_col):
+        self.model = model
+        self.df_test = df_test
+        self.windows_size = windows_size
+        self.horizon = horizon
+        self.target_col = target_col
+
+        self.X_test = None
+        self.y_test = None
+        self.y_pred = None
+
+    def _create_windows(self):
+        if self.target_col not in self.df_test.columns:
+            raise ValueError(f"Target column '{self.target_col}' not found in test dataframe.")
+
+        self.X_test, self.y_test = create_direct_windows(
+            self.df_test[self.target_col].values, self.windows_size, self.horizon
+        )
+
+    def _predict(self):
+        self.y_pred = np.asarray(self.model.predict(self.X_test)).reshape(self.y_test.shape)
+
+    def run(self):
+        self._create_windows()
+        self._predict()
+
+        y_true = self.y_test
+        y_pred = self.y_pred
+        rmse_per_step = np.sqrt(np.mean((y_true - y_pred) ** 2, axis=0))
+
+        return {
+            "rmse": float(root_mean_squared_error(y_true, y_pred)),
+            "mae": float(mean_absolute_error(y_true, y_pred)),
+            "r2": float(r2_score(y_true, y_pred)),
+            "rmse_first_step": float(rmse_per_step[0]),
+            "rmse_last_step": float(rmse_per_step[-1]),
+            "rmse_per_step": [float(v) for v in rmse_per_step],
+        }
@@ -0,0 +1,65 @@
+import logging
+import numpy as np
+from xgboost import XGBRegressor
+from sklearn.metrics import r2_score, root_mean_squared_error
+
+logging.basicConfig(level=logging.INFO)
+
+
+def create_direct_windows(values, windows_size, horizon):
+    """Windows of `windows_size` values and the `horizon` values that follow each of them."""
+    values = np.asarray(values)
+    if len(values) < windows_size + horizon:
+        raise ValueError("Insufficient data to create at least one window.")
+
+    samples = np.lib.stride_tricks.sliding_window_view(values, window_shape=windows_size + horizon)
+    return samples[:, :windows_size], samples[:, windows_size:]
+
+
+class Eco2mixTrainGBoostDirect30min:
+    """Direct multi-horizon model: one XGBoost booster predicting the next `horizon` half-hours at once.
+
+    Unlike the recursive model, a H-step forecast is a single predict call
+    instead of H calls fed with their own predictions.
+    """
+
+    def __init__(self, df_train, training_params, windows_size, horizon, target_col, multi_strategy="multi_output_tree"):
+        self.df_train = df_train
+        self.training_params = training_params
+        self.windows_size = windows_size
+        self.horizon = horizon
+        self.target_col = target_col
+        # "multi_output_tree": one tree predicts every horizon, "one_output_per_tree": one tree per horizon and round
+        self.multi_strategy = multi_strategy
+        self.X_train = None
+        self.y_train = None
+
+    def _create_windows(self):
+        if self.target_col not in self.df_train.columns:
+            raise ValueError(f"Target column '{self.target_col}' not found in train dataframe.")
+
+        self.X_train, self.y_train = create_direct_windows(
+            self.df_train[self.target_col].values, self.windows_size, self.horizon
+        )
+
+    def run(self):
+        self._create_windows()
+
+        params = {**self.training_params, "multi_strategy": self.multi_strategy, "tree_method": "hist"}
+        model = XGBRegressor(**params)
+        model.fit(self.X_train, self.y_train)
+
+        y_pred = model.predict(self.X_train)
+        scores = {
+            "r2_score": float(r2_score(self.y_train, y_pred)),
+            "rmse": float(root_mean_squared_error(self.y_train, y_pred))
+        }
+
+        metadata = {
+            "model": "XGBoostRegressor_MultiHorizon",
+            "params_used": params,
+            "horizon": self.horizon,
+            "n_samples": len(self.X_train)
+        }
+
+        return model, scores, metadata
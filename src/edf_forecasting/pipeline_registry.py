@@ -22,6 +22,14 @@ def register_pipelines() -> dict[str, Pipeline]:
         + pipelines["create_reference_data"]
     )
 
+    # Direct multi-horizon model, reuses the hyperparameters tuned for the recursive one
+    pipelines["xgboost_direct_time_series"] = (
+        pipelines["fetch_raw_data"]
+        + pipelines["process_data"]
+        + pipelines["tune_xgboost_time_series"]
+        + pipelines["train_xgboost_direct_time_series"]
+    )
+
     pipelines["__default__"] = pipelines["xgboost_time_series"]
 
     return pipelines
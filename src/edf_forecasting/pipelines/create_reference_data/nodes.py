@@ -2,6 +2,7 @@
 This is a boilerplate pipeline 'create_reference_data'
 generated using Kedro 1.0.0
 """
+import io
 import os
 import numpy as np
 import pandas as pd
@@ -61,4 +62,54 @@ def generate_reference_datasets(train_df: pd.DataFrame, test_df: pd.DataFrame, m
 
     update_latest_reference_symlink(str(reference_dir))
 
-    return  ref_drift, ref_perf
\ No newline at end of file
+    return  ref_drift, ref_perf
+
+
+# Layout of the reference profile read by src/monitoring/reference_profile.py. The
+# monitoring service is shipped without this package, so the layout is written here and
+# tests/integrations/test_reference_profile.py checks it against DriftSketches.to_bytes.
+REFERENCE_PROFILE_FORMAT = 1
+
+
+def _centroids(values: np.ndarray, capacity: int):
+    """(means, weights) of sorted values in `capacity` equal-weight buckets, as QuantileSketch compresses them."""
+    if len(values) <= capacity:
+        return values, np.ones(len(values))
+    buckets = np.minimum(((np.arange(len(values)) + 0.5) / len(values) * capacity).astype(np.int64), capacity - 1)
+    weights = np.bincount(buckets, minlength=capacity).astype(np.float64)
+    sums = np.bincount(buckets, values, minlength=capacity)
+    return sums[weights > 0] / weights[weights > 0], weights[weights > 0]
+
+
+def create_reference_profile(ref_drift: pd.DataFrame, ref_perf: pd.DataFrame, params: dict) -> bytes:
+    """Compact npz summary of the reference data, so monitoring never parses the CSVs.
+
+    For each feature: histogram over bin edges at its quantiles (plus underflow
+    and overflow bins), `n_quantiles` equal-weight centroids and moments
+    (n, mean, std, min, max). Baseline errors of the model on `ref_perf`:
+    n, mae, rmse, bias and absolute error quantiles.
+    """
+    n_bins = params.get("profile_bins", 10)
+    n_quantiles = params.get("profile_quantiles", 256)
+    arrays = {"format": np.array(REFERENCE_PROFILE_FORMAT)}
+
+    for feature in ref_drift.columns:
+        values = np.sort(ref_drift[feature].dropna().to_numpy(dtype=np.float64))
+        if not len(values):
+            continue
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+        arrays[f"{feature}/edges"] = edges
+        arrays[f"{feature}/counts"] = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1).astype(np.float64)
+        arrays[f"{feature}/means"], arrays[f"{feature}/weights"] = _centroids(values, n_quantiles)
+        arrays[f"{feature}/capacity"] = np.array(n_quantiles)
+        arrays[f"{feature}/moments"] = np.array([len(values), values.mean(), values.std(), values[0], values[-1]])
+
+    errors = (ref_perf["prediction"] - ref_perf["target"]).dropna().to_numpy(dtype=np.float64)
+    if len(errors):
+        arrays["errors/stats"] = np.array([len(errors), np.abs(errors).mean(), np.sqrt(np.mean(errors ** 2)), errors.mean()])
+        arrays["errors/levels"] = np.array([0.5, 0.9, 0.95, 0.99])
+        arrays["errors/quantiles"] = np.quantile(np.abs(errors), arrays["errors/levels"])
+
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **arrays)
+    return buffer.getvalue()
@@ -4,7 +4,7 @@ generated using Kedro 1.0.0
 """
 
 from kedro.pipeline import node, Pipeline  # noqa
-from .nodes import generate_reference_datasets
+from .nodes import generate_reference_datasets, create_reference_profile
 
 def create_pipeline(**kwargs) -> Pipeline:
     return Pipeline(
@@ -15,5 +15,11 @@ def create_pipeline(**kwargs) -> Pipeline:
                 outputs=["reference_data_drift", "reference_data_perf"],
                 name="generate_reference_datasets",
             ),
+            node(
+                func=create_reference_profile,
+                inputs=["reference_data_drift", "reference_data_perf", "params:create_reference_data"],
+                outputs="reference_profile",
+                name="create_reference_profile",
+            ),
         ]
     )
@@ -0,0 +1,10 @@
+"""
+This is a boilerplate pipeline 'train_xgboost_direct_time_series'
+generated using Kedro 1.0.0
+"""
+
+from .pipeline import create_pipeline
+
+__all__ = ["create_pipeline"]
+
+__version__ = "0.1"
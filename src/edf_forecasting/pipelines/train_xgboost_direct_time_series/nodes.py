@@ -0,0 +1,75 @@
+"""
+This is a boilerplate pipeline 'train_xgboost_direct_time_series'
+generated using Kedro 1.0.0
+"""
+import mlflow
+import json
+import os
+import numpy as np
+import subprocess
+from edf_forecasting.components.eco2mix_evaluate_xgboost_direct_30min import XGBEvaluateDirect30min
+from edf_forecasting.components.eco2mix_train_xgboost_direct_30min import Eco2mixTrainGBoostDirect30min
+
+
+def train(df_train, training_params, params):
+    commit = subprocess.check_output(["git", "rev-parse", "HEAD"]).decode().strip()
+    mlflow.set_tag("git_commit", commit)
+
+    mlflow.log_params({
+        "train.window_size": params["windows_size"],
+        "train.horizon": params["horizon"],
+        "train.multi_strategy": params["multi_strategy"],
+        "train.target_col": params["target_col"]
+    })
+
+    trainer = Eco2mixTrainGBoostDirect30min(
+        df_train=df_train,
+        training_params=training_params,
+        windows_size=params["windows_size"],
+        horizon=params["horizon"],
+        target_col=params["target_col"],
+        multi_strategy=params["multi_strategy"]
+    )
+
+    model, scores, metadata = trainer.run()
+
+    for k, v in scores.items():
+        if isinstance(v, (int, float, np.floating)):
+            mlflow.log_metric(f"train.{k}", float(v))
+
+    mlflow.xgboost.log_model(
+        xgb_model=model,
+        artifact_path="model",
+        registered_model_name="direct_xgboost_30min"
+    )
+
+    mlflow.log_dict(metadata, "model_metadata.json")
+
+    return model, scores, metadata
+
+
+def evaluate(model, df_test, params):
+    evaluator = XGBEvaluateDirect30min(
+        model=model,
+        df_test=df_test,
+        windows_size=params["windows_size"],
+        horizon=params["horizon"],
+        target_col=params["target_col"]
+    )
+
+    results = evaluator.run()
+
+    for k, v in results.items():
+        if isinstance(v, (int, float, np.floating)):
+            mlflow.log_metric(f"eval.{k}", float(v))
+
+    save_dir = "data/07_model_output/eco2mix/time_series/30min/xgboost_direct/evaluation"
+    os.makedirs(save_dir, exist_ok=True)
+    eval_path = os.path.join(save_dir, "evaluation_results.json")
+
+    with open(eval_path, "w") as f:
+        json.dump(results, f, indent=2)
+
+    mlflow.log_artifact(eval_path, artifact_path="evaluation")
+
+    return results
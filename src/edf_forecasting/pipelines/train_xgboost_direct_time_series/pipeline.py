@@ -0,0 +1,23 @@
+"""
+This is a boilerplate pipeline 'train_xgboost_direct_time_series'
+generated using Kedro 1.0.0
+"""
+
+from kedro.pipeline import node, Pipeline, pipeline
+from .nodes import train, evaluate
+
+def create_pipeline(**kwargs) -> Pipeline:
+    return pipeline([
+        node(
+            func=train,
+            inputs=["train_checked_consumption_data", "xgboost_time_series_optuna_30min_best_params", "params:train_direct_30min"],
+            outputs=["trained_model_direct_xgboost_30min", "train_scores_direct_xgboost_30min", "metadata_direct_xgboost_30min"],
+            name="train_direct_30min"
+        ),
+        node(
+            func=evaluate,
+            inputs=["trained_model_direct_xgboost_30min", "test_checked_consumption_data", "params:evaluate_direct_30min"],
+            outputs="test_scores_direct_xgboost_30min",
+            name="evaluate_direct_30min"
+        ),
+    ])
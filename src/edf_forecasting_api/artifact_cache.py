@@ -0,0 +1,114 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+from typing import Optional, Tuple
+
+import mlflow
+
+MANIFEST = "manifest.json"
+LATEST = "latest.json"
+
+
+def directory_checksum(path: str) -> str:
+    """sha256 over the relative paths and contents of every file of a directory."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            relative = os.path.relpath(file_path, path)
+            if relative == MANIFEST:
+                continue
+            digest.update(relative.encode())
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Content-addressed local copies of registered model artifacts.
+
+    <root>/<model_name>/<version>-<checksum>/ holds the downloaded MLflow model
+    and a manifest, <root>/<model_name>/latest.json points at the last fetched
+    version so a pod can start from disk while the registry is unreachable.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _model_dir(self, model_name: str) -> str:
+        return os.path.join(self.root, model_name)
+
+    def get(self, model_name: str, version: str) -> Optional[str]:
+        """Local path of a cached version, None if absent or corrupted."""
+        model_dir = self._model_dir(model_name)
+        if not os.path.isdir(model_dir):
+            return None
+        for name in os.listdir(model_dir):
+            path = os.path.join(model_dir, name)
+            if not name.startswith(f"{version}-") or not os.path.isfile(os.path.join(path, MANIFEST)):
+                continue
+            checksum = name[len(version) + 1:]
+            if directory_checksum(path) == checksum:
+                return path
+            logging.warning(f"Cached artifact {path} is corrupted, removing it")
+            shutil.rmtree(path, ignore_errors=True)
+        return None
+
+    def latest(self, model_name: str) -> Optional[Tuple[str, str]]:
+        """(version, path) of the last fetched version still present in the cache."""
+        try:
+            with open(os.path.join(self._model_dir(model_name), LATEST)) as f:
+                version = json.load(f)["version"]
+        except (OSError, ValueError, KeyError):
+            return None
+        path = self.get(model_name, version)
+        return (version, path) if path else None
+
+    def fetch(self, model_name: str, version: str) -> str:
+        """Local path of `version`, downloaded from the registry only when not cached yet."""
+        path = self.get(model_name, version)
+        if path is None:
+            model_dir = self._model_dir(model_name)
+            os.makedirs(model_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(prefix=".download-", dir=model_dir)
+            try:
+                downloaded = mlflow.artifacts.download_artifacts(
+                    artifact_uri=f"models:/{model_name}/{version}", dst_path=tmp_dir
+                )
+                checksum = directory_checksum(downloaded)
+                with open(os.path.join(downloaded, MANIFEST), "w") as f:
+                    json.dump({"model_name": model_name, "version": version, "checksum": checksum}, f)
+                path = os.path.join(model_dir, f"{version}-{checksum}")
+                if os.path.exists(path):
+                    shutil.rmtree(path)
+                os.rename(downloaded, path)
+                logging.info(f"Model {model_name} v{version} cached in {path}")
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        self._set_latest(model_name, version)
+        return path
+
+    def prune(self, model_name: str, keep: set):
+        """Remove the cached versions of `model_name` not in `keep`."""
+        model_dir = self._model_dir(model_name)
+        if not os.path.isdir(model_dir):
+            return
+        for name in os.listdir(model_dir):
+            path = os.path.join(model_dir, name)
+            version = name.split("-", 1)[0]
+            if os.path.isdir(path) and not name.startswith(".") and version not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+                logging.info(f"Cached artifact {path} removed")
+
+    def _set_latest(self, model_name: str, version: str):
+        latest_path = os.path.join(self._model_dir(model_name), LATEST)
+        tmp_path = f"{latest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": version}, f)
+        os.replace(tmp_path, latest_path)
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from src.edf_forecasting_api.metrics import PREDICT_BATCH_SIZE, PREDICT_QUEUE_WAIT
+
+
+@dataclass
+class PendingRequest:
+    windows: np.ndarray
+    horizons: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MicroBatcher:
+    """Gathers concurrent /predict requests into one vectorized rollout.
+
+    Requests wait in an asyncio queue for at most `max_wait_ms`, or until
+    `max_batch_size` windows are queued. Their windows are stacked, rolled out
+    in a single call of `rollout_fn(windows, horizons, n_requests)` on a worker
+    thread, and each caller gets back its own rows.
+    """
+
+    def __init__(self, rollout_fn, max_batch_size: int = 1024, max_wait_ms: float = 5.0):
+        self.rollout_fn = rollout_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logging.info(f"Micro-batching enabled (max_batch_size={self.max_batch_size}, max_wait={self.max_wait * 1000:g}ms)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    async def submit(self, features, n_predictions):
+        """Queue one request and wait for its (predictions, mask, model_version), as `ModelManager.rollout`."""
+        if self._task is None:
+            raise RuntimeError("Micro-batcher not started")
+
+        windows = np.asarray(features, dtype=np.float32)
+        if windows.ndim != 2:
+            raise ValueError(f"Expected a 2D array of windows, got shape {windows.shape}")
+        horizons = np.broadcast_to(np.asarray(n_predictions, dtype=np.int64), (len(windows),))
+        # Checked here, an invalid request must not fail the batch it would join
+        if len(horizons) and horizons.min() < 0:
+            raise ValueError("Horizons must be positive")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(PendingRequest(windows, horizons, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            n_rows = len(batch[0].windows)
+            deadline = loop.time() + self.max_wait
+
+            while n_rows < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = await asyncio.wait_for(self._queue.get(), timeout)
+                except TimeoutError:
+                    break
+                batch.append(pending)
+                n_rows += len(pending.windows)
+
+            # Windows of different sizes cannot be stacked together
+            groups = defaultdict(list)
+            for pending in batch:
+                groups[pending.windows.shape[1]].append(pending)
+            for group in groups.values():
+                await self._flush(group)
+
+    async def _flush(self, batch):
+        now = time.perf_counter()
+        for pending in batch:
+            PREDICT_QUEUE_WAIT.observe(now - pending.enqueued_at)
+
+        PREDICT_BATCH_SIZE.observe(sum(len(p.windows) for p in batch))
+        await self._rollout(batch)
+
+    async def _rollout(self, batch):
+        windows = np.concatenate([p.windows for p in batch])
+        horizons = np.concatenate([p.horizons for p in batch])
+
+        try:
+            predictions, mask, version = await asyncio.to_thread(self.rollout_fn, windows, horizons, len(batch))
+        except Exception as e:
+            if len(batch) > 1:
+                # One failing request must not fail the others, each is rolled out on its own
+                logging.warning(f"Batched rollout of {len(batch)} requests failed ({e}), retrying them one by one")
+                for pending in batch:
+                    await self._rollout([pending])
+                return
+            logging.error(f"Batched rollout failed: {e}")
+            if not batch[0].future.done():
+                batch[0].future.set_exception(e)
+            return
+
+        # Scatter the rows back, trimmed to each request's own longest horizon
+        start = 0
+        for pending in batch:
+            stop = start + len(pending.windows)
+            width = int(pending.horizons.max()) if len(pending.horizons) else 0
+            if not pending.future.done():  # the caller may have gone away
+                pending.future.set_result((predictions[start:stop, :width], mask[start:stop, :width], version))
+            start = stop
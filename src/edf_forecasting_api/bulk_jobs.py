@@ -0,0 +1,240 @@
+import os
+import time
+import shutil
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+INPUT_FORMATS = ("parquet", "csv")
+# windows: one window per row, series: one observation per row, windowed by the server
+LAYOUTS = ("windows", "series")
+
+RESULT_SCHEMA = pa.schema([
+    ("row", pa.int64()),
+    ("predictions", pa.list_(pa.float32())),
+    ("model_version", pa.string()),
+])
+
+
+@dataclass
+class Job:
+    job_id: str
+    directory: str
+    input_format: str
+    layout: str
+    n_predictions: int = 1
+    column: str = "Consommation"
+    window_size: int = 48
+    status: str = "pending"  # pending, running, done, failed
+    rows_done: int = 0
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+
+    @property
+    def input_path(self) -> str:
+        return os.path.join(self.directory, f"input.{self.input_format}")
+
+    @property
+    def output_path(self) -> str:
+        return os.path.join(self.directory, "result.parquet")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "layout": self.layout,
+            "n_predictions": self.n_predictions,
+            "rows_done": self.rows_done,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _read_chunks(job: Job, chunk_rows: int):
+    """DataFrames of at most chunk_rows rows, without loading the whole file."""
+    if job.input_format == "parquet":
+        for batch in pq.ParquetFile(job.input_path).iter_batches(batch_size=chunk_rows):
+            if "features" in batch.schema.names:
+                features = batch.column("features")
+                width = len(features[0]) if len(features) else 0
+                values = features.flatten().to_numpy(zero_copy_only=False)
+                yield pd.DataFrame(np.asarray(values, dtype=np.float32).reshape(len(features), width))
+            else:
+                yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(job.input_path, chunksize=chunk_rows)
+
+
+def iter_windows(job: Job, chunk_rows: int):
+    """(first_row, float32 windows) chunks of the uploaded file.
+
+    For a series, the last window_size - 1 values of a chunk are carried over
+    so windows spanning two chunks are not lost. Window `row` ends right
+    before observation `row` + window_size, which is its first prediction.
+    Missing observations are rejected: dropping them would shift every later
+    window and its row.
+    """
+    first_row = 0
+    observed = 0
+    carry = np.empty(0, dtype=np.float32)
+    for df in _read_chunks(job, chunk_rows):
+        if job.layout == "windows":
+            windows = df.select_dtypes("number").to_numpy(dtype=np.float32)
+        else:
+            series = df[job.column] if job.column in df.columns else df.select_dtypes("number").iloc[:, 0]
+            missing = np.flatnonzero(series.isna().to_numpy())
+            if len(missing):
+                raise ValueError(f"Missing value in '{job.column}' at row {observed + missing[0]}")
+            observed += len(series)
+            values = np.concatenate([carry, series.to_numpy(dtype=np.float32)])
+            if len(values) < job.window_size:
+                carry = values
+                continue
+            windows = np.lib.stride_tricks.sliding_window_view(values, job.window_size)
+            carry = values[len(values) - job.window_size + 1:]
+
+        if len(windows):
+            yield first_row, windows
+            first_row += len(windows)
+
+
+def _to_table(first_row: int, predictions: np.ndarray, mask: np.ndarray, version) -> pa.Table:
+    offsets = np.concatenate([[0], np.cumsum(mask.sum(axis=1))]).astype(np.int32)
+    rows = pa.ListArray.from_arrays(pa.array(offsets), pa.array(predictions[mask], type=pa.float32()))
+    return pa.table({
+        "row": pa.array(np.arange(first_row, first_row + len(predictions), dtype=np.int64)),
+        "predictions": rows,
+        "model_version": pa.array([str(version)] * len(predictions), type=pa.string()),
+    }, schema=RESULT_SCHEMA)
+
+
+class BulkJobManager:
+    """Scores uploaded files in the background, chunk by chunk.
+
+    Chunks of `chunk_rows` windows are rolled out with
+    `rollout_fn(windows, horizons)` on a pool of `max_workers` threads, at most
+    `max_workers` chunks in flight per job, and appended in order to a Parquet
+    result. Memory depends on the chunk size, not on the file size.
+    Finished jobs and their files are deleted `ttl_seconds` after they end
+    (0 keeps them until deleted).
+    """
+
+    def __init__(self, rollout_fn, root: str, chunk_rows: int = 4096, max_workers: int = 2, ttl_seconds: float = 0):
+        self.rollout_fn = rollout_fn
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.max_workers = max_workers
+        self.ttl_seconds = ttl_seconds
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bulk-job")
+            return self._executor
+
+    def create(self, input_format: str, layout: str, **options) -> Job:
+        self.expire()
+        if input_format not in INPUT_FORMATS:
+            raise ValueError(f"Unknown input format '{input_format}', expected one of {INPUT_FORMATS}")
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown layout '{layout}', expected one of {LAYOUTS}")
+        job_id = uuid4().hex
+        job = Job(job_id, os.path.join(self.root, job_id), input_format, layout, **options)
+        os.makedirs(job.directory, exist_ok=True)
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def start(self, job: Job):
+        threading.Thread(target=self._run, args=(job,), daemon=True, name=f"bulk-job-{job.job_id[:8]}").start()
+
+    def _run(self, job: Job):
+        job.status = "running"
+        pool = self._pool()
+        in_flight = deque()
+        writer = None
+
+        def write_oldest():
+            nonlocal writer
+            first_row, future = in_flight.popleft()
+            predictions, mask, version = future.result()
+            if writer is None:
+                writer = pq.ParquetWriter(job.output_path, RESULT_SCHEMA, compression="zstd")
+            writer.write_table(_to_table(first_row, predictions, mask, version))
+            job.rows_done += len(predictions)
+
+        try:
+            for first_row, windows in iter_windows(job, self.chunk_rows):
+                in_flight.append((first_row, pool.submit(self.rollout_fn, windows, job.n_predictions)))
+                if len(in_flight) >= self.max_workers:
+                    write_oldest()
+            while in_flight:
+                write_oldest()
+            if writer is None:
+                pq.write_table(RESULT_SCHEMA.empty_table(), job.output_path)
+            job.status = "done"
+            logging.info(f"Bulk job {job.job_id} done: {job.rows_done} windows scored")
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+            logging.error(f"Bulk job {job.job_id} failed: {e}")
+        finally:
+            if writer is not None:
+                writer.close()
+            job.finished_at = datetime.now().isoformat()
+            if os.path.exists(job.input_path):
+                os.remove(job.input_path)
+
+    def delete(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+    def expire(self):
+        """Delete finished jobs older than the TTL, and job directories left by a previous process."""
+        if self.ttl_seconds <= 0:
+            return
+        now = time.time()
+        cutoff = datetime.fromtimestamp(now - self.ttl_seconds)
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and datetime.fromisoformat(job.finished_at) < cutoff
+            ]
+            known = set(self._jobs)
+        for job_id in expired:
+            self.delete(job_id)
+
+        if not os.path.isdir(self.root):
+            return
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name not in known and os.path.isdir(path) and os.path.getmtime(path) < now - self.ttl_seconds:
+                shutil.rmtree(path, ignore_errors=True)
+        if expired:
+            logging.info(f"Deleted {len(expired)} expired bulk jobs")
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
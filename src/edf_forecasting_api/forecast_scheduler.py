@@ -0,0 +1,126 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from uuid import uuid4
+
+from src.edf_forecasting_api.logger_utils import log_predictions
+
+
+@dataclass(frozen=True)
+class Forecast:
+    series_id: str
+    # {horizon: predictions}, every horizon a prefix of the same rollout
+    predictions: Dict[int, List[float]]
+    model_version: str
+    # Time of the latest observation of the window the forecast starts from
+    data_timestamp: Optional[datetime]
+    computed_at: datetime
+    prediction_id: str
+
+
+class ForecastScheduler:
+    """Forecast of one stored series, recomputed in the background and served from memory.
+
+    A thread rolls the latest window of `series_id` out to the largest of
+    `horizons` whenever the revision of the series in the store or the served
+    model version changes, then publishes the result by a single reference
+    swap. Reading `latest` never touches the model.
+    """
+
+    def __init__(self, manager, series_store, series_id: str, horizons: Sequence[int] = (1, 48), check_interval: float = 1.0):
+        if not horizons or min(horizons) < 1:
+            raise ValueError("Forecast horizons must be at least 1")
+        self.manager = manager
+        self.series_store = series_store
+        self.series_id = series_id
+        self.horizons = tuple(sorted(set(horizons)))
+        self.check_interval = check_interval
+        self._forecast: Optional[Forecast] = None
+        self._data_timestamp: Optional[datetime] = None
+        # Store revision of the window the forecast was computed from
+        self._revision: Optional[int] = None
+        self._publish_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def latest(self) -> Optional[Forecast]:
+        return self._forecast
+
+    def notify(self, series_id: str, data_timestamp: Optional[datetime] = None):
+        """New observations of `series_id`, the forecast is recomputed if it is the scheduled series."""
+        if series_id != self.series_id:
+            return
+        self._data_timestamp = data_timestamp or datetime.now()
+        self._wake.set()
+
+    def forget(self, series_id: str):
+        """Drop the forecast of a deleted series, it is not served anymore."""
+        if series_id != self.series_id:
+            return
+        with self._publish_lock:
+            self._forecast = None
+            self._revision = None
+
+    def _is_stale(self) -> bool:
+        forecast = self._forecast
+        return (
+            forecast is None
+            or forecast.model_version != str(self.manager.current_version)
+            or self._revision != self.series_store.revision(self.series_id)
+        )
+
+    def refresh(self) -> Optional[Forecast]:
+        """Recompute the forecast if the window or the model changed, returns the latest one."""
+        if not self.manager.ready or self.series_id not in self.series_store or not self._is_stale():
+            return self._forecast
+
+        # Read before the window: an observation pushed meanwhile triggers another refresh
+        data_timestamp = self._data_timestamp
+        revision = self.series_store.revision(self.series_id)
+        series_ids, windows = self.series_store.windows([self.series_id])
+        if not series_ids:
+            return self._forecast
+
+        predictions, _, model_version = self.manager.rollout(windows, self.horizons[-1])
+        row = predictions[0].tolist()
+        prediction_id = str(uuid4())
+        log_predictions(windows, predictions, self.manager.model_name or "unknown", model_version or 0, self.horizons[-1], prediction_id)
+
+        forecast = Forecast(
+            series_id=self.series_id,
+            predictions={horizon: row[:horizon] for horizon in self.horizons},
+            model_version=str(model_version),
+            data_timestamp=data_timestamp,
+            computed_at=datetime.now(),
+            prediction_id=prediction_id,
+        )
+        with self._publish_lock:
+            # Deleted during the rollout: forget() already ran, nothing to publish
+            if self.series_id in self.series_store:
+                self._forecast, self._revision = forecast, revision
+            return self._forecast
+
+    def start(self):
+        def run():
+            while not self._stop_event.is_set():
+                self._wake.clear()
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logging.error(f"Scheduled forecast of {self.series_id} failed: {e}")
+                # Woken up by observations, the model version is checked every check_interval
+                self._wake.wait(self.check_interval)
+
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=run, daemon=True, name="forecast-scheduler")
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
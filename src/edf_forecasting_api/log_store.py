@@ -0,0 +1,210 @@
+import os
+import shutil
+import logging
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Segment files: <root>/<stream>/date=YYYY-MM-DD/seg-<first_ms>-<last_ms>-<id>.parquet
+# A segment being written has a leading dot and is ignored by readers.
+SEGMENT_PREFIX = "seg-"
+
+
+def prediction_schema(window_size: int) -> pa.Schema:
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms")),
+        ("prediction_id", pa.string()),
+        ("row_index", pa.int32()),
+        ("model_name", pa.string()),
+        ("model_version", pa.string()),
+        ("n_predictions", pa.int32()),
+        ("inputs", pa.list_(pa.float32(), window_size)),
+        ("outputs", pa.list_(pa.float32())),
+    ])
+
+
+def feedback_schema(window_size: int) -> pa.Schema:
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms")),
+        ("prediction_id", pa.string()),
+        ("row_index", pa.int32()),
+        ("inputs", pa.list_(pa.float32(), window_size)),
+        ("outputs", pa.list_(pa.float32())),
+    ])
+
+
+def compact_feedback_schema() -> pa.Schema:
+    return pa.schema([
+        ("timestamp", pa.timestamp("ms")),
+        ("prediction_id", pa.string()),
+        ("row_index", pa.int32()),
+        ("value", pa.float32()),
+    ])
+
+
+class _OpenSegment:
+    def __init__(self, directory: str, schema: pa.Schema, compression: str):
+        self.directory = directory
+        self.tmp_path = os.path.join(directory, f".{SEGMENT_PREFIX}{uuid4().hex[:8]}.parquet")
+        self.writer = pq.ParquetWriter(self.tmp_path, schema, compression=compression)
+        self.opened_at = time.monotonic()
+        self.n_rows = 0
+        self.first_ms = None
+        self.last_ms = None
+
+    def write(self, table: pa.Table, first_ms: int, last_ms: int):
+        self.writer.write_table(table)
+        self.n_rows += table.num_rows
+        self.first_ms = first_ms if self.first_ms is None else min(self.first_ms, first_ms)
+        self.last_ms = last_ms if self.last_ms is None else max(self.last_ms, last_ms)
+
+    def close(self):
+        self.writer.close()
+        if self.n_rows == 0:
+            os.remove(self.tmp_path)
+            return None
+        name = os.path.basename(self.tmp_path)[1:].replace(SEGMENT_PREFIX, f"{SEGMENT_PREFIX}{self.first_ms}-{self.last_ms}-", 1)
+        path = os.path.join(self.directory, name)
+        os.rename(self.tmp_path, path)
+        return path
+
+
+class SegmentLogStore:
+    """Prediction and feedback log backend writing compressed Parquet segments.
+
+    One row per window, inputs stored as a fixed-width float32 column. Segments
+    are partitioned by day, rotated after `max_segment_rows` rows or
+    `max_segment_seconds` seconds, and day partitions older than
+    `retention_days` are deleted on rotation.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        window_size: int = 48,
+        max_segment_rows: int = 100_000,
+        max_segment_seconds: float = 300,
+        retention_days: int = 30,
+        compression: str = "zstd",
+    ):
+        self.root = root
+        self.window_size = window_size
+        self.max_segment_rows = max_segment_rows
+        self.max_segment_seconds = max_segment_seconds
+        self.retention_days = retention_days
+        self.compression = compression
+        self.schemas = {
+            "predictions": prediction_schema(window_size),
+            "ground_truth": feedback_schema(window_size),
+            "ground_truth_compact": compact_feedback_schema(),
+        }
+        self._segments = {}
+
+    def write(self, stream: str, records: list):
+        """Append log records (as built by logger_utils) to the open segment of `stream`."""
+        table = self._to_table(stream, records)
+        if table is None or table.num_rows == 0:
+            return
+
+        day = datetime.now().strftime("%Y-%m-%d")
+        segment = self._segments.get(stream)
+        if segment is not None and not segment.directory.endswith(f"date={day}"):
+            self._rotate(stream)
+            segment = None
+        if segment is None:
+            directory = os.path.join(self.root, stream, f"date={day}")
+            os.makedirs(directory, exist_ok=True)
+            segment = self._segments[stream] = _OpenSegment(directory, self.schemas[stream], self.compression)
+
+        timestamps = table.column("timestamp").cast(pa.int64()).to_numpy()
+        segment.write(table, int(timestamps.min()), int(timestamps.max()))
+
+        if segment.n_rows >= self.max_segment_rows or time.monotonic() - segment.opened_at >= self.max_segment_seconds:
+            self._rotate(stream)
+
+    def rotate_expired(self):
+        """Close the segments open for `max_segment_seconds` or since a previous day, even without new records."""
+        day = datetime.now().strftime("%Y-%m-%d")
+        for stream, segment in list(self._segments.items()):
+            if time.monotonic() - segment.opened_at >= self.max_segment_seconds or not segment.directory.endswith(f"date={day}"):
+                self._rotate(stream)
+
+    def close(self):
+        for stream in list(self._segments):
+            self._rotate(stream)
+
+    def _rotate(self, stream: str):
+        segment = self._segments.pop(stream, None)
+        if segment is not None:
+            path = segment.close()
+            if path:
+                logging.info(f"Log segment written: {path} ({segment.n_rows} rows)")
+        self.apply_retention()
+
+    def apply_retention(self):
+        if not self.retention_days:
+            return
+        oldest = (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for stream in self.schemas:
+            stream_dir = os.path.join(self.root, stream)
+            if not os.path.isdir(stream_dir):
+                continue
+            for partition in os.listdir(stream_dir):
+                if partition.startswith("date=") and partition[len("date="):] < oldest:
+                    shutil.rmtree(os.path.join(stream_dir, partition), ignore_errors=True)
+                    logging.info(f"Log partition expired: {stream}/{partition}")
+
+    def _to_table(self, stream: str, records: list):
+        if stream == "ground_truth_compact":
+            return self._compact_to_table(records)
+
+        columns = {name: [] for name in self.schemas[stream].names}
+        inputs = []
+        skipped = 0
+
+        for record in records:
+            timestamp = datetime.fromisoformat(record.get("timestamp") or record.get("timespamp"))
+            outputs = record.get("outputs", [])
+            horizons = record.get("n_predictions")
+            for idx, window in enumerate(record.get("inputs", [])):
+                if len(window) != self.window_size:
+                    skipped += 1
+                    continue
+                inputs.append(window)
+                columns["timestamp"].append(timestamp)
+                columns["prediction_id"].append(record["prediction_id"])
+                columns["row_index"].append(idx)
+                output = outputs[idx] if idx < len(outputs) else []
+                columns["outputs"].append(np.atleast_1d(np.asarray(output, dtype=np.float32)))
+                if stream == "predictions":
+                    columns["model_name"].append(str(record.get("model_name")))
+                    columns["model_version"].append(str(record.get("model_version")))
+                    columns["n_predictions"].append(horizons[idx] if isinstance(horizons, (list, np.ndarray)) else horizons)
+
+        if skipped:
+            logging.warning(f"{skipped} {stream} windows skipped, expected {self.window_size} values")
+        if not inputs:
+            return None
+
+        flat_inputs = pa.array(np.asarray(inputs, dtype=np.float32).reshape(-1))
+        columns["inputs"] = pa.FixedSizeListArray.from_arrays(flat_inputs, self.window_size)
+        return pa.table(columns, schema=self.schemas[stream])
+
+    def _compact_to_table(self, records: list):
+        lengths = [len(record["prediction_ids"]) for record in records]
+        if not sum(lengths):
+            return None
+        timestamps = np.repeat(
+            np.array([datetime.fromisoformat(record["timestamp"]) for record in records], dtype="datetime64[ms]"),
+            lengths,
+        )
+        return pa.table({
+            "timestamp": timestamps,
+            "prediction_id": [pid for record in records for pid in record["prediction_ids"]],
+            "row_index": np.concatenate([np.asarray(record["row_indices"], dtype=np.int32) for record in records]),
+            "value": np.concatenate([np.asarray(record["values"], dtype=np.float32) for record in records]),
+        }, schema=self.schemas["ground_truth_compact"])
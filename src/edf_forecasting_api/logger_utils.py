@@ -1,15 +1,194 @@
 import os
 import json
+import queue
+import logging
+import threading
+import time
+from collections import defaultdict
 from datetime import datetime
+import numpy as np
+from src.edf_forecasting_api.metrics import LOG_RECORDS_DROPPED, LOG_WRITE_SECONDS
 
 LOG_DIR = os.getenv("LOG_DIR", "src/logs")
 PREDICTION_LOG_FILE = os.path.join(LOG_DIR, "predictions.jsonl")
 FEEDBACK_LOG_FILE = os.path.join(LOG_DIR, "ground_truth.jsonl")
+# /feedback/batch: observed values only, without the inputs already logged with the prediction
+COMPACT_FEEDBACK_LOG_FILE = os.path.join(LOG_DIR, "ground_truth_compact.jsonl")
+
+# "jsonl" (one file per stream) or "parquet" (rotated segments under LOG_DIR/segments)
+LOG_BACKEND = os.getenv("LOG_BACKEND", "jsonl")
+LOG_SEGMENT_MAX_ROWS = int(os.getenv("LOG_SEGMENT_MAX_ROWS", "100000"))
+LOG_SEGMENT_MAX_SECONDS = float(os.getenv("LOG_SEGMENT_MAX_SECONDS", "300"))
+LOG_RETENTION_DAYS = int(os.getenv("LOG_RETENTION_DAYS", "30"))
+LOG_WINDOW_SIZE = int(os.getenv("LOG_WINDOW_SIZE", "48"))
+
+PREDICTION_STREAM = "predictions"
+FEEDBACK_STREAM = "ground_truth"
+COMPACT_FEEDBACK_STREAM = "ground_truth_compact"
+
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("LOG_BATCH_SIZE", "500"))
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "1.0"))
 
 # Create logs directory if do not exist
 #os.makedirs(LOG_DIR, exist_ok=True)
 
 
+def _to_json(value):
+    """json.dumps fallback for the NumPy arrays logged by the binary /predict path."""
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JsonlLogSink:
+    """Appends records as JSON lines, one file per stream."""
+
+    def __init__(self, paths: dict):
+        self.paths = paths
+
+    def write(self, stream: str, records: list):
+        with open(self.paths[stream], "a") as f:
+            f.writelines(json.dumps(record, default=_to_json) + "\n" for record in records)
+
+    def rotate_expired(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def create_log_sink(backend: str = LOG_BACKEND):
+    if backend == "jsonl":
+        return JsonlLogSink({
+            PREDICTION_STREAM: PREDICTION_LOG_FILE,
+            FEEDBACK_STREAM: FEEDBACK_LOG_FILE,
+            COMPACT_FEEDBACK_STREAM: COMPACT_FEEDBACK_LOG_FILE,
+        })
+    if backend == "parquet":
+        from src.edf_forecasting_api.log_store import SegmentLogStore
+
+        return SegmentLogStore(
+            root=os.path.join(LOG_DIR, "segments"),
+            window_size=LOG_WINDOW_SIZE,
+            max_segment_rows=LOG_SEGMENT_MAX_ROWS,
+            max_segment_seconds=LOG_SEGMENT_MAX_SECONDS,
+            retention_days=LOG_RETENTION_DAYS,
+        )
+    raise ValueError(f"Unknown log backend '{backend}', expected 'jsonl' or 'parquet'")
+
+
+class BackgroundLogWriter:
+    """Writes log records from a bounded in-memory queue on a single background thread.
+
+    Records are flushed in batches, when `batch_size` records are pending or
+    `flush_interval` seconds after the first one. When the queue is full, new
+    records are dropped and counted instead of blocking the request.
+    """
+
+    def __init__(self, sink, max_queue_size: int = 10000, batch_size: int = 500, flush_interval: float = 1.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logging.info("Background log writer started.")
+
+    def stop(self, timeout: float = 10.0):
+        """Flush every queued record, then stop the thread and close the sink."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            # Still draining: records keep going through the queue, the sink stays open
+            logging.warning(f"Background log writer still flushing after {timeout}s, {self._queue.qsize()} records queued.")
+            return
+        self._thread = None
+        self.sink.close()
+        logging.info(f"Background log writer stopped ({self.dropped} records dropped).")
+
+    def submit(self, stream: str, record: dict) -> bool:
+        try:
+            self._queue.put_nowait((stream, record))
+            return True
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            LOG_RECORDS_DROPPED.inc()
+            if dropped == 1 or dropped % 1000 == 0:
+                logging.warning(f"Log queue full, {dropped} records dropped so far")
+            return False
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            except queue.Empty:
+                # Idle streams still get their segments closed on time
+                self._rotate_expired()
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline or self._stop_event.is_set()):
+                self._flush(batch)
+                batch, deadline = [], None
+                self._rotate_expired()
+
+        if batch:
+            self._flush(batch)
+
+    def _rotate_expired(self):
+        try:
+            self.sink.rotate_expired()
+        except Exception as e:
+            logging.error(f"Failed to rotate expired log segments: {e}")
+
+    def _flush(self, batch):
+        by_stream = defaultdict(list)
+        for stream, record in batch:
+            by_stream[stream].append(record)
+        for stream, records in by_stream.items():
+            try:
+                start = time.perf_counter()
+                self.sink.write(stream, records)
+                LOG_WRITE_SECONDS.labels(stream).observe(time.perf_counter() - start)
+            except Exception as e:
+                logging.error(f"Failed to write {len(records)} {stream} records: {e}")
+
+
+log_writer = BackgroundLogWriter(
+    create_log_sink(),
+    max_queue_size=LOG_QUEUE_SIZE,
+    batch_size=LOG_BATCH_SIZE,
+    flush_interval=LOG_FLUSH_INTERVAL,
+)
+
+
+def _write_record(stream: str, record: dict):
+    """Hand the record to the background writer, or write it inline when it is not running."""
+    if log_writer.running:
+        log_writer.submit(stream, record)
+        return
+    log_writer.sink.write(stream, [record])
+
+
 def log_predictions(inputs, outputs, model_name, model_version, n_predictions, prediction_id):
     """Add a line in predictions.jsonl"""
     record = {
@@ -23,8 +202,7 @@ def log_predictions(inputs, outputs, model_name, model_version, n_predictions, p
         "n_inputs": len(inputs),
         "n_outputs": len(outputs)
     }
-    with open(PREDICTION_LOG_FILE, "a") as f:
-        f.write(json.dumps(record) + "\n")
+    _write_record(PREDICTION_STREAM, record)
 
 def log_feedback(inputs, outputs, prediction_id):
     """Add a lin in grounds_truth.jsonl"""
@@ -34,5 +212,14 @@ def log_feedback(inputs, outputs, prediction_id):
         "inputs": inputs,
         "outputs": outputs
     }
-    with open(FEEDBACK_LOG_FILE, "a") as f:
-        f.write(json.dumps(record) + "\n")
\ No newline at end of file
+    _write_record(FEEDBACK_STREAM, record)
+
+def log_feedback_batch(prediction_ids, row_indices, values):
+    """Add one line of (prediction_id, row_index, observed value) columns in ground_truth_compact.jsonl"""
+    record = {
+        "timestamp": datetime.now().isoformat(),
+        "prediction_ids": prediction_ids,
+        "row_indices": row_indices,
+        "values": values,
+    }
+    _write_record(COMPACT_FEEDBACK_STREAM, record)
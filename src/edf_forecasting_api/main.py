@@ -1,34 +1,151 @@
 import os
+import json
+import time
 import logging
+import numpy as np
+from functools import partial
+from typing import Literal, Optional
 from uuid import uuid4
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
 from prometheus_fastapi_instrumentator import Instrumentator
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from contextlib import asynccontextmanager
-from src.edf_forecasting_api.schema import InputData, FeedbackData
+from src.edf_forecasting_api.schema import InputData, FeedbackBatch, FeedbackData, SeriesAdvance, SeriesObservations, SeriesRegistration
 from src.edf_forecasting_api.model_manager import ModelManager
-from src.edf_forecasting_api.logger_utils import log_feedback, log_predictions
+from src.edf_forecasting_api.artifact_cache import ArtifactCache
+from src.edf_forecasting_api.shared_model import manifest_path
+from src.edf_forecasting_api.model_registry import ModelNotAvailable, ModelRegistry, UnknownModel, parse_served_models
+from src.edf_forecasting_api.logger_utils import log_feedback, log_feedback_batch, log_predictions, log_writer
+from src.edf_forecasting_api.batching import MicroBatcher
+from src.edf_forecasting_api.bulk_jobs import BulkJobManager
+from src.edf_forecasting_api.series_store import SeriesStore
+from src.edf_forecasting_api.forecast_scheduler import ForecastScheduler
+from src.edf_forecasting_api.rollout import RolloutStream, to_ragged_list
+from src.edf_forecasting_api.metrics import PREDICT_STAGE_SECONDS
+from src.edf_forecasting_api.payload_formats import (
+    JSON,
+    ARROW_STREAM,
+    FLOAT32,
+    MSGPACK,
+    UnsupportedFormat,
+    decode_windows,
+    encode_predictions,
+    negotiate_request,
+    negotiate_response,
+)
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 # Variable name
 MODEL_NAME = os.getenv("MODEL_NAME", "timeseries_xgboost_30min")
 MODEL_CHECK_INTERVAL = int(os.getenv("MODEL_CHECK_INTERVAL", "300"))
+MODEL_SERVING_MODE = os.getenv("MODEL_SERVING_MODE", "native") # "native" or "pyfunc"
+PREDICT_MICRO_BATCHING = os.getenv("PREDICT_MICRO_BATCHING", "false").lower() == "true"
+PREDICT_BATCH_MAX_SIZE = int(os.getenv("PREDICT_BATCH_MAX_SIZE", "1024"))
+PREDICT_BATCH_MAX_WAIT_MS = float(os.getenv("PREDICT_BATCH_MAX_WAIT_MS", "5"))
+PREDICTION_CACHE_MAX_MB = float(os.getenv("PREDICTION_CACHE_MAX_MB", "64")) # 0 disables the cache
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "src/model_cache") # empty disables the artifact cache
+MODEL_URI = os.getenv("MODEL_URI") or None # local model directory, skips the registry
+MODEL_WARMUP_BATCH_SIZES = tuple(int(size) for size in os.getenv("MODEL_WARMUP_BATCH_SIZES", "1,32,256").split(",") if size.strip())
+# Models served under /models/{name}/predict, as name:kind (autoregressive, tabular or direct)
+SERVED_MODELS = parse_served_models(os.getenv("SERVED_MODELS", "timeseries_xgboost_30min:autoregressive,tabular_xgboost_30min:tabular,direct_xgboost_30min:direct"))
+# /predict strategy: "recursive" rolls MODEL_NAME out step by step, "direct" asks DIRECT_MODEL_NAME for all steps at once
+PREDICT_STRATEGY = os.getenv("PREDICT_STRATEGY", "recursive")
+DIRECT_MODEL_NAME = os.getenv("DIRECT_MODEL_NAME", "direct_xgboost_30min")
+SERVED_MODELS.setdefault(DIRECT_MODEL_NAME, "direct")
+# standalone: every process follows the registry, worker: follow the model coordinator (model_coordinator.py)
+MODEL_SERVING_ROLE = os.getenv("MODEL_SERVING_ROLE", "standalone")
+MODEL_SHARED_DIR = os.getenv("MODEL_SHARED_DIR", "/dev/shm/edf-models")
+MODEL_SHARED_POLL_INTERVAL = float(os.getenv("MODEL_SHARED_POLL_INTERVAL", "1"))
+MODEL_MEMORY_BUDGET_MB = float(os.getenv("MODEL_MEMORY_BUDGET_MB", "0")) # 0 means no eviction
+JOB_DIR = os.getenv("JOB_DIR", "src/jobs")
+JOB_CHUNK_ROWS = int(os.getenv("JOB_CHUNK_ROWS", "4096"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_TTL_HOURS = float(os.getenv("JOB_TTL_HOURS", "24")) # finished jobs and their results are deleted after that
+SERIES_WINDOW_SIZE = int(os.getenv("SERIES_WINDOW_SIZE", "48"))
+SERIES_MAX = int(os.getenv("SERIES_MAX", "100000"))
+# Stored series whose forecast is precomputed for /forecast/latest, and its horizons (48 half-hours: next day)
+FORECAST_SERIES_ID = os.getenv("FORECAST_SERIES_ID", "national")
+FORECAST_HORIZONS = tuple(int(horizon) for horizon in os.getenv("FORECAST_HORIZONS", "1,48").split(",") if horizon.strip())
+FORECAST_CHECK_INTERVAL = float(os.getenv("FORECAST_CHECK_INTERVAL", "1"))
+
+def create_model_manager(name: str, model_uri=None) -> ModelManager:
+    worker = MODEL_SERVING_ROLE == "worker" and not model_uri
+    return ModelManager(
+        model_name=name,
+        check_interval=MODEL_SHARED_POLL_INTERVAL if worker else MODEL_CHECK_INTERVAL,
+        serving_mode=MODEL_SERVING_MODE,
+        kind=SERVED_MODELS.get(name, "autoregressive"),
+        cache_max_bytes=int(PREDICTION_CACHE_MAX_MB * 1024 * 1024),
+        artifact_cache=ArtifactCache(MODEL_CACHE_DIR) if MODEL_CACHE_DIR else None,
+        model_uri=model_uri,
+        warmup_batch_sizes=MODEL_WARMUP_BATCH_SIZES,
+        shared_manifest=manifest_path(MODEL_SHARED_DIR, name) if worker else None,
+    )
 
 # Create a manager model instance
-model_manager = ModelManager(model_name=MODEL_NAME, check_interval=MODEL_CHECK_INTERVAL)
+model_manager = create_model_manager(MODEL_NAME, model_uri=MODEL_URI)
+
+# Other models are loaded on first request, MODEL_NAME stays pinned
+model_registry = ModelRegistry(
+    create_model_manager,
+    names=SERVED_MODELS,
+    memory_budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024),
+)
+model_registry.add(model_manager, pinned=True)
+
+# Optional micro-batching of concurrent /predict requests
+micro_batcher = MicroBatcher(
+    model_manager.rollout,
+    max_batch_size=PREDICT_BATCH_MAX_SIZE,
+    max_wait_ms=PREDICT_BATCH_MAX_WAIT_MS,
+) if PREDICT_MICRO_BATCHING else None
+
+# Bulk scoring of uploaded files
+bulk_jobs = BulkJobManager(
+    partial(model_manager.rollout, use_cache=False),
+    JOB_DIR,
+    chunk_rows=JOB_CHUNK_ROWS,
+    max_workers=JOB_WORKERS,
+    ttl_seconds=JOB_TTL_HOURS * 3600,
+)
+
+# Latest observations of the series registered by clients
+series_store = SeriesStore(window_size=SERIES_WINDOW_SIZE, max_series=SERIES_MAX)
+
+# Forecast of FORECAST_SERIES_ID, recomputed on new observations and model versions
+forecast_scheduler = ForecastScheduler(
+    model_manager,
+    series_store,
+    FORECAST_SERIES_ID,
+    horizons=FORECAST_HORIZONS,
+    check_interval=FORECAST_CHECK_INTERVAL,
+)
 
 # FastAPI's lifespan context to handle startup and shutdown tasks
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    log_writer.start()
     model_manager.load_model()
     model_manager.start_watcher()
     logging.info("Model monitoring enabled.")
+    if micro_batcher is not None:
+        micro_batcher.start()
+    forecast_scheduler.start()
 
     yield
 
     # Shutdown
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    forecast_scheduler.stop()
     model_manager.stop_watcher()
+    model_registry.stop()
+    bulk_jobs.shutdown()
+    log_writer.stop()
 
 # FastAPI app
 app = FastAPI(title="Consumption Forecasting API", lifespan=lifespan)
@@ -42,30 +159,349 @@ def root():
     """Home Page"""
     return {"message": "Welcome to Consumption Forecasting API"}
 
+@app.get("/health/live")
+def health_live():
+    """The process answers."""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def health_ready():
+    """Ready only once a warmed model is served, so cold pods get no traffic."""
+    if not model_manager.ready:
+        return JSONResponse(content={"status": "not ready"}, status_code=503)
+    return {"status": "ready", "model_name": model_manager.model_name, "model_version": model_manager.current_version}
+
 @app.get("/favicon.ico", include_in_schema=False)
 def favicon():
     return FileResponse("src/edf_forecasting_api/favicon.ico") if os.path.exists("src/edf_forecasting_api/favicon.ico") else JSONResponse(content={}, status_code=204)
 
-@app.post("/predict")
-def predict(data: InputData):
+# /predict reads its body itself to accept binary formats, document the JSON one
+PREDICT_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            JSON: {"schema": InputData.model_json_schema()},
+            ARROW_STREAM: {"schema": {"type": "string", "format": "binary"}},
+            FLOAT32: {"schema": {"type": "string", "format": "binary"}},
+            MSGPACK: {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+async def serve_prediction(request: Request, manager: ModelManager, n_predictions: int, batcher=None):
+    """Decode a /predict body in any supported format, predict with `manager` and encode the answer."""
     # Generate prediction identifier
     prediction_id = str(uuid4())
+    # Stage durations, observed once the answering model version is known
+    timings = {}
+    start = time.perf_counter()
+
+    try:
+        request_type = negotiate_request(request.headers.get("content-type"))
+        response_type = negotiate_response(request.headers.get("accept"))
+    except UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    # Exctract data, binary bodies are decoded straight into NumPy without per-value validation
+    body = await request.body()
+    if request_type == JSON:
+        try:
+            data = InputData.model_validate_json(body)
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False)
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in errors])
+        consumptions = data.features
+        n_predictions = data.n_predictions
+    else:
+        try:
+            consumptions, n_predictions = decode_windows(request_type, body, n_predictions)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid {request_type} body: {e}")
 
-    # Exctract data
-    consumptions = data.features
-    n_predictions = data.n_predictions
+    timings["parse"] = time.perf_counter() - start
 
     # Prediction
-    predictions = model_manager.predict(consumptions, n_predictions)
+    submitted = time.perf_counter()
+    def rollout():
+        timings["queue"] = time.perf_counter() - submitted  # wait for a worker thread
+        return manager.rollout(consumptions, n_predictions)
+    try:
+        if batcher is not None:
+            predictions, mask, model_version = await batcher.submit(consumptions, n_predictions)
+        else:
+            predictions, mask, model_version = await run_in_threadpool(rollout)
+    except ValueError as e:
+        # Windows or horizons the model cannot take, whatever the endpoint
+        raise HTTPException(status_code=422, detail=str(e))
+    timings["predict"] = time.perf_counter() - submitted
+
+    # Arrays are turned into lists by the log writer, off the request path
+    outputs = predictions if mask.all() else to_ragged_list(predictions, mask)
+    n_predictions = n_predictions.tolist() if hasattr(n_predictions, "tolist") else n_predictions
 
     # Logging
-    model_version = model_manager.current_version or 0 # 0 means unknown
-    model_name = model_manager.model_name or "unknown"
-    log_predictions(consumptions, predictions, model_name, model_version, n_predictions, prediction_id)
+    model_version = model_version or 0 # 0 means unknown
+    model_name = manager.model_name or "unknown"
+    logged = time.perf_counter()
+    log_predictions(consumptions, outputs, model_name, model_version, n_predictions, prediction_id)
+    timings["log"] = time.perf_counter() - logged
+
+    encoded = time.perf_counter()
+    if response_type != JSON:
+        headers = {"X-Prediction-Id": prediction_id, "X-Model-Version": str(model_version)}
+        response = Response(encode_predictions(response_type, predictions, mask), media_type=response_type, headers=headers)
+    else:
+        predictions = outputs.tolist() if isinstance(outputs, np.ndarray) else outputs
+        response = {"predictions": predictions, "prediction_id": prediction_id}
+    timings["encode"] = time.perf_counter() - encoded
+
+    for stage, seconds in timings.items():
+        PREDICT_STAGE_SECONDS.labels(stage, model_name, str(model_version)).observe(seconds)
+    return response
+
+async def get_served_model(name: str) -> ModelManager:
+    """Manager of a SERVED_MODELS model, loaded on first use."""
+    try:
+        return await run_in_threadpool(model_registry.get, name)
+    except UnknownModel:
+        raise HTTPException(status_code=404, detail=f"Unknown model '{name}'")
+    except ModelNotAvailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.post("/predict", openapi_extra=PREDICT_OPENAPI)
+async def predict(request: Request, n_predictions: int = Query(1, ge=0), strategy: Literal["recursive", "direct"] = PREDICT_STRATEGY):
+    """n_predictions (query) is only used by binary bodies that do not carry their own horizons.
+
+    strategy=direct answers with the direct multi-horizon model: one model call
+    for the whole forecast instead of one per step, up to its trained horizon.
+    """
+    if strategy == "recursive":
+        return await serve_prediction(request, model_manager, n_predictions, micro_batcher)
+
+    manager = await get_served_model(DIRECT_MODEL_NAME)
+    return await serve_prediction(request, manager, n_predictions)
+
+@app.post("/predict/stream")
+async def predict_stream(data: InputData, request: Request, chunk_size: int = Query(48, ge=1)):
+    """NDJSON rollout, one {"step", "predictions"} line per `chunk_size` steps as soon as they are computed."""
+    prediction_id = str(uuid4())
+    try:
+        model_version, chunks = model_manager.stream_rollout(data.features, data.n_predictions, chunk_size)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    stream = RolloutStream(chunks)
+    # The first chunk is computed before answering: windows the model cannot take
+    # (wrong width...) only fail on its first call, and must still get a 422
+    try:
+        first = await run_in_threadpool(stream.next_chunk)
+    except ValueError as e:
+        stream.close()
+        raise HTTPException(status_code=422, detail=str(e))
+
+    async def lines():
+        # Only the first chunk is logged, monitoring joins feedback on the first predicted value
+        logged_outputs = None
+        chunk = first
+        try:
+            while chunk is not None:
+                step, predictions, mask = chunk
+                rows = to_ragged_list(predictions, mask)
+                if logged_outputs is None:
+                    logged_outputs = rows
+                yield json.dumps({"step": step, "predictions": rows}) + "\n"
 
-    return {"predictions": predictions, "prediction_id": prediction_id}
+                # An abandoned stream stops rolling out
+                if await request.is_disconnected():
+                    logging.info(f"Prediction stream {prediction_id} cancelled by the client at step {step}")
+                    return
+                # One chunk per worker thread call, the event loop stays free between chunks
+                chunk = await run_in_threadpool(stream.next_chunk)
+        finally:
+            stream.close()
+
+        model_name = model_manager.model_name or "unknown"
+        log_predictions(data.features, logged_outputs or [[] for _ in data.features], model_name, model_version or 0, data.n_predictions, prediction_id)
+
+    headers = {"X-Prediction-Id": prediction_id, "X-Model-Version": str(model_version or 0)}
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=headers)
+
+async def predict_series(series_ids, windows, n_predictions: int):
+    """Roll out the windows of stored series and log them like /predict."""
+    prediction_id = str(uuid4())
+    if micro_batcher is not None:
+        predictions, mask, model_version = await micro_batcher.submit(windows, n_predictions)
+    else:
+        predictions, mask, model_version = await run_in_threadpool(model_manager.rollout, windows, n_predictions)
+
+    outputs = to_ragged_list(predictions, mask)
+    log_predictions(windows, outputs, model_manager.model_name or "unknown", model_version or 0, n_predictions, prediction_id)
+    return {"predictions": dict(zip(series_ids, outputs)), "prediction_id": prediction_id}
+
+@app.post("/series", status_code=201)
+def register_series(data: SeriesRegistration):
+    """Create or reset a series, the server then keeps its latest SERIES_WINDOW_SIZE observations."""
+    try:
+        series_store.register(data.series_id, data.history)
+    except OverflowError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if data.history:
+        forecast_scheduler.notify(data.series_id, data.timestamp)
+    return {"series_id": data.series_id, "window_size": series_store.window_size}
+
+@app.delete("/series/{series_id}")
+def delete_series(series_id: str):
+    try:
+        series_store.remove(series_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown series '{series_id}'")
+    forecast_scheduler.forget(series_id)
+    return {"message": "Series deleted"}
+
+@app.post("/series/advance")
+async def advance_series(data: SeriesAdvance):
+    """Push one observation per series, then predict every series whose window is full in one rollout."""
+    try:
+        series_store.push_many(data.observations)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown series {e}")
+    if FORECAST_SERIES_ID in data.observations:
+        forecast_scheduler.notify(FORECAST_SERIES_ID, data.timestamp)
+    series_ids, windows = series_store.windows()
+    if not series_ids:
+        return {"predictions": {}, "prediction_id": None}
+    return await predict_series(series_ids, windows, data.n_predictions)
+
+@app.post("/series/{series_id}/observations")
+def push_observations(series_id: str, data: SeriesObservations):
+    try:
+        filled = series_store.push(series_id, data.values)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown series '{series_id}'")
+    forecast_scheduler.notify(series_id, data.timestamp)
+    return {"series_id": series_id, "filled": filled}
+
+@app.post("/series/{series_id}/predict")
+async def predict_one_series(series_id: str, n_predictions: int = Query(1, ge=1)):
+    if series_id not in series_store:
+        raise HTTPException(status_code=404, detail=f"Unknown series '{series_id}'")
+    series_ids, windows = series_store.windows([series_id])
+    if not series_ids:
+        raise HTTPException(status_code=409, detail=f"Series '{series_id}' has fewer than {series_store.window_size} observations")
+    return await predict_series(series_ids, windows, n_predictions)
+
+@app.get("/forecast/latest")
+def forecast_latest(horizon: Optional[int] = None):
+    """Precomputed forecast of FORECAST_SERIES_ID, without calling the model."""
+    forecast = forecast_scheduler.latest
+    if forecast is None:
+        raise HTTPException(status_code=503, detail=f"No forecast of series '{FORECAST_SERIES_ID}' computed yet")
+    if horizon is not None and horizon not in forecast.predictions:
+        raise HTTPException(status_code=404, detail=f"Horizon {horizon} is not precomputed, available: {sorted(forecast.predictions)}")
+
+    return {
+        "series_id": forecast.series_id,
+        "predictions": forecast.predictions if horizon is None else {horizon: forecast.predictions[horizon]},
+        "model_version": forecast.model_version,
+        "data_timestamp": forecast.data_timestamp,
+        "computed_at": forecast.computed_at,
+        "prediction_id": forecast.prediction_id,
+    }
+
+@app.post("/jobs", status_code=202)
+async def create_job(
+    request: Request,
+    layout: str = Query("windows", pattern="^(windows|series)$"),
+    n_predictions: int = Query(1, ge=1),
+    column: str = "Consommation",
+    window_size: int = Query(48, ge=1),
+):
+    """Score a Parquet (application/vnd.apache.parquet) or CSV (text/csv) file in the background.
+
+    layout=windows: one window per row (numeric columns, or a `features` list
+    column in Parquet). layout=series: one observation per row in `column`,
+    windowed by the server.
+    """
+    content_type = (request.headers.get("content-type") or "").lower()
+    if "parquet" in content_type:
+        input_format = "parquet"
+    elif "csv" in content_type:
+        input_format = "csv"
+    else:
+        raise HTTPException(status_code=415, detail="Upload a Parquet or CSV file")
+
+    job = bulk_jobs.create(input_format, layout, n_predictions=n_predictions, column=column, window_size=window_size)
+    # Streamed to disk, the upload is never held in memory
+    try:
+        f = await run_in_threadpool(open, job.input_path, "wb")
+        try:
+            async for chunk in request.stream():
+                await run_in_threadpool(f.write, chunk)
+        finally:
+            await run_in_threadpool(f.close)
+    except BaseException:
+        # Interrupted upload (client disconnect...), the job would stay pending forever
+        bulk_jobs.delete(job.job_id)
+        raise
+    bulk_jobs.start(job)
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    return FileResponse(job.output_path, media_type="application/vnd.apache.parquet", filename=f"{job_id}.parquet")
+
+@app.delete("/jobs/{job_id}")
+def delete_job(job_id: str):
+    job = bulk_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    if job.status in ("pending", "running"):
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    bulk_jobs.delete(job_id)
+    return {"message": "Job deleted"}
+
+@app.get("/models")
+def list_models():
+    """Models that can be served and the ones currently loaded."""
+    loaded = model_registry.loaded()
+    return {
+        "models": [
+            {
+                "name": name,
+                "kind": SERVED_MODELS[name],
+                "loaded": name in loaded and loaded[name].ready,
+                "version": loaded[name].current_version if name in loaded else None,
+                "memory_bytes": loaded[name].memory_bytes if name in loaded else 0,
+            }
+            for name in model_registry.names
+        ]
+    }
+
+@app.post("/models/{name}/predict", openapi_extra=PREDICT_OPENAPI)
+async def predict_model(name: str, request: Request, n_predictions: int = Query(1, ge=0)):
+    """Same as /predict on any model of SERVED_MODELS, loaded on first use. Tabular models take n_predictions=1."""
+    manager = await get_served_model(name)
+    return await serve_prediction(request, manager, n_predictions)
 
 @app.post("/feedback")
 def feedback(data: FeedbackData):
     log_feedback(data.inputs, data.outputs, data.prediction_id)
-    return {"message": "Feedback saved"}
\ No newline at end of file
+    return {"message": "Feedback saved"}
+
+@app.post("/feedback/batch")
+def feedback_batch(data: FeedbackBatch):
+    """Observed values of logged predictions, referenced by prediction_id and row index instead of resending inputs."""
+    log_feedback_batch(data.prediction_ids, data.row_indices, data.values)
+    return {"message": "Feedback saved", "n_feedbacks": len(data.values)}
@@ -0,0 +1,86 @@
+from prometheus_client import Counter, Histogram
+
+# Prometheus metrics of the prediction path, exposed on /metrics next to the
+# Instrumentator HTTP metrics (both use the default registry).
+
+MODEL_REQUESTS_SERVED = Counter(
+    "model_requests_served_total",
+    "Prediction requests served, per model version",
+    ["model_name", "model_version"],
+)
+
+PREDICT_BATCH_SIZE = Histogram(
+    "predict_batch_size",
+    "Windows per micro-batched rollout",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+)
+
+PREDICT_QUEUE_WAIT = Histogram(
+    "predict_queue_wait_seconds",
+    "Time a /predict request waits in the micro-batching queue",
+    buckets=(0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.25),
+)
+
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Prediction and feedback log records dropped because the log queue was full",
+)
+
+PREDICTION_CACHE_HITS = Counter(
+    "prediction_cache_hits_total",
+    "Windows answered from the prediction cache",
+    ["model_name"],
+)
+
+PREDICTION_CACHE_MISSES = Counter(
+    "prediction_cache_misses_total",
+    "Windows missing from the prediction cache and rolled out",
+    ["model_name"],
+)
+
+# Per-stage latency of a prediction request. Timings are taken with
+# time.perf_counter and observed once per request, cheap enough to stay on.
+
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+PREDICT_STAGE_SECONDS = Histogram(
+    "predict_stage_seconds",
+    "Time spent per stage of a prediction request (parse, queue, predict, log, encode)",
+    ["stage", "model_name", "model_version"],
+    buckets=LATENCY_BUCKETS,
+)
+
+ROLLOUT_STEP_SECONDS = Histogram(
+    "rollout_step_seconds",
+    "Duration of one model.predict call of a rollout",
+    ["model_name", "model_version"],
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+ROLLOUT_STEPS = Histogram(
+    "rollout_steps",
+    "model.predict calls per rollout",
+    ["model_name", "model_version"],
+    buckets=(1, 2, 4, 8, 16, 48, 96, 192, 336, 672),
+)
+
+ROLLOUT_BATCH_SIZE = Histogram(
+    "rollout_batch_size",
+    "Windows per rollout",
+    ["model_name", "model_version"],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384),
+)
+
+MODEL_LOAD_LOCK_WAIT = Histogram(
+    "model_load_lock_wait_seconds",
+    "Time waited for the model load lock (requests never take it)",
+    ["model_name"],
+    buckets=(0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, 60.0),
+)
+
+LOG_WRITE_SECONDS = Histogram(
+    "log_write_seconds",
+    "Time to write one batch of log records to the log sink",
+    ["stream"],
+    buckets=LATENCY_BUCKETS,
+)
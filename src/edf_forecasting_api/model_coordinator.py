@@ -0,0 +1,87 @@
+"""Model coordinator of a multi-process deployment.
+
+One coordinator polls the registry for every served model, validates and
+warms each new version, copies its artifact to MODEL_SHARED_DIR (a tmpfs such
+as /dev/shm) and publishes a manifest. API workers started with
+MODEL_SERVING_ROLE=worker only read that manifest: they load the model from
+the shared copy and all swap at the manifest's activation time.
+
+    python -m src.edf_forecasting_api.model_coordinator
+"""
+import os
+import signal
+import logging
+import threading
+
+from src.edf_forecasting_api.artifact_cache import ArtifactCache
+from src.edf_forecasting_api.model_manager import ModelManager
+from src.edf_forecasting_api.model_registry import parse_served_models
+from src.edf_forecasting_api.shared_model import manifest_path, read_manifest, write_manifest
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+MODEL_NAME = os.getenv("MODEL_NAME", "timeseries_xgboost_30min")
+MODEL_CHECK_INTERVAL = int(os.getenv("MODEL_CHECK_INTERVAL", "300"))
+MODEL_SERVING_MODE = os.getenv("MODEL_SERVING_MODE", "native")
+SERVED_MODELS = parse_served_models(os.getenv("SERVED_MODELS", "timeseries_xgboost_30min:autoregressive,tabular_xgboost_30min:tabular,direct_xgboost_30min:direct"))
+MODEL_SHARED_DIR = os.getenv("MODEL_SHARED_DIR", "/dev/shm/edf-models")
+MODEL_SWAP_DELAY = float(os.getenv("MODEL_SWAP_DELAY", "5")) # time given to workers to load before the swap
+MODEL_WARMUP_BATCH_SIZES = tuple(int(size) for size in os.getenv("MODEL_WARMUP_BATCH_SIZES", "1").split(",") if size.strip())
+
+
+class ModelCoordinator:
+    def __init__(self, shared_dir: str, swap_delay: float = 5.0):
+        self.shared_dir = shared_dir
+        self.swap_delay = swap_delay
+        self.artifact_cache = ArtifactCache(shared_dir)
+        self.managers = []
+
+    def add(self, model_name: str, **manager_options) -> ModelManager:
+        manager = ModelManager(
+            model_name,
+            artifact_cache=self.artifact_cache,
+            on_new_version=lambda version, path: self.publish(model_name, version, path),
+            **manager_options,
+        )
+        self.managers.append(manager)
+        return manager
+
+    def publish(self, model_name: str, version: str, path: str):
+        """Point the workers at the new version, keep the previous one for workers still loading."""
+        manifest = manifest_path(self.shared_dir, model_name)
+        previous = read_manifest(manifest)
+        write_manifest(manifest, version, path, self.swap_delay)
+        logging.info(f"Model {model_name} v{version} published, workers swap in {self.swap_delay:g}s")
+        self.artifact_cache.prune(model_name, keep={version, previous["version"] if previous else version})
+
+    def start(self):
+        for manager in self.managers:
+            manager.load_model()
+            manager.start_watcher()
+
+    def stop(self):
+        for manager in self.managers:
+            manager.stop_watcher()
+
+
+def main():
+    coordinator = ModelCoordinator(MODEL_SHARED_DIR, swap_delay=MODEL_SWAP_DELAY)
+    for name in {MODEL_NAME, *SERVED_MODELS}:
+        coordinator.add(
+            name,
+            check_interval=MODEL_CHECK_INTERVAL,
+            serving_mode=MODEL_SERVING_MODE,
+            kind=SERVED_MODELS.get(name, "autoregressive"),
+            warmup_batch_sizes=MODEL_WARMUP_BATCH_SIZES,
+        )
+    coordinator.start()
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    signal.signal(signal.SIGINT, lambda *_: stopped.set())
+    stopped.wait()
+    coordinator.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,83 +1,413 @@
 import logging
+import random
 import threading
-import numpy as np
-from typing import List
 import time
+import numpy as np
+from typing import Any, Callable, List, Optional, Union
 import mlflow, os
+from dataclasses import dataclass
+from src.edf_forecasting_api.metrics import (
+    MODEL_LOAD_LOCK_WAIT,
+    MODEL_REQUESTS_SERVED,
+    ROLLOUT_BATCH_SIZE,
+    ROLLOUT_STEP_SECONDS,
+    ROLLOUT_STEPS,
+)
+from src.edf_forecasting_api.rollout import autoregressive_rollout, direct_forecast, iter_autoregressive_rollout, to_ragged_list
+from src.edf_forecasting_api.prediction_cache import PredictionCache
+from src.edf_forecasting_api.artifact_cache import ArtifactCache
+from src.edf_forecasting_api.shared_model import read_manifest
 
 # Mlflow tracker
 mlflow.set_tracking_uri(os.getenv("MLFLOW_TRACKING_URI", "http://mlflow-server:5000"))
 
+SERVING_MODES = ("native", "pyfunc")
+# autoregressive: windows rolled out over n_predictions steps, tabular: one prediction per feature row,
+# direct: every step up to the model's output width in one predict call
+MODEL_KINDS = ("autoregressive", "tabular", "direct")
+
+# Fallback input width for warm-up when the model does not expose it
+DEFAULT_WINDOW_SIZE = 48
+
+
+class NativeXGBoostModel:
+    """Predicts straight on the XGBoost booster, without pyfunc schema enforcement."""
+
+    def __init__(self, booster):
+        self.booster = booster
+
+    @property
+    def n_features(self) -> int:
+        return self.booster.num_features()
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.booster.inplace_predict(X)
+
+
+def load_native_model(model_uri: str) -> NativeXGBoostModel:
+    """Load the xgboost flavor of a logged model and keep only its booster."""
+    model = mlflow.xgboost.load_model(model_uri)
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    return NativeXGBoostModel(booster)
+
+
+class TimedModel:
+    """Times every predict call of a rollout into a histogram, and counts them."""
+
+    def __init__(self, model, histogram):
+        self.model = model
+        self.histogram = histogram
+        self.calls = 0
+
+    def predict(self, X):
+        start = time.perf_counter()
+        y_pred = self.model.predict(X)
+        self.histogram.observe(time.perf_counter() - start)
+        self.calls += 1
+        return y_pred
+
+
+def estimate_model_bytes(model, model_uri: str = "") -> int:
+    """In-memory size of a booster, else on-disk size of a local artifact, else 0 (unknown)."""
+    if hasattr(model, "booster"):
+        return len(model.booster.save_raw())
+    if model_uri and os.path.isdir(model_uri):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(model_uri)
+            for name in files
+        )
+    return 0
+
+
+@dataclass(frozen=True)
+class ServedModel:
+    """Immutable (model, version) pair, published as a whole on hot-swap."""
+    model: Any = None
+    version: Optional[str] = None
+    warmed: bool = False
+    n_bytes: int = 0
+
+
 class ModelManager:
-    def __init__(self, model_name: str, check_interval: int = 300):
+    def __init__(
+        self,
+        model_name: str,
+        check_interval: int = 300,
+        serving_mode: str = "pyfunc",
+        kind: str = "autoregressive",
+        cache_max_bytes: int = 0,
+        artifact_cache: Optional[ArtifactCache] = None,
+        model_uri: Optional[str] = None,
+        retry_base: float = 5.0,
+        max_backoff: float = 600.0,
+        warmup_batch_sizes: tuple = (),
+        warmup_horizon: int = 2,
+        shared_manifest: Optional[str] = None,
+        on_new_version: Optional[Callable[[str, str], None]] = None,
+    ):
+        if serving_mode not in SERVING_MODES:
+            raise ValueError(f"Unknown serving mode '{serving_mode}', expected one of {SERVING_MODES}")
+        if kind not in MODEL_KINDS:
+            raise ValueError(f"Unknown model kind '{kind}', expected one of {MODEL_KINDS}")
         self.model_name = model_name
         self.check_interval = check_interval
-        self.model = None
-        self.current_version = None
-        self.lock = threading.Lock()
+        self.serving_mode = serving_mode
+        self.kind = kind
+        self._served = ServedModel()
+        self.cache = PredictionCache(cache_max_bytes) if cache_max_bytes > 0 else None
+        self.artifact_cache = artifact_cache
+        # Local model directory served as is, without registry (offline mode)
+        self.model_uri = model_uri
+        self.retry_base = retry_base
+        self.max_backoff = max_backoff
+        self.warmup_batch_sizes = tuple(warmup_batch_sizes)
+        self.warmup_horizon = warmup_horizon
+        # Worker of a multi-process deployment: follow the coordinator's manifest instead of the registry
+        self.shared_manifest = shared_manifest
+        # Called with (version, local path) after a new registry version is published
+        self.on_new_version = on_new_version
+        # Serializes loads only, predictions never take it
+        self._load_lock = threading.Lock()
         self._stop_event = threading.Event()
 
-    def load_model(self):
-        client = mlflow.tracking.MlflowClient()
+    def _load(self, model_uri: str):
+        if self.serving_mode == "native":
+            try:
+                return load_native_model(model_uri)
+            except Exception as e:
+                logging.warning(f"Native XGBoost loading failed, falling back to pyfunc: {e}")
+        return mlflow.pyfunc.load_model(model_uri)
+
+    @staticmethod
+    def _input_width(model) -> int:
+        if hasattr(model, "n_features"):
+            return int(model.n_features)
         try:
-            versions = client.search_model_versions(f"name='{self.model_name}'")
-            production_versions = [
-                v for v in versions if getattr(v, "current_stage", None) == "Production"
-            ]
-
-            if not production_versions:
-                logging.info("No model found in Productions.")
-                return 
-            
-            latest = max(production_versions, key=lambda v: int(v.version))
-            version = latest.version
-
-            if version != self.current_version:
-                logging.info(f"New model detected : version {version}")
-                with self.lock:
-                    # logged_model = 'runs:/0de33fa0279642a1b74d039e6536bc6e/model'
-                    # logged_model = "models:/timeseries_xgboost_30min/Production"
-                    self.model = mlflow.pyfunc.load_model(f"models:/{self.model_name}/Production")
-                    self.current_version = version
-                    logging.info(f"Model v{version} successfully loaded")
-        except Exception as e:
-            logging.error(f"Error while loading model: {e}")
-            
-    def predict(self, consumptions: List, n_predictions: int):
-        if self.model is None:
+            return len(model.metadata.get_input_schema().inputs)
+        except Exception:
+            return DEFAULT_WINDOW_SIZE
+
+    def _warm_up(self, model, version):
+        """Synthetic rollouts at representative batch sizes, before the model takes traffic.
+
+        Pays for lazy booster setup, OpenMP thread spin-up and pyfunc schema
+        checks here instead of on the first requests. Raises if the model fails.
+        """
+        if not self.warmup_batch_sizes:
+            return
+        width = self._input_width(model)
+        start = time.perf_counter()
+        horizon = self.warmup_horizon if self.kind == "autoregressive" else 1
+        for batch_size in self.warmup_batch_sizes:
+            windows = np.zeros((batch_size, width), dtype=np.float32)
+            self._run(model, windows, horizon)
+        logging.info(f"Model v{version} warmed up in {time.perf_counter() - start:.3f}s (batch sizes {self.warmup_batch_sizes})")
+
+    def _publish(self, served: ServedModel):
+        # Read-copy-update: a single reference swap, in-flight requests finish on the old model
+        self._served = served
+        if self.cache is not None:
+            self.cache.invalidate(served.version)
+
+    @property
+    def model(self):
+        return self._served.model
+
+    @model.setter
+    def model(self, model):
+        self._publish(ServedModel(model, self._served.version))
+
+    @property
+    def current_version(self):
+        return self._served.version
+
+    @current_version.setter
+    def current_version(self, version):
+        self._publish(ServedModel(self._served.model, version))
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._served.n_bytes
+
+    @property
+    def ready(self) -> bool:
+        """A warmed model is being served."""
+        return self._served.model is not None and self._served.warmed
+
+    def _check_registry(self):
+        """Load the Production version if it changed. Raises when the registry is unreachable."""
+        client = mlflow.tracking.MlflowClient()
+
+        # Stage filtered by the registry instead of listing every version
+        production_versions = client.get_latest_versions(self.model_name, stages=["Production"])
+
+        if not production_versions:
+            logging.info("No model found in Productions.")
+            return
+
+        latest = max(production_versions, key=lambda v: int(v.version))
+        version = latest.version
+
+        if version != self.current_version:
+            logging.info(f"New model detected : version {version}")
+            # Download and deserialize while the previous version keeps serving
+            if self.artifact_cache is not None:
+                model_uri = self.artifact_cache.fetch(self.model_name, version)
+            else:
+                model_uri = f"models:/{self.model_name}/{version}"
+            model = self._load(model_uri)
+            self._warm_up(model, version)
+
+            self._publish(ServedModel(model, version, warmed=True, n_bytes=estimate_model_bytes(model, model_uri)))
+            logging.info(f"Model {self.model_name} v{version} successfully loaded ({type(model).__name__})")
+            if self.on_new_version is not None:
+                self.on_new_version(version, model_uri)
+
+    def _check_manifest(self):
+        """Load the version named by the coordinator's manifest, swap at its activation time."""
+        manifest = read_manifest(self.shared_manifest)
+        if manifest is None or manifest["version"] == self.current_version:
+            return
+
+        version, model_uri = manifest["version"], manifest["path"]
+        model = self._load(model_uri)
+        self._warm_up(model, version)
+
+        # Every worker waits for the same instant, a late one swaps right away
+        delay = manifest["activate_at"] - time.time()
+        if delay > 0:
+            self._stop_event.wait(delay)
+        self._publish(ServedModel(model, version, warmed=True, n_bytes=estimate_model_bytes(model, model_uri)))
+        logging.info(f"Model {self.model_name} v{version} activated from {model_uri} (pid {os.getpid()})")
+
+    def _load_from_disk(self) -> bool:
+        """Load MODEL_URI, or else the last cached version, without calling the registry."""
+        if self.model_uri:
+            model_uri, version = self.model_uri, "local"
+        else:
+            latest = self.artifact_cache.latest(self.model_name) if self.artifact_cache else None
+            if latest is None:
+                return False
+            version, model_uri = latest
+
+        model = self._load(model_uri)
+        self._warm_up(model, version)
+        self._publish(ServedModel(model, version, warmed=True, n_bytes=estimate_model_bytes(model, model_uri)))
+        logging.info(f"Model {self.model_name} v{version} loaded from {model_uri} ({type(model).__name__})")
+        return True
+
+    def load_model(self) -> bool:
+        """Returns False when the registry could not be checked."""
+        waiting_since = time.perf_counter()
+        with self._load_lock:
+            MODEL_LOAD_LOCK_WAIT.labels(self.model_name).observe(time.perf_counter() - waiting_since)
+            if self.shared_manifest:
+                try:
+                    self._check_manifest()
+                    return True
+                except Exception as e:
+                    logging.error(f"Error while loading shared model from {self.shared_manifest}: {e}")
+                    return False
+
+            if self.model_uri:
+                if self.model is None:
+                    try:
+                        self._load_from_disk()
+                    except Exception as e:
+                        logging.error(f"Error while loading model from {self.model_uri}: {e}")
+                return True
+
+            try:
+                self._check_registry()
+                return True
+            except Exception as e:
+                logging.error(f"Error while loading model: {e}")
+
+            # Cold start with the registry down: serve the last cached version
+            if self.model is None and self.artifact_cache is not None:
+                try:
+                    if self._load_from_disk():
+                        logging.warning("Model registry unreachable, serving the cached version.")
+                except Exception as e:
+                    logging.error(f"Error while loading cached model: {e}")
+            return False
+
+    def rollout(self, windows, horizons, n_requests: int = 1, use_cache: bool = True):
+        """Masked rollout on one snapshot of the served model, see `autoregressive_rollout`.
+
+        use_cache=False keeps one-off traffic such as bulk jobs out of the prediction cache.
+        """
+        served = self._served
+        if served.model is None:
+            raise RuntimeError("Model not loaded")
+
+        labels = (self.model_name, str(served.version))
+        model = TimedModel(served.model, ROLLOUT_STEP_SECONDS.labels(*labels))
+        if self.cache is None or not use_cache:
+            predictions, mask = self._run(model, windows, horizons)
+        else:
+            predictions, mask = self._cached_rollout(model, served.version, windows, horizons)
+        MODEL_REQUESTS_SERVED.labels(*labels).inc(n_requests)
+        ROLLOUT_BATCH_SIZE.labels(*labels).observe(len(predictions))
+        if model.calls:
+            ROLLOUT_STEPS.labels(*labels).observe(model.calls)
+
+        return predictions, mask, served.version
+
+    def stream_rollout(self, windows, horizons, chunk_size: int = 48):
+        """(version, generator of rollout chunks) on one snapshot of the served model, see `iter_autoregressive_rollout`."""
+        served = self._served
+        if served.model is None:
             raise RuntimeError("Model not loaded")
-        with self.lock:
-            X = np.array(consumptions)
+        if self.kind != "autoregressive":
+            raise ValueError(f"Model {self.model_name} is {self.kind}, it has no rollout to stream")
 
-            predictions = []
+        labels = (self.model_name, str(served.version))
+        model = TimedModel(served.model, ROLLOUT_STEP_SECONDS.labels(*labels))
+        chunks = iter_autoregressive_rollout(model, windows, horizons, chunk_size)
+        MODEL_REQUESTS_SERVED.labels(*labels).inc()
+        return served.version, chunks
 
-            for _ in range(n_predictions):
-                # Prediction
-                y_pred = self.model.predict(X)
+    def _run(self, model, windows, horizons):
+        if self.kind == "autoregressive":
+            return autoregressive_rollout(model, windows, horizons)
+        if self.kind == "direct":
+            return direct_forecast(model, windows, horizons)
 
-                y_pred = np.array(y_pred).reshape(-1,1)
+        # Tabular models predict each feature row once, there is nothing to roll out
+        # Categorical columns arrive as their training category codes, see the README
+        windows = np.asarray(windows, dtype=np.float32)
+        if windows.ndim != 2:
+            raise ValueError(f"Expected a 2D array of feature rows, got shape {windows.shape}")
+        if (np.asarray(horizons) != 1).any():
+            raise ValueError(f"Model {self.model_name} is tabular, n_predictions must be 1")
+        predictions = np.asarray(model.predict(windows), dtype=np.float32).reshape(len(windows), 1)
+        return predictions, np.ones(predictions.shape, dtype=bool)
 
-                # Prediction update
-                predictions.append(y_pred)
+    def _cached_rollout(self, model, version, windows, horizons):
+        """Serve cached rows from the cache, roll out only the misses."""
+        windows = np.asarray(windows, dtype=np.float32)
+        if windows.ndim != 2:
+            raise ValueError(f"Expected a 2D array of windows, got shape {windows.shape}")
+        horizons = np.broadcast_to(np.asarray(horizons, dtype=np.int64), (len(windows),))
 
-                # Auto regression
-                X = np.hstack([X[:, 1:], y_pred])
-            
-            pred_array = np.concatenate(predictions, axis=1)
+        keys = self.cache.keys(windows, horizons, version)
+        cached = self.cache.get_many(keys, self.model_name)
+        misses = [i for i, value in enumerate(cached) if value is None]
+
+        max_horizon = int(horizons.max()) if len(horizons) else 0
+        predictions = np.full((len(windows), max_horizon), np.nan, dtype=np.float32)
+        mask = np.arange(max_horizon) < horizons[:, None]
+
+        for i, value in enumerate(cached):
+            if value is not None:
+                predictions[i, :len(value)] = value
+
+        if misses:
+            miss_predictions, miss_mask = self._run(model, windows[misses], horizons[misses])
+            predictions[misses, :miss_predictions.shape[1]] = miss_predictions
+            self.cache.put_many(
+                [keys[i] for i in misses],
+                [row[row_mask] for row, row_mask in zip(miss_predictions, miss_mask)],
+            )
+
+        return predictions, mask
+
+    def predict_with_version(self, consumptions: List, n_predictions: Union[int, List[int]]):
+        """Predict and return the version that answered, even if a swap happened meanwhile."""
+        predictions, mask, version = self.rollout(consumptions, n_predictions)
+        return to_ragged_list(predictions, mask), version
+
+    def predict(self, consumptions: List, n_predictions: Union[int, List[int]]):
+        predictions, _ = self.predict_with_version(consumptions, n_predictions)
+        return predictions
+
+    def _next_check_delay(self, failures: int) -> float:
+        """check_interval after a success, exponential backoff with jitter after failures."""
+        if failures == 0:
+            return self.check_interval * random.uniform(0.9, 1.1)
+        delay = min(self.max_backoff, self.retry_base * 2 ** (failures - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
 
-            return pred_array.tolist()
-    
     def start_watcher(self):
+        if self.model_uri:
+            logging.info(f"Serving {self.model_uri}, registry watcher disabled.")
+            return
+
         def watch():
+            failures = 0
             while not self._stop_event.is_set():
                 try:
-                    self.load_model()
+                    failures = 0 if self.load_model() else failures + 1
                 except Exception as e:
+                    failures += 1
                     logging.error(f"Model registry check failed: {e}")
-                time.sleep(self.check_interval)
+                self._stop_event.wait(self._next_check_delay(failures))
         thread = threading.Thread(target=watch, daemon=True)
         thread.start()
 
     def stop_watcher(self):
         self._stop_event.set()
-        logging.info("Watcher stopped.")
\ No newline at end of file
+        logging.info("Watcher stopped.")
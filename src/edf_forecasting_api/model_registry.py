@@ -0,0 +1,106 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable
+
+from src.edf_forecasting_api.model_manager import ModelManager
+
+
+def parse_served_models(value: str) -> Dict[str, str]:
+    """'name:kind,name' -> {name: kind}, kind defaulting to autoregressive."""
+    served = {}
+    for entry in value.split(","):
+        if entry.strip():
+            name, _, kind = entry.strip().partition(":")
+            served[name] = kind or "autoregressive"
+    return served
+
+
+class UnknownModel(KeyError):
+    pass
+
+
+class ModelNotAvailable(RuntimeError):
+    pass
+
+
+class ModelRegistry:
+    """Several named `ModelManager`s served from one process.
+
+    Models are created by `factory(name)`, loaded on first use and then kept
+    up to date by their own watcher. When the loaded models exceed
+    `memory_budget_bytes` (0 means unlimited), the least recently used
+    unpinned ones are evicted: their watcher stops and they are reloaded,
+    from the artifact cache if any, on their next request.
+    """
+
+    def __init__(self, factory: Callable[[str], ModelManager], names: Iterable[str], memory_budget_bytes: int = 0):
+        self.factory = factory
+        self.names = tuple(names)
+        self.memory_budget_bytes = memory_budget_bytes
+        self._managers: "OrderedDict[str, ModelManager]" = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+
+    def add(self, manager: ModelManager, pinned: bool = True):
+        """Host an already built manager, pinned ones are never evicted."""
+        with self._lock:
+            self._managers[manager.model_name] = manager
+            if pinned:
+                self._pinned.add(manager.model_name)
+
+    def get(self, name: str) -> ModelManager:
+        """Manager of `name`, loading it on first use. Blocking, call it off the event loop."""
+        with self._lock:
+            manager = self._managers.get(name)
+            if manager is None:
+                if name not in self.names:
+                    raise UnknownModel(name)
+                manager = self._managers[name] = self.factory(name)
+                created = True
+            else:
+                created = False
+            self._managers.move_to_end(name)
+
+        # Concurrent first requests all wait on the manager's load lock, only one downloads
+        if not manager.ready:
+            manager.load_model()
+        if not manager.ready:
+            with self._lock:
+                if created and self._managers.get(name) is manager:
+                    del self._managers[name]
+            raise ModelNotAvailable(f"No Production version of '{name}' could be loaded")
+
+        if created:
+            manager.start_watcher()
+            self._evict(keep=name)
+        return manager
+
+    def _evict(self, keep: str):
+        if not self.memory_budget_bytes:
+            return
+        evicted = []
+        with self._lock:
+            used = sum(manager.memory_bytes for manager in self._managers.values())
+            for name in list(self._managers):
+                if used <= self.memory_budget_bytes:
+                    break
+                if name == keep or name in self._pinned:
+                    continue
+                manager = self._managers.pop(name)
+                used -= manager.memory_bytes
+                evicted.append(manager)
+
+        for manager in evicted:
+            manager.stop_watcher()
+            logging.info(f"Model {manager.model_name} evicted ({manager.memory_bytes / 1e6:.1f} MB)")
+
+    def loaded(self) -> Dict[str, ModelManager]:
+        with self._lock:
+            return dict(self._managers)
+
+    def stop(self):
+        """Stop the watchers of the lazily loaded models, pinned ones are owned by the caller."""
+        for name, manager in self.loaded().items():
+            if name not in self._pinned:
+                manager.stop_watcher()
@@ -0,0 +1,120 @@
+import struct
+
+import numpy as np
+import pyarrow as pa
+
+try:
+    import msgpack
+except ImportError:  # msgpack support is optional
+    msgpack = None
+
+# Media types accepted by /predict, JSON stays the default
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+# Raw float32: a (rows, cols) uint32 little-endian header, then rows * cols little-endian float32
+FLOAT32 = "application/x-float32"
+MSGPACK = "application/msgpack"
+
+BINARY_FORMATS = (ARROW_STREAM, FLOAT32, MSGPACK)
+SHAPE_HEADER = struct.Struct("<II")
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+def _media_types(header: str):
+    for part in header.split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type:
+            yield media_type
+
+
+def negotiate_request(content_type: str) -> str:
+    media_type = next(_media_types(content_type or JSON), JSON)
+    if media_type in (JSON, *BINARY_FORMATS):
+        if media_type == MSGPACK and msgpack is None:
+            raise UnsupportedFormat("msgpack is not installed on the server")
+        return media_type
+    raise UnsupportedFormat(f"Unsupported content type '{media_type}'")
+
+
+def negotiate_response(accept: str) -> str:
+    """First supported media type of the Accept header, JSON by default."""
+    for media_type in _media_types(accept or ""):
+        if media_type in BINARY_FORMATS and not (media_type == MSGPACK and msgpack is None):
+            return media_type
+        if media_type in (JSON, "*/*", "application/*"):
+            return JSON
+    return JSON
+
+
+def _horizons(n_predictions, n_rows: int) -> np.ndarray:
+    horizons = np.asarray(n_predictions, dtype=np.int64)
+    if horizons.ndim == 1 and len(horizons) != n_rows:
+        raise ValueError("n_predictions must be an int or contain one horizon per row of features")
+    return horizons
+
+
+def decode_windows(media_type: str, body: bytes, n_predictions=1):
+    """Decode a binary /predict body into (windows, horizons) without per-element validation.
+
+    Windows come back as a float32 (rows, window) array viewing the request
+    buffer whenever the payload is already float32.
+    """
+    if media_type == ARROW_STREAM:
+        table = pa.ipc.open_stream(body).read_all()
+        features = table["features"].combine_chunks()
+        values = features.flatten().to_numpy(zero_copy_only=False)
+        lengths = np.diff(features.offsets.to_numpy()) if pa.types.is_list(features.type) else None
+        width = features.type.list_size if lengths is None else (int(lengths[0]) if len(lengths) else 0)
+        if lengths is not None and (lengths != width).any():
+            raise ValueError("All feature windows must have the same length")
+        windows = np.asarray(values, dtype=np.float32).reshape(len(features), width)
+        if "n_predictions" in table.column_names:
+            n_predictions = table["n_predictions"].to_numpy()
+
+    elif media_type == FLOAT32:
+        if len(body) < SHAPE_HEADER.size:
+            raise ValueError("Missing (rows, cols) header")
+        rows, cols = SHAPE_HEADER.unpack_from(body)
+        if len(body) != SHAPE_HEADER.size + rows * cols * 4:
+            raise ValueError(f"Body size does not match the ({rows}, {cols}) header")
+        windows = np.frombuffer(body, dtype="<f4", offset=SHAPE_HEADER.size).reshape(rows, cols)
+
+    elif media_type == MSGPACK:
+        payload = msgpack.unpackb(body)
+        features = payload["features"]
+        if isinstance(features, bytes):
+            windows = np.frombuffer(features, dtype="<f4").reshape(payload["shape"])
+        else:
+            windows = np.asarray(features, dtype=np.float32)
+        n_predictions = payload.get("n_predictions", n_predictions)
+
+    else:
+        raise UnsupportedFormat(f"Unsupported content type '{media_type}'")
+
+    if windows.ndim != 2:
+        raise ValueError(f"Expected a 2D array of windows, got shape {windows.shape}")
+
+    return windows, _horizons(n_predictions, len(windows))
+
+
+def encode_predictions(media_type: str, predictions: np.ndarray, mask: np.ndarray) -> bytes:
+    """Encode a masked rollout. Arrow keeps one list per row, the other formats are NaN-padded."""
+    if media_type == ARROW_STREAM:
+        offsets = np.concatenate([[0], np.cumsum(mask.sum(axis=1))]).astype(np.int32)
+        rows = pa.ListArray.from_arrays(pa.array(offsets), pa.array(predictions[mask], type=pa.float32()))
+        batch = pa.record_batch([rows], names=["predictions"])
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    padded = np.ascontiguousarray(predictions, dtype="<f4")
+    if media_type == FLOAT32:
+        return SHAPE_HEADER.pack(*padded.shape) + padded.tobytes()
+    if media_type == MSGPACK:
+        return msgpack.packb({"shape": list(padded.shape), "predictions": padded.tobytes()})
+
+    raise UnsupportedFormat(f"Unsupported response type '{media_type}'")
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src.edf_forecasting_api.metrics import PREDICTION_CACHE_HITS, PREDICTION_CACHE_MISSES
+
+# Rough per-entry overhead (key, OrderedDict node, array header), in bytes
+ENTRY_OVERHEAD = 200
+
+
+class PredictionCache:
+    """In-process LRU cache of rollouts, bounded in memory.
+
+    Keys are a hash of the window bytes, the horizon and the model version.
+    `invalidate` drops everything and pins the version allowed in, so results
+    of a rollout still running on a previous model are not cached.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.version = None
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def keys(windows: np.ndarray, horizons: np.ndarray, version) -> list:
+        windows = np.ascontiguousarray(windows, dtype=np.float32)
+        return [
+            (hashlib.blake2b(window.tobytes(), digest_size=16).digest(), int(horizon), version)
+            for window, horizon in zip(windows, horizons)
+        ]
+
+    def get_many(self, keys: list, model_name: str = "") -> list:
+        """Cached predictions for each key, None on a miss."""
+        with self._lock:
+            values = []
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                values.append(value)
+
+        hits = sum(value is not None for value in values)
+        PREDICTION_CACHE_HITS.labels(model_name).inc(hits)
+        PREDICTION_CACHE_MISSES.labels(model_name).inc(len(values) - hits)
+        return values
+
+    def put_many(self, keys: list, values: list):
+        with self._lock:
+            for key, value in zip(keys, values):
+                if key[2] != self.version or key in self._entries:
+                    continue
+                entry = np.array(value, dtype=np.float32)  # own copy, never a view on a rollout buffer
+                entry.flags.writeable = False
+                self._entries[key] = entry
+                self._bytes += entry.nbytes + ENTRY_OVERHEAD
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes + ENTRY_OVERHEAD
+
+    def invalidate(self, version=None):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.version = version
@@ -0,0 +1,175 @@
+import threading
+
+import numpy as np
+
+
+def autoregressive_rollout(model, windows, horizons):
+    """Multi-step autoregressive forecast on a single preallocated buffer.
+
+    Each row of `windows` lives in a (batch, window + max_horizon) float32 buffer:
+    every step predicts on the strided view buffer[:, step:step + window] and
+    writes the result right after it, so no window matrix is rebuilt per step.
+
+    `horizons` is an int or one horizon per row. Rows are sorted by decreasing
+    horizon, which keeps the rows still running at a given step as a prefix of
+    the buffer: mixed horizons are padded and masked instead of split.
+
+    Returns the (batch, max_horizon) predictions, NaN beyond each row's horizon,
+    and the matching boolean mask.
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim != 2:
+        raise ValueError(f"Expected a 2D array of windows, got shape {windows.shape}")
+
+    n_rows, window_size = windows.shape
+    horizons = np.broadcast_to(np.asarray(horizons, dtype=np.int64), (n_rows,))
+    if n_rows and horizons.min() < 0:
+        raise ValueError("Horizons must be positive")
+
+    max_horizon = int(horizons.max()) if n_rows else 0
+
+    # Longest horizons first: the active rows of a step are buffer[:n_active[step]]
+    order = np.argsort(-horizons, kind="stable")
+    sorted_horizons = horizons[order]
+    n_active = np.searchsorted(-sorted_horizons, -np.arange(max_horizon), side="left")
+
+    buffer = np.empty((n_rows, window_size + max_horizon), dtype=np.float32)
+    buffer[:, :window_size] = windows[order]
+
+    for step in range(max_horizon):
+        active = n_active[step]
+        y_pred = model.predict(buffer[:active, step:step + window_size])
+        buffer[:active, window_size + step] = np.asarray(y_pred).reshape(-1)
+
+    predictions = np.empty((n_rows, max_horizon), dtype=np.float32)
+    predictions[order] = buffer[:, window_size:]
+
+    mask = np.arange(max_horizon) < horizons[:, None]
+    predictions[~mask] = np.nan
+
+    return predictions, mask
+
+
+def direct_forecast(model, windows, horizons):
+    """Multi-horizon forecast of a direct model, in a single predict call.
+
+    The model returns one column per step ahead: row i of its (batch, n_outputs)
+    output is the forecast after windows[i], and each row keeps its first
+    horizons[i] steps. Returns the same (predictions, mask) as
+    `autoregressive_rollout`.
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim != 2:
+        raise ValueError(f"Expected a 2D array of windows, got shape {windows.shape}")
+
+    n_rows = len(windows)
+    horizons = np.broadcast_to(np.asarray(horizons, dtype=np.int64), (n_rows,))
+    if n_rows and horizons.min() < 0:
+        raise ValueError("Horizons must be positive")
+
+    max_horizon = int(horizons.max()) if n_rows else 0
+    mask = np.arange(max_horizon) < horizons[:, None]
+    if max_horizon == 0:
+        return np.empty((n_rows, 0), dtype=np.float32), mask
+
+    outputs = np.asarray(model.predict(windows), dtype=np.float32).reshape(n_rows, -1)
+    if max_horizon > outputs.shape[1]:
+        raise ValueError(f"The model forecasts {outputs.shape[1]} steps ahead, n_predictions={max_horizon} requested")
+
+    predictions = outputs[:, :max_horizon].copy()
+    predictions[~mask] = np.nan
+    return predictions, mask
+
+
+def to_ragged_list(predictions: np.ndarray, mask: np.ndarray) -> list:
+    """Drop the padding of a masked rollout, one list per row."""
+    if mask.all():
+        return predictions.tolist()
+    return [row[row_mask].tolist() for row, row_mask in zip(predictions, mask)]
+
+
+def iter_autoregressive_rollout(model, windows, horizons, chunk_size: int = 48):
+    """Same forecast as `autoregressive_rollout`, yielded `chunk_size` steps at a time.
+
+    Only the last window and the current chunk are kept: the buffer is
+    (batch, window + chunk_size) whatever the horizon, and the tail of each
+    chunk is shifted to the front before the next one. Returns a generator of
+    (first_step, predictions, mask) with the (batch, steps) predictions of the
+    chunk, NaN for rows whose horizon is already reached.
+
+    Windows and horizons are checked before the generator is returned, so
+    invalid inputs fail before anything is streamed.
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    if windows.ndim != 2:
+        raise ValueError(f"Expected a 2D array of windows, got shape {windows.shape}")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    horizons = np.broadcast_to(np.asarray(horizons, dtype=np.int64), (len(windows),))
+    if len(windows) and horizons.min() < 0:
+        raise ValueError("Horizons must be positive")
+    return _rollout_chunks(model, windows, horizons, chunk_size)
+
+
+def _rollout_chunks(model, windows, horizons, chunk_size):
+    n_rows, window_size = windows.shape
+    max_horizon = int(horizons.max()) if n_rows else 0
+
+    order = np.argsort(-horizons, kind="stable")
+    sorted_horizons = horizons[order]
+
+    buffer = np.empty((n_rows, window_size + chunk_size), dtype=np.float32)
+    buffer[:, :window_size] = windows[order]
+
+    for first_step in range(0, max_horizon, chunk_size):
+        n_steps = min(chunk_size, max_horizon - first_step)
+        steps = first_step + np.arange(n_steps)
+        n_active = np.searchsorted(-sorted_horizons, -steps, side="left")
+
+        for offset in range(n_steps):
+            active = n_active[offset]
+            y_pred = model.predict(buffer[:active, offset:offset + window_size])
+            buffer[:active, window_size + offset] = np.asarray(y_pred).reshape(-1)
+
+        predictions = np.empty((n_rows, n_steps), dtype=np.float32)
+        predictions[order] = buffer[:, window_size:window_size + n_steps]
+        mask = steps < horizons[:, None]
+        predictions[~mask] = np.nan
+        yield first_step, predictions, mask
+
+        # The next chunk starts from the last window_size values
+        buffer[:, :window_size] = buffer[:, n_steps:n_steps + window_size]
+
+
+class RolloutStream:
+    """Rollout chunks pulled from worker threads, closed safely from the event loop.
+
+    `close` can be called while `next_chunk` is still computing a chunk in
+    another thread: the generator is then closed by whichever of the two
+    finishes last, never while it is executing.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def next_chunk(self):
+        """Next (first_step, predictions, mask), None once the rollout is over or closed."""
+        with self._lock:
+            chunk = None if self._closed.is_set() else next(self._chunks, None)
+        if self._closed.is_set():
+            self._close_if_idle()
+        return chunk
+
+    def close(self):
+        self._closed.set()
+        self._close_if_idle()
+
+    def _close_if_idle(self):
+        if self._lock.acquire(blocking=False):
+            try:
+                self._chunks.close()
+            finally:
+                self._lock.release()
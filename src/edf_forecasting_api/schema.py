@@ -1,11 +1,48 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, conint, model_validator
+from typing import Dict, List, Optional, Union
 
 class InputData(BaseModel):
     features: List[List[float]]
-    n_predictions: Optional[int] = 1
+    # One horizon for every row, or one horizon per row
+    n_predictions: Optional[Union[conint(ge=0), List[conint(ge=0)]]] = 1
+
+    @model_validator(mode="after")
+    def check_horizons(self):
+        if isinstance(self.n_predictions, list) and len(self.n_predictions) != len(self.features):
+            raise ValueError("n_predictions must be an int or contain one horizon per row of features")
+        return self
 
 class FeedbackData(BaseModel):
     prediction_id: str
     inputs: List[List[float]]
-    outputs: List[List[float]]
\ No newline at end of file
+    outputs: List[List[float]]
+
+class FeedbackBatch(BaseModel):
+    # Columns of (prediction_id, row_index, observed value), one entry per observation
+    prediction_ids: List[str]
+    row_indices: List[int]
+    values: List[float]
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        if not len(self.prediction_ids) == len(self.row_indices) == len(self.values):
+            raise ValueError("prediction_ids, row_indices and values must have the same length")
+        return self
+
+class SeriesRegistration(BaseModel):
+    series_id: str
+    # Latest observations, oldest first, to start predicting right away
+    history: Optional[List[float]] = None
+    # Time of the latest observation, defaults to the time it is received
+    timestamp: Optional[datetime] = None
+
+class SeriesObservations(BaseModel):
+    values: List[float]
+    timestamp: Optional[datetime] = None
+
+class SeriesAdvance(BaseModel):
+    # One new observation per series
+    observations: Dict[str, float] = {}
+    n_predictions: conint(ge=1) = 1
+    timestamp: Optional[datetime] = None
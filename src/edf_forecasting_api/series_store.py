@@ -0,0 +1,104 @@
+import threading
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+
+class SeriesStore:
+    """Latest `window_size` observations of each registered series, in memory.
+
+    All series share one (capacity, window_size) float32 ring buffer matrix,
+    grown by doubling up to `max_series`. `windows` reorders the rings of many
+    series at once with a single fancy index, so a whole fleet of series can
+    be rolled out in one call.
+    """
+
+    def __init__(self, window_size: int = 48, max_series: int = 100_000, initial_capacity: int = 64):
+        self.window_size = window_size
+        self.max_series = max_series
+        self._slots = {}
+        self._free = []
+        self._buffer = np.zeros((initial_capacity, window_size), dtype=np.float32)
+        self._head = np.zeros(initial_capacity, dtype=np.int64)  # next position written in each ring
+        self._count = np.zeros(initial_capacity, dtype=np.int64)  # observations seen, capped at window_size
+        self._revision = np.zeros(initial_capacity, dtype=np.int64)  # store revision of the last change of each ring
+        self._revisions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, series_id: str):
+        return series_id in self._slots
+
+    def _grow(self):
+        capacity = len(self._buffer)
+        self._buffer = np.concatenate([self._buffer, np.zeros_like(self._buffer)])
+        self._head = np.concatenate([self._head, np.zeros(capacity, dtype=np.int64)])
+        self._count = np.concatenate([self._count, np.zeros(capacity, dtype=np.int64)])
+        self._revision = np.concatenate([self._revision, np.zeros(capacity, dtype=np.int64)])
+        self._free.extend(range(2 * capacity - 1, capacity - 1, -1))
+
+    def register(self, series_id: str, history: Optional[Iterable[float]] = None):
+        """Create or reset a series, optionally seeded with its latest observations."""
+        with self._lock:
+            slot = self._slots.get(series_id)
+            if slot is None:
+                if len(self._slots) >= self.max_series:
+                    raise OverflowError(f"At most {self.max_series} series can be registered")
+                if not self._free and len(self._slots) == len(self._buffer):
+                    self._grow()
+                slot = self._free.pop() if self._free else len(self._slots)
+                self._slots[series_id] = slot
+            self._head[slot] = 0
+            self._count[slot] = 0
+            self._revisions += 1
+            self._revision[slot] = self._revisions
+        if history is not None:
+            self.push(series_id, history)
+
+    def remove(self, series_id: str):
+        with self._lock:
+            slot = self._slots.pop(series_id)
+            self._free.append(slot)
+
+    def push(self, series_id: str, values: Iterable[float]) -> int:
+        """Append observations to a series, returns how many of its window are filled."""
+        values = np.asarray(list(values), dtype=np.float32)[-self.window_size:]
+        with self._lock:
+            slot = self._slots[series_id]
+            positions = (self._head[slot] + np.arange(len(values))) % self.window_size
+            self._buffer[slot, positions] = values
+            self._head[slot] = (self._head[slot] + len(values)) % self.window_size
+            self._count[slot] = min(self.window_size, self._count[slot] + len(values))
+            self._revisions += 1
+            self._revision[slot] = self._revisions
+            return int(self._count[slot])
+
+    def push_many(self, observations: dict):
+        """One new observation per series, {series_id: value}."""
+        with self._lock:
+            slots = np.array([self._slots[series_id] for series_id in observations], dtype=np.int64)
+            self._buffer[slots, self._head[slots]] = np.fromiter(observations.values(), dtype=np.float32, count=len(slots))
+            self._head[slots] = (self._head[slots] + 1) % self.window_size
+            self._count[slots] = np.minimum(self.window_size, self._count[slots] + 1)
+            self._revisions += 1
+            self._revision[slots] = self._revisions
+
+    def revision(self, series_id: str) -> Optional[int]:
+        """Changes whenever the series is reset or receives observations, None for an unknown series."""
+        with self._lock:
+            slot = self._slots.get(series_id)
+            return None if slot is None else int(self._revision[slot])
+
+    def windows(self, series_ids: Optional[List[str]] = None):
+        """(series_ids, windows) of the given (default: all) series whose window is full, oldest value first."""
+        with self._lock:
+            if series_ids is None:
+                series_ids = list(self._slots)
+            slots = np.array([self._slots[series_id] for series_id in series_ids], dtype=np.int64)
+            full = self._count[slots] >= self.window_size if len(slots) else np.zeros(0, dtype=bool)
+            slots = slots[full]
+            columns = (self._head[slots, None] + np.arange(self.window_size)) % self.window_size
+            windows = self._buffer[slots[:, None], columns]
+        return [series_id for series_id, ok in zip(series_ids, full) if ok], windows
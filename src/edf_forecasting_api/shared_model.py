@@ -0,0 +1,38 @@
+import os
+import json
+import time
+from typing import Optional
+
+# <shared_dir>/<model_name>/manifest.json names the version every worker must serve
+MANIFEST = "manifest.json"
+
+
+def manifest_path(shared_dir: str, model_name: str) -> str:
+    return os.path.join(shared_dir, model_name, MANIFEST)
+
+
+def write_manifest(path: str, version: str, model_path: str, swap_delay: float = 2.0):
+    """Atomically point workers at `model_path`, to be served from `activate_at` on.
+
+    Workers load and warm the new version as soon as they see the manifest,
+    then all swap at `activate_at`, so they answer with the same version.
+    """
+    manifest = {
+        "version": str(version),
+        "path": model_path,
+        "published_at": time.time(),
+        "activate_at": time.time() + swap_delay,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,223 @@
+import io
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Floor of the bin shares in PSI, so empty bins do not make it infinite
+PSI_EPSILON = 1e-4
+
+
+class HistogramSketch:
+    """Counts of values over fixed bin edges, with an underflow and an overflow bin.
+
+    Two histograms over the same edges merge by adding their counts.
+    """
+
+    def __init__(self, edges, counts=None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.float64) if counts is None else np.asarray(counts, dtype=np.float64)
+
+    @property
+    def n(self) -> float:
+        return float(self.counts.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.counts += np.bincount(np.searchsorted(self.edges, values, side="right"), minlength=len(self.counts))
+
+    def merge(self, other: "HistogramSketch") -> "HistogramSketch":
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Histograms with different bin edges cannot be merged")
+        return HistogramSketch(self.edges, self.counts + other.counts)
+
+    def psi(self, reference: "HistogramSketch") -> float:
+        """Population stability index of this histogram against `reference`."""
+        expected = np.maximum(reference.counts / max(reference.n, 1), PSI_EPSILON)
+        actual = np.maximum(self.counts / max(self.n, 1), PSI_EPSILON)
+        return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class QuantileSketch:
+    """Distribution summarized by at most `capacity` weighted centroids.
+
+    New values are buffered, then the sketch is compressed into `capacity`
+    buckets of equal weight along the sorted values, each replaced by its
+    weighted mean. Merging concatenates the centroids of both sketches and
+    compresses again, so sketches of separate batches combine into the sketch
+    of their union with a rank error of about 1 / capacity.
+    """
+
+    def __init__(self, capacity: int = 256, means=None, weights=None):
+        self.capacity = capacity
+        self.means = np.empty(0) if means is None else np.asarray(means, dtype=np.float64)
+        self.weights = np.empty(0) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    @property
+    def n(self) -> float:
+        return float(self.weights.sum())
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.means = np.concatenate([self.means, values])
+        self.weights = np.concatenate([self.weights, np.ones(len(values))])
+        if len(self.means) > 2 * self.capacity:
+            self._compress()
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        merged = QuantileSketch(
+            max(self.capacity, other.capacity),
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+        )
+        merged._compress()
+        return merged
+
+    def _compress(self):
+        order = np.argsort(self.means, kind="stable")
+        means, weights = self.means[order], self.weights[order]
+        if len(means) <= self.capacity:
+            self.means, self.weights = means, weights
+            return
+        # Bucket of each centroid from the middle of its cumulated weight
+        midpoints = np.cumsum(weights) - weights / 2
+        buckets = np.minimum((midpoints / weights.sum() * self.capacity).astype(np.int64), self.capacity - 1)
+        bucket_weights = np.bincount(buckets, weights, minlength=self.capacity)
+        bucket_sums = np.bincount(buckets, weights * means, minlength=self.capacity)
+        kept = bucket_weights > 0
+        self.means = bucket_sums[kept] / bucket_weights[kept]
+        self.weights = bucket_weights[kept]
+
+    def _sorted(self):
+        order = np.argsort(self.means, kind="stable")
+        return self.means[order], self.weights[order]
+
+    def cdf(self, x) -> np.ndarray:
+        means, weights = self._sorted()
+        cumulated = np.concatenate([[0.0], np.cumsum(weights)]) / max(weights.sum(), 1)
+        return cumulated[np.searchsorted(means, x, side="right")]
+
+    def quantiles(self, q) -> np.ndarray:
+        means, weights = self._sorted()
+        return np.interp(np.asarray(q) * weights.sum(), np.cumsum(weights) - weights / 2, means)
+
+    def std(self) -> float:
+        if not self.n:
+            return 0.0
+        mean = np.average(self.means, weights=self.weights)
+        return float(np.sqrt(np.average((self.means - mean) ** 2, weights=self.weights)))
+
+    def ks(self, other: "QuantileSketch") -> float:
+        """Kolmogorov-Smirnov statistic: largest gap between both CDFs."""
+        points = np.union1d(self.means, other.means)
+        return float(np.max(np.abs(self.cdf(points) - other.cdf(points)))) if len(points) else 0.0
+
+    def wasserstein(self, other: "QuantileSketch") -> float:
+        """Wasserstein-1 distance: area between both CDFs."""
+        points = np.union1d(self.means, other.means)
+        if len(points) < 2:
+            return 0.0
+        gaps = np.abs(self.cdf(points[:-1]) - other.cdf(points[:-1]))
+        return float(np.sum(gaps * np.diff(points)))
+
+
+class DriftSketches:
+    """Histogram and quantile sketch of every monitored feature.
+
+    Reference sketches are built once from the reference data, with bin
+    edges at its deciles; the sketches of the served traffic share those
+    edges and are updated batch by batch, so comparing them costs
+    O(bins + capacity) per feature whatever the history length.
+    """
+
+    def __init__(self, histograms: Dict[str, HistogramSketch], quantiles: Dict[str, QuantileSketch]):
+        self.histograms = histograms
+        self.quantiles = quantiles
+
+    @property
+    def features(self):
+        return list(self.histograms)
+
+    @property
+    def n(self) -> float:
+        return max((histogram.n for histogram in self.histograms.values()), default=0.0)
+
+    @classmethod
+    def from_reference(cls, df: pd.DataFrame, features: Optional[Iterable[str]] = None, n_bins: int = 10, capacity: int = 256):
+        histograms, quantiles = {}, {}
+        for feature in features or df.columns:
+            values = df[feature].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1])) if len(values) else np.empty(0)
+            histograms[feature] = HistogramSketch(edges)
+            histograms[feature].update(values)
+            # Compressed once over all values, like the profiles of the create_reference_data pipeline
+            quantiles[feature] = QuantileSketch(capacity, values, np.ones(len(values)))
+            quantiles[feature]._compress()
+        return cls(histograms, quantiles)
+
+    def empty_like(self) -> "DriftSketches":
+        """Sketches of the same features and bin edges, with no value yet."""
+        return DriftSketches(
+            {feature: HistogramSketch(histogram.edges) for feature, histogram in self.histograms.items()},
+            {feature: QuantileSketch(sketch.capacity) for feature, sketch in self.quantiles.items()},
+        )
+
+    def update(self, columns: Dict[str, np.ndarray]):
+        """Add a batch of values, {feature: values}. Unknown features are ignored."""
+        for feature, values in columns.items():
+            if feature in self.histograms:
+                self.histograms[feature].update(values)
+                self.quantiles[feature].update(values)
+
+    def merge(self, other: "DriftSketches") -> "DriftSketches":
+        return DriftSketches(
+            {feature: histogram.merge(other.histograms[feature]) for feature, histogram in self.histograms.items()},
+            {feature: sketch.merge(other.quantiles[feature]) for feature, sketch in self.quantiles.items()},
+        )
+
+    def compare(self, reference: "DriftSketches") -> pd.DataFrame:
+        """PSI, KS statistic and Wasserstein distance (in reference standard deviations) of each feature with values."""
+        rows = []
+        for feature in self.features:
+            if not self.histograms[feature].n or feature not in reference.histograms:
+                continue
+            current, expected = self.quantiles[feature], reference.quantiles[feature]
+            std = expected.std()
+            rows.append({
+                "feature": feature,
+                "psi": self.histograms[feature].psi(reference.histograms[feature]),
+                "ks": current.ks(expected),
+                "wasserstein": current.wasserstein(expected) / std if std else 0.0,
+                "n": self.histograms[feature].n,
+            })
+        return pd.DataFrame(rows, columns=["feature", "psi", "ks", "wasserstein", "n"])
+
+    def to_bytes(self) -> bytes:
+        for sketch in self.quantiles.values():
+            sketch._compress()
+        arrays = {}
+        for feature in self.features:
+            arrays[f"{feature}/edges"] = self.histograms[feature].edges
+            arrays[f"{feature}/counts"] = self.histograms[feature].counts
+            arrays[f"{feature}/means"] = self.quantiles[feature].means
+            arrays[f"{feature}/weights"] = self.quantiles[feature].weights
+            arrays[f"{feature}/capacity"] = np.array(self.quantiles[feature].capacity)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DriftSketches":
+        arrays = np.load(io.BytesIO(data), allow_pickle=False)
+        # Other arrays (reference profile moments, errors...) are not sketches
+        features = [name.rsplit("/", 1)[0] for name in arrays.files if name.endswith("/edges")]
+        return cls(
+            {feature: HistogramSketch(arrays[f"{feature}/edges"], arrays[f"{feature}/counts"]) for feature in features},
+            {
+                feature: QuantileSketch(int(arrays[f"{feature}/capacity"]), arrays[f"{feature}/means"], arrays[f"{feature}/weights"])
+                for feature in features
+            },
+        )
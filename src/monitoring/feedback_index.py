@@ -0,0 +1,382 @@
+import os
+import json
+import sqlite3
+import calendar
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from src.monitoring.log_arrays import explode_records
+from src.monitoring.log_segments import list_segments
+
+
+def read_new_lines(path: str, offset: int) -> Tuple[List[dict], int]:
+    """JSON records appended to `path` since byte `offset`, and the offset to resume from.
+
+    A trailing line still being written is left for the next call. A file
+    smaller than `offset` was rotated and is read from the start.
+    """
+    if not os.path.exists(path):
+        return [], offset
+    if os.path.getsize(path) < offset:
+        offset = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1
+    records = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+    return records, offset + end
+
+
+def _first_values(outputs) -> np.ndarray:
+    """First value of each output row of a Parquet list column, NaN for empty rows."""
+    outputs = outputs.combine_chunks()
+    offsets = outputs.offsets.to_numpy()
+    values = outputs.flatten().to_numpy(zero_copy_only=False)
+    first = np.full(len(outputs), np.nan, dtype=np.float64)
+    has_value = np.diff(offsets) > 0
+    first[has_value] = values[offsets[:-1][has_value]]
+    return first
+
+
+def _first_value(output):
+    return output[0] if isinstance(output, list) and output else output
+
+
+def _isoformat(timestamps) -> List[str]:
+    """Segment timestamps in the isoformat of the JSONL logs, so both sort the same way."""
+    return [t.isoformat() for t in timestamps.to_pandas()]
+
+
+def _epoch_seconds(timestamps) -> np.ndarray:
+    """Seconds since the epoch of isoformat timestamps, naive ones read as UTC like SQLite does."""
+    return pd.to_datetime(pd.Series(timestamps, dtype=object), format="ISO8601", utc=True).astype("int64").to_numpy() // 10 ** 9
+
+
+class NewPredictions(NamedTuple):
+    """Prediction rows indexed by one ingest call."""
+
+    # Seconds since the epoch of the logged timestamp
+    timestamps: np.ndarray
+    # One window per row, float32
+    X: np.ndarray
+    # First predicted value of each row
+    target: np.ndarray
+
+
+class FeedbackIndex:
+    """SQLite index of the monitoring, fed incrementally from the API logs.
+
+    Predictions are indexed by (prediction_id, row_index) as the logs grow,
+    reading JSONL logs from their last byte offset and Parquet segments once.
+    Feedback, compact or not, is then matched by primary key lookups and
+    added to running error sums per model version and time bucket of the
+    prediction, so a run costs O(new records) instead of a merge of the full
+    logs, and a time window is a range scan over its buckets. Feedback logged
+    before its prediction stays pending until the prediction shows up.
+    """
+
+    def __init__(self, db_path="src/reports/db/feedback_index.db", bucket_seconds: int = 900):
+        self.db_path = db_path
+        # Must stay the same for the lifetime of the database
+        self.bucket_seconds = bucket_seconds
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:  # commits, or rolls back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.executescript("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                prediction_id TEXT,
+                row_index INTEGER,
+                prediction REAL,
+                model_name TEXT,
+                model_version TEXT,
+                timestamp TEXT,
+                PRIMARY KEY (prediction_id, row_index)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS predictions_timestamp ON predictions (timestamp);
+
+            CREATE TABLE IF NOT EXISTS pending_feedback (
+                prediction_id TEXT,
+                row_index INTEGER,
+                target REAL,
+                timestamp TEXT,
+                PRIMARY KEY (prediction_id, row_index)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS pending_feedback_timestamp ON pending_feedback (timestamp);
+
+            CREATE TABLE IF NOT EXISTS ground_truth (
+                prediction_id TEXT,
+                row_index INTEGER,
+                target REAL,
+                prediction REAL,
+                model_version TEXT,
+                timestamp TEXT,
+                PRIMARY KEY (prediction_id, row_index)
+            ) WITHOUT ROWID;
+
+            CREATE INDEX IF NOT EXISTS ground_truth_timestamp ON ground_truth (timestamp);
+
+            -- Running sums of the matched feedback per bucket of prediction time (epoch seconds),
+            -- enough for MAE, RMSE and R2 over any range of buckets
+            CREATE TABLE IF NOT EXISTS error_buckets (
+                bucket INTEGER,
+                model_version TEXT,
+                n INTEGER,
+                sum_abs_error REAL,
+                sum_squared_error REAL,
+                sum_target REAL,
+                sum_squared_target REAL,
+                PRIMARY KEY (bucket, model_version)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS log_offsets (
+                source TEXT PRIMARY KEY,
+                offset INTEGER
+            );
+
+            -- Serialized drift sketches of the predictions of each bucket, against one reference
+            CREATE TABLE IF NOT EXISTS drift_buckets (
+                reference TEXT,
+                bucket INTEGER,
+                sketches BLOB,
+                PRIMARY KEY (reference, bucket)
+            ) WITHOUT ROWID;
+            """)
+
+    def _offset(self, conn, source: str) -> int:
+        row = conn.execute("SELECT offset FROM log_offsets WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else 0
+
+    def _set_offset(self, conn, source: str, offset: int):
+        conn.execute("INSERT OR REPLACE INTO log_offsets VALUES (?, ?)", (source, offset))
+
+    def _insert_predictions(self, conn, rows):
+        conn.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def _insert_feedback(self, conn, rows):
+        conn.executemany("INSERT OR REPLACE INTO pending_feedback VALUES (?, ?, ?, ?)", rows)
+
+    def bucket(self, timestamps):
+        """Start of the bucket of epoch second timestamps."""
+        return timestamps // self.bucket_seconds * self.bucket_seconds
+
+    def ingest_jsonl(self, prediction_log: str, feedback_log: str, legacy_feedback_log: Optional[str] = None) -> NewPredictions:
+        """Index the lines appended to the JSONL logs since the last call.
+
+        `feedback_log` is ground_truth_compact.jsonl, `legacy_feedback_log` the
+        ground_truth.jsonl of /feedback. Returns the new prediction rows.
+        """
+        with self._connect() as conn:
+            records, offset = read_new_lines(prediction_log, self._offset(conn, prediction_log))
+            records = pd.DataFrame(records, columns=["prediction_id", "model_name", "model_version", "timestamp", "inputs", "outputs"])
+            record, row_index, X, target = explode_records(records)
+            self._insert_predictions(conn, zip(
+                records["prediction_id"].to_numpy()[record],
+                row_index.tolist(),
+                target.astype(np.float64).tolist(),
+                records["model_name"].to_numpy()[record],
+                records["model_version"].astype(str).to_numpy()[record],
+                records["timestamp"].to_numpy()[record],
+            ))
+            self._set_offset(conn, prediction_log, offset)
+            new = NewPredictions(_epoch_seconds(records["timestamp"].to_numpy()[record]), X, target)
+
+            records, offset = read_new_lines(feedback_log, self._offset(conn, feedback_log))
+            self._insert_feedback(conn, [
+                (prediction_id, row_index, value, record["timestamp"])
+                for record in records
+                for prediction_id, row_index, value in zip(record["prediction_ids"], record["row_indices"], record["values"])
+            ])
+            self._set_offset(conn, feedback_log, offset)
+
+            if legacy_feedback_log is not None:
+                records, offset = read_new_lines(legacy_feedback_log, self._offset(conn, legacy_feedback_log))
+                self._insert_feedback(conn, [
+                    # /feedback has long logged its time as "timespamp"
+                    (record["prediction_id"], idx, _first_value(output), record.get("timestamp", record.get("timespamp")))
+                    for record in records
+                    for idx, output in enumerate(record.get("outputs") or [])
+                    if isinstance(_first_value(output), (int, float))
+                ])
+                self._set_offset(conn, legacy_feedback_log, offset)
+
+            self._match(conn)
+        return new
+
+    def ingest_segments(self, segment_dir: str, start: Optional[datetime] = None) -> NewPredictions:
+        """Index the closed prediction and feedback segments not seen yet, the ones before `start` are skipped.
+
+        Returns the new prediction rows.
+        """
+        new_timestamps, new_windows, new_predictions = [], [], []
+        with self._connect() as conn:
+            for path in list_segments(segment_dir, "predictions", start=start):
+                if self._offset(conn, path):
+                    continue
+                table = pq.read_table(path, columns=["prediction_id", "row_index", "inputs", "outputs", "model_name", "model_version", "timestamp"])
+                first_values = _first_values(table["outputs"])
+                inputs = table["inputs"].combine_chunks()
+                self._insert_predictions(conn, zip(
+                    table["prediction_id"].to_pylist(),
+                    table["row_index"].to_pylist(),
+                    first_values.tolist(),
+                    table["model_name"].to_pylist(),
+                    table["model_version"].to_pylist(),
+                    _isoformat(table["timestamp"]),
+                ))
+                new_timestamps.append(table["timestamp"].to_numpy().astype("datetime64[s]").astype(np.int64))
+                new_windows.append(inputs.flatten().to_numpy(zero_copy_only=False).reshape(-1, inputs.type.list_size))
+                new_predictions.append(first_values)
+                self._set_offset(conn, path, 1)
+
+            for path in list_segments(segment_dir, "ground_truth_compact", start=start):
+                if self._offset(conn, path):
+                    continue
+                table = pq.read_table(path)
+                self._insert_feedback(conn, zip(
+                    table["prediction_id"].to_pylist(),
+                    table["row_index"].to_pylist(),
+                    table["value"].to_pylist(),
+                    _isoformat(table["timestamp"]),
+                ))
+                self._set_offset(conn, path, 1)
+
+            for path in list_segments(segment_dir, "ground_truth", start=start):
+                if self._offset(conn, path):
+                    continue
+                table = pq.read_table(path, columns=["prediction_id", "row_index", "outputs", "timestamp"])
+                self._insert_feedback(conn, zip(
+                    table["prediction_id"].to_pylist(),
+                    table["row_index"].to_pylist(),
+                    _first_values(table["outputs"]).tolist(),
+                    _isoformat(table["timestamp"]),
+                ))
+                self._set_offset(conn, path, 1)
+
+            self._match(conn)
+
+        if not new_predictions:
+            return NewPredictions(np.empty(0, dtype=np.int64), np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.float32))
+        return NewPredictions(
+            np.concatenate(new_timestamps),
+            np.concatenate(new_windows),
+            np.concatenate(new_predictions).astype(np.float32),
+        )
+
+    def _match(self, conn):
+        # Only feedback not matched yet is added to the running sums, the first feedback of a row wins
+        conn.execute("""
+        INSERT INTO error_buckets
+        SELECT CAST(strftime('%s', p.timestamp) AS INTEGER) / :bucket * :bucket AS bucket, p.model_version, COUNT(*),
+            SUM(ABS(f.target - p.prediction)),
+            SUM((f.target - p.prediction) * (f.target - p.prediction)),
+            SUM(f.target),
+            SUM(f.target * f.target)
+        FROM pending_feedback f
+        JOIN predictions p ON p.prediction_id = f.prediction_id AND p.row_index = f.row_index
+        WHERE p.prediction IS NOT NULL AND f.target IS NOT NULL AND NOT EXISTS (
+            SELECT 1 FROM ground_truth g
+            WHERE g.prediction_id = f.prediction_id AND g.row_index = f.row_index
+        )
+        GROUP BY bucket, p.model_version
+        ON CONFLICT (bucket, model_version) DO UPDATE SET
+            n = n + excluded.n,
+            sum_abs_error = sum_abs_error + excluded.sum_abs_error,
+            sum_squared_error = sum_squared_error + excluded.sum_squared_error,
+            sum_target = sum_target + excluded.sum_target,
+            sum_squared_target = sum_squared_target + excluded.sum_squared_target
+        """, {"bucket": self.bucket_seconds})
+        conn.execute("""
+        INSERT OR IGNORE INTO ground_truth
+        SELECT f.prediction_id, f.row_index, f.target, p.prediction, p.model_version, f.timestamp
+        FROM pending_feedback f
+        JOIN predictions p ON p.prediction_id = f.prediction_id AND p.row_index = f.row_index
+        """)
+        conn.execute("""
+        DELETE FROM pending_feedback
+        WHERE EXISTS (
+            SELECT 1 FROM predictions p
+            WHERE p.prediction_id = pending_feedback.prediction_id AND p.row_index = pending_feedback.row_index
+        )
+        """)
+
+    def error_metrics(self, start: Optional[int] = None) -> dict:
+        """MAE, RMSE and R2 of the feedback matched so far, on predictions from bucket `start` on (None without feedback)."""
+        with self._connect() as conn:
+            n, sum_abs, sum_sq, sum_target, sum_sq_target = conn.execute("""
+            SELECT SUM(n), SUM(sum_abs_error), SUM(sum_squared_error), SUM(sum_target), SUM(sum_squared_target)
+            FROM error_buckets
+            WHERE bucket >= ?
+            """, (start or 0,)).fetchone()
+
+        if not n:
+            return {"mae": None, "rmse": None, "r2": None}
+        total_variance = sum_sq_target - sum_target ** 2 / n
+        return {
+            "mae": sum_abs / n,
+            "rmse": float(np.sqrt(sum_sq / n)),
+            "r2": 1 - sum_sq / total_variance if total_variance > 0 else None,
+        }
+
+    def drift_bucket(self, reference: str, bucket: int) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT sketches FROM drift_buckets WHERE reference = ? AND bucket = ?", (reference, int(bucket))).fetchone()
+        return row[0] if row else None
+
+    def save_drift_bucket(self, reference: str, bucket: int, sketches: bytes):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO drift_buckets VALUES (?, ?, ?)", (reference, int(bucket), sketches))
+
+    def drift_buckets(self, reference: str, start: int) -> List[bytes]:
+        """Sketches of the buckets from `start` on, by range scan."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT sketches FROM drift_buckets WHERE reference = ? AND bucket >= ? ORDER BY bucket", (reference, int(start))
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune_drift_buckets(self, reference: str, start: int):
+        """Drop the buckets before `start` and the ones of other references."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM drift_buckets WHERE reference != ? OR bucket < ?", (reference, int(start)))
+
+    def latest_model(self) -> Tuple[Optional[str], Optional[str]]:
+        """(model_name, model_version) of the latest indexed prediction."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT model_name, model_version FROM predictions ORDER BY timestamp DESC LIMIT 1"
+            ).fetchone()
+        return row if row else (None, None)
+
+    def prune(self, before: datetime):
+        """Drop what is older than `before`, so the index does not grow with uptime.
+
+        Predictions, matched and pending feedback and error buckets before it
+        are deleted, with the offsets of the log files that no longer exist
+        (segments removed by their retention).
+        """
+        cutoff = before.isoformat()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM predictions WHERE timestamp < ?", (cutoff,))
+            conn.execute("DELETE FROM ground_truth WHERE timestamp < ?", (cutoff,))
+            conn.execute("DELETE FROM pending_feedback WHERE timestamp < ?", (cutoff,))
+            conn.execute("DELETE FROM error_buckets WHERE bucket < ?", (int(self.bucket(calendar.timegm(before.timetuple()))),))
+            sources = [source for source, in conn.execute("SELECT source FROM log_offsets")]
+            conn.executemany("DELETE FROM log_offsets WHERE source = ?", [(source,) for source in sources if not os.path.exists(source)])
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Vectorized access to the nested arrays of the JSONL prediction and feedback logs
+
+
+def _nested_float_lists(column: pd.Series, wrap_scalars: bool = True) -> pa.ListArray:
+    """A column of lists of windows as an Arrow list<list<float32>> array.
+
+    Scalar windows are wrapped into one-value windows, or nulled when
+    wrap_scalars is False.
+    """
+    try:
+        return pa.array(column, type=pa.list_(pa.list_(pa.float32())))
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array(
+            [
+                [w if isinstance(w, list) else [w] if wrap_scalars else None for w in windows]
+                for windows in column
+            ],
+            type=pa.list_(pa.list_(pa.float32())),
+        )
+
+
+def _kept_windows(nested: pa.ListArray, n_kept: np.ndarray) -> pa.ListArray:
+    """The first n_kept[i] windows of each record i, flattened into one list array."""
+    parents = pc.list_parent_indices(nested).to_numpy()
+    positions = np.arange(len(parents)) - nested.offsets.to_numpy()[parents]
+    return nested.flatten().filter(pa.array(positions < n_kept[parents]))
+
+
+def explode_records(df: pd.DataFrame):
+    """(record, row_index, X, target) of the windows of prediction or feedback log records.
+
+    `inputs` and `outputs` are exploded in Arrow instead of row by row: X is
+    a contiguous (n_windows, window_size) float32 matrix, NaN-padded when
+    window sizes differ, `target` the first output of each window, `record`
+    the position in `df` of the record of each window and `row_index` its
+    position in that record. Like `zip`, a record keeps as many windows as it
+    has both inputs and outputs. Inputs that are not lists are skipped, the
+    other windows keep their row index.
+    """
+    is_list = df["inputs"].map(lambda v: isinstance(v, list)) & df["outputs"].map(lambda v: isinstance(v, list))
+    positions = np.flatnonzero(is_list.to_numpy())
+    records = df.iloc[positions]
+
+    inputs = _nested_float_lists(records["inputs"], wrap_scalars=False)
+    outputs = _nested_float_lists(records["outputs"])
+    n_kept = np.minimum(
+        pc.list_value_length(inputs).to_numpy(zero_copy_only=False),
+        pc.list_value_length(outputs).to_numpy(zero_copy_only=False),
+    )
+
+    record_of_window = np.repeat(np.arange(len(n_kept)), n_kept)
+    row_index = np.arange(len(record_of_window)) - (np.cumsum(n_kept) - n_kept)[record_of_window]
+
+    windows = _kept_windows(inputs, n_kept)
+    valid = windows.is_valid()
+    windows = windows.filter(valid)
+    record_of_window = record_of_window[valid.to_numpy(zero_copy_only=False)]
+    row_index = row_index[valid.to_numpy(zero_copy_only=False)]
+
+    window_offsets = windows.offsets.to_numpy()
+    lengths = np.diff(window_offsets)
+    values = windows.flatten().to_numpy(zero_copy_only=False)
+    width = int(lengths.max()) if len(lengths) else 0
+    if len(lengths) and (lengths == width).all():
+        X = values.reshape(-1, width)
+    else:
+        X = np.full((len(lengths), width), np.nan, dtype=np.float32)
+        rows = np.repeat(np.arange(len(lengths)), lengths)
+        X[rows, np.arange(len(values)) - window_offsets[:-1][rows]] = values
+
+    window_outputs = _kept_windows(outputs, n_kept).filter(valid)
+    output_offsets = window_outputs.offsets.to_numpy()
+    output_values = window_outputs.flatten().to_numpy(zero_copy_only=False)
+    has_output = np.diff(output_offsets) > 0
+    target = np.full(len(window_outputs), np.nan, dtype=np.float32)
+    target[has_output] = output_values[output_offsets[:-1][has_output]]
+    return positions[record_of_window], row_index, X, target
+
+
+def explode_windows(df: pd.DataFrame):
+    """(prediction_ids, X, target) of `explode_records`, prediction_ids being "<prediction_id>_<row index>"."""
+    record, row_index, X, target = explode_records(df)
+    prediction_ids = pc.binary_join_element_wise(
+        pc.take(pa.array(df["prediction_id"].astype(str)), record),
+        pc.cast(pa.array(row_index), pa.string()),
+        "_",
+    )
+    return prediction_ids.to_numpy(zero_copy_only=False), X, target
@@ -0,0 +1,88 @@
+import os
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+# Reader for the Parquet log segments written by the API (LOG_BACKEND=parquet):
+# <root>/<stream>/date=YYYY-MM-DD/seg-<first_ms>-<last_ms>-<id>.parquet
+
+
+def _to_ms(value: datetime) -> int:
+    return int(pd.Timestamp(value).value // 1_000_000)
+
+
+def list_segments(root: str, stream: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> List[str]:
+    """Closed segments of `stream` that may hold rows between `start` and `end`."""
+    stream_dir = os.path.join(root, stream)
+    if not os.path.isdir(stream_dir):
+        return []
+
+    first_day = start.strftime("%Y-%m-%d") if start else None
+    last_day = end.strftime("%Y-%m-%d") if end else None
+    start_ms = _to_ms(start) if start else None
+    end_ms = _to_ms(end) if end else None
+
+    paths = []
+    for partition in sorted(os.listdir(stream_dir)):
+        if not partition.startswith("date="):
+            continue
+        day = partition[len("date="):]
+        if (first_day and day < first_day) or (last_day and day > last_day):
+            continue
+
+        partition_dir = os.path.join(stream_dir, partition)
+        for name in sorted(os.listdir(partition_dir)):
+            if not (name.startswith("seg-") and name.endswith(".parquet")):
+                continue  # segments still being written start with a dot
+            first_ms, last_ms = (int(v) for v in name.split("-")[1:3])
+            if (start_ms is not None and last_ms < start_ms) or (end_ms is not None and first_ms > end_ms):
+                continue
+            paths.append(os.path.join(partition_dir, name))
+
+    return paths
+
+
+def read_segments(root: str, stream: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Optional[pa.Table]:
+    """Rows of `stream` logged between `start` and `end`, reading only the matching segments."""
+    paths = list_segments(root, stream, start, end)
+    if not paths:
+        return None
+
+    table = pa.concat_tables([pq.read_table(path) for path in paths])
+
+    if start is not None:
+        table = table.filter(pc.greater_equal(table["timestamp"], pa.scalar(pd.Timestamp(start), pa.timestamp("ms"))))
+    if end is not None:
+        table = table.filter(pc.less_equal(table["timestamp"], pa.scalar(pd.Timestamp(end), pa.timestamp("ms"))))
+
+    return table
+
+
+def segments_to_flat(table: Optional[pa.Table]) -> pd.DataFrame:
+    """Same layout as `flatten_predictions`: consumption_i columns, prediction_id and target."""
+    if table is None or table.num_rows == 0:
+        return pd.DataFrame()
+
+    inputs = table["inputs"].combine_chunks()
+    window_size = inputs.type.list_size
+    X = inputs.flatten().to_numpy(zero_copy_only=False).reshape(-1, window_size)
+
+    # First output value of each row, NaN when the row has none
+    outputs = table["outputs"].combine_chunks()
+    offsets = outputs.offsets.to_numpy()
+    values = outputs.flatten().to_numpy(zero_copy_only=False)
+    has_output = np.diff(offsets) > 0
+    target = np.full(len(outputs), np.nan, dtype=np.float32)
+    target[has_output] = values[offsets[:-1][has_output]]
+
+    flat_df = pd.DataFrame(X, columns=[f"consumption_{i + 1}" for i in range(window_size)])
+    flat_df["prediction_id"] = (
+        table["prediction_id"].to_pandas() + "_" + table["row_index"].to_pandas().astype(str)
+    ).to_numpy()
+    flat_df["target"] = target
+    return flat_df
@@ -25,6 +25,32 @@ class MetricsStorage:
         )
         """)
 
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS feature_drift (
+            timestamp TEXT,
+            window TEXT,
+            feature TEXT,
+            psi REAL,
+            ks REAL,
+            wasserstein REAL,
+            n REAL,
+            PRIMARY KEY (timestamp, window, feature)
+        )
+        """)
+
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS window_metrics (
+            timestamp TEXT,
+            window TEXT,
+            model_version TEXT,
+            mae REAL,
+            rmse REAL,
+            r2 REAL,
+            drift_score REAL,
+            PRIMARY KEY (timestamp, window)
+        )
+        """)
+
         conn.commit()
         conn.close()
 
@@ -61,3 +87,35 @@ class MetricsStorage:
 
         conn.commit()
         conn.close()
+
+    def store_feature_drift(self, timestamp: str, window: str, drift):
+        """Insert the PSI, KS and Wasserstein drift of each feature over `window`, one row per feature."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.executemany("""
+        INSERT OR REPLACE INTO feature_drift (timestamp, window, feature, psi, ks, wasserstein, n)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (timestamp, window, row.feature, row.psi, row.ks, row.wasserstein, row.n)
+            for row in drift.itertuples(index=False)
+        ])
+
+        conn.commit()
+        conn.close()
+
+    def store_window_metrics(self, timestamp: str, model_version: str, window_metrics: dict):
+        """Insert the metrics of each sliding window, {window: {mae, rmse, r2, drift_score}}."""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+
+        cursor.executemany("""
+        INSERT OR REPLACE INTO window_metrics (timestamp, window, model_version, mae, rmse, r2, drift_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (timestamp, window, model_version, metrics.get("mae"), metrics.get("rmse"), metrics.get("r2"), metrics.get("drift_score"))
+            for window, metrics in window_metrics.items()
+        ])
+
+        conn.commit()
+        conn.close()
@@ -2,26 +2,60 @@ import os
 import json
 import glob
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
+import numpy as np
 import pandas as pd
-from evidently import Dataset, Report, DataDefinition, Regression
-from evidently.presets import DataDriftPreset, RegressionPreset
 
 from src.monitoring.metrics_storage import MetricsStorage
+from src.monitoring.feedback_index import FeedbackIndex
+from src.monitoring.reference_profile import ReferenceProfile, ReferenceProfileCache
+from src.monitoring.windows import SlidingWindows, parse_windows, window_columns
+from src.monitoring.log_arrays import explode_windows
 
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
 LOG_DIR = os.getenv("LOG_DIR", "src/logs")
 REFERENCE_DRIFT = os.getenv("REFERENCE_DRIFT", "./data/03_primary/eco2mix/definitive/30min/checked/reference/reference_data_drift.csv")
-REFERENCE_PERF = os.getenv("REFERENCE_PERF", "./data/03_primary/eco2mix/definitive/30min/checked/reference/reference_data_perf.csv")
+# Written by the create_reference_data pipeline, REFERENCE_DRIFT is only parsed when no profile exists
+REFERENCE_PROFILE = os.getenv("REFERENCE_PROFILE", "./data/03_primary/eco2mix/definitive/30min/checked/reference/reference_profile.npz")
 
 PREDICTION_LOG = os.path.join(LOG_DIR, "predictions.jsonl")
 FEEDBACK_LOG = os.path.join(LOG_DIR, "ground_truth.jsonl")
-
+# Written by /feedback/batch
+COMPACT_FEEDBACK_LOG = os.path.join(LOG_DIR, "ground_truth_compact.jsonl")
+# Log offsets, indexed predictions and running error sums of the incremental monitoring
+FEEDBACK_INDEX_DB = os.getenv("FEEDBACK_INDEX_DB", "src/reports/db/feedback_index.db")
+
+# Must match the API: "jsonl" or "parquet" (segments under LOG_DIR/segments)
+LOG_BACKEND = os.getenv("LOG_BACKEND", "jsonl")
+SEGMENT_DIR = os.path.join(LOG_DIR, "segments")
+# Parquet backend only: segments older than this are never indexed, 0 means everything
+MONITORING_LOOKBACK_HOURS = float(os.getenv("MONITORING_LOOKBACK_HOURS", "0"))
+
+# Bins of the PSI histograms and centroids of the KS / Wasserstein sketches, per feature
+DRIFT_HISTOGRAM_BINS = int(os.getenv("DRIFT_HISTOGRAM_BINS", "10"))
+DRIFT_SKETCH_CAPACITY = int(os.getenv("DRIFT_SKETCH_CAPACITY", "256"))
+# Sliding windows of the metrics, ending at each run, and the one the status and performance_metrics use
+MONITORING_WINDOWS = os.getenv("MONITORING_WINDOWS", "1h,24h,7d")
+MONITORING_STATUS_WINDOW = os.getenv("MONITORING_STATUS_WINDOW", "24h")
+# The index keeps the longest window plus this delay for late feedback, older rows are pruned
+FEEDBACK_GRACE_HOURS = float(os.getenv("FEEDBACK_GRACE_HOURS", "48"))
+# Granularity of the indexed error sums and drift sketches, windows start on a bucket boundary
+MONITORING_BUCKET_MINUTES = int(os.getenv("MONITORING_BUCKET_MINUTES", "15"))
+# Full Evidently report, on a slower schedule (run_monitoring.py), over the latest windows
+REPORT_DIR = os.getenv("REPORT_DIR", "src/reports")
+DETAILED_REPORT_MAX_ROWS = int(os.getenv("DETAILED_REPORT_MAX_ROWS", "10000"))
+
+# drift_score is the Wasserstein distance of the predictions to the reference target, in reference standard deviations:
+# about the shift of their mean, 0.5 being half a standard deviation. Without drift, 99% of 48-prediction windows stay
+# below 0.4, smaller windows are noisier and do not change the status
 DRIFT_CRITICAL_THRESHOLD = float(os.getenv("DRIFT_CRITICAL_THRESHOLD", "0.5"))
+DRIFT_MIN_SAMPLES = int(os.getenv("DRIFT_MIN_SAMPLES", "48"))
 RMSE_WARNING_THRESHOLD = float(os.getenv("RMSE_WARNING_THRESHOLD", "500"))
+# WARNING as well when the RMSE exceeds this multiple of the reference profile's baseline RMSE, 0 disables it
+RMSE_BASELINE_RATIO = float(os.getenv("RMSE_BASELINE_RATIO", "0"))
 
 
 def get_latest_versioned_file(base_path: str) -> str:
@@ -41,39 +75,27 @@ def get_latest_versioned_file(base_path: str) -> str:
 
 
 def flatten_predictions(df: pd.DataFrame) -> pd.DataFrame:
-    rows = []
-
-    for _, row in df.iterrows():
-        inputs = row.get("inputs", [])
-        outputs = row.get("outputs", [])
-
-        if not isinstance(inputs, list) or not isinstance(outputs, list):
-            continue
-
-        for idx, (inp, out) in enumerate(zip(inputs, outputs)):
-            if not isinstance(inp, list):
-                continue
+    """One row per window: consumption_i columns, prediction_id and target (first output)."""
+    if df.empty or "inputs" not in df or "outputs" not in df:
+        return pd.DataFrame()
 
-            first_val = out[0] if isinstance(out, list) and len(out) > 0 else out
+    prediction_ids, X, target = explode_windows(df)
+    if not len(X):
+        return pd.DataFrame()
 
-            entry = {f"consumption_{i + 1}": v for i, v in enumerate(inp)}
-            entry.update(
-                {
-                    "prediction_id": f"{row['prediction_id']}_{idx}",
-                    "target": first_val,
-                }
-            )
-            rows.append(entry)
-
-    flat_df = pd.DataFrame(rows)
+    flat_df = pd.DataFrame(X, columns=[f"consumption_{i + 1}" for i in range(X.shape[1])])
+    flat_df["prediction_id"] = prediction_ids
+    flat_df["target"] = target
     return flat_df
 
-def compute_status(drift_score, rmse, timestamp) -> str:
-    logging.info(f"Computing status at {timestamp} with drift_score={drift_score}, rmse={rmse}")
+def compute_status(drift_score, rmse, timestamp, baseline_rmse=None) -> str:
+    logging.info(f"Computing status at {timestamp} with drift_score={drift_score}, rmse={rmse}, baseline_rmse={baseline_rmse}")
     if drift_score is not None and drift_score > DRIFT_CRITICAL_THRESHOLD:
         return "DEGRADED"
     if rmse is not None and rmse > RMSE_WARNING_THRESHOLD:
         return "WARNING"
+    if rmse is not None and baseline_rmse and RMSE_BASELINE_RATIO and rmse > RMSE_BASELINE_RATIO * baseline_rmse:
+        return "WARNING"
     return "OK"
 
 def extract_drift_score(drift_metrics: dict):
@@ -83,115 +105,163 @@ def extract_drift_score(drift_metrics: dict):
             return metric.get("value")
     return None
 
-def extract_perf_metrics(perf_metrics: dict) -> dict:
-    rmse = None
-    mae = None
-    r2 = None
 
-    for metric in perf_metrics.get("metrics", []):
-        metric_name = metric.get("metric_name", "")
-        value = metric.get("value")
+_reference_cache = {}
+_profile_cache = ReferenceProfileCache()
+_csv_profile_cache = {}
 
-        if "RMSE" in metric_name:
-            rmse = value
 
-        elif "MAE" in metric_name and isinstance(value, dict):
-            mae = value.get("mean")
+def load_reference(path: str) -> pd.DataFrame:
+    """Reference CSV, parsed again only when its version or mtime changes."""
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _reference_cache:
+        _reference_cache.clear()
+        _reference_cache[key] = pd.read_csv(path)
+    return _reference_cache[key]
 
-        elif "R2Score" in metric_name:
-            r2 = value
 
-    return {
-        "rmse": rmse,
-        "mae": mae,
-        "r2": r2,
-    }
-
-def generate_monitoring_metrics(storage: MetricsStorage):
+def load_reference_profile() -> ReferenceProfile:
+    """Latest reference profile, built from the reference CSV when the pipeline did not write one."""
+    try:
+        return _profile_cache.get(get_latest_versioned_file(REFERENCE_PROFILE))
+    except FileNotFoundError:
+        path = get_latest_versioned_file(REFERENCE_DRIFT)
 
-    latest_ref_drift = get_latest_versioned_file(REFERENCE_DRIFT)
-    latest_ref_perf = get_latest_versioned_file(REFERENCE_PERF)
-
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _csv_profile_cache:
+        logging.warning(f"No reference profile under {REFERENCE_PROFILE}, building it from {path}")
+        _csv_profile_cache.clear()
+        _csv_profile_cache[key] = ReferenceProfile.from_dataframe(
+            load_reference(path), path, n_bins=DRIFT_HISTOGRAM_BINS, capacity=DRIFT_SKETCH_CAPACITY, key=f"{path}@{key[1]}"
+        )
+    return _csv_profile_cache[key]
 
-    ref_drift = pd.read_csv(latest_ref_drift)
-    ref_perf = pd.read_csv(latest_ref_perf)
 
-    preds = pd.read_json(PREDICTION_LOG, lines=True)
-    flat_preds = flatten_predictions(preds)
+class RecentWindows:
+    """Latest prediction windows seen by this process, for the detailed report."""
 
-    if flat_preds.empty:
-        raise ValueError("No predictions available after flattening prediction logs.")
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self._frame = pd.DataFrame()
 
-    model_version = preds["model_version"].iloc[0]
-    model_name = preds["model_name"].iloc[0]
+    def add(self, X: np.ndarray, target: np.ndarray):
+        if not len(target):
+            return
+        batch = pd.DataFrame(window_columns(X[-self.max_rows:], target[-self.max_rows:]))
+        self._frame = pd.concat([self._frame, batch], ignore_index=True).iloc[-self.max_rows:]
 
-    merged = pd.DataFrame()
+    def frame(self) -> pd.DataFrame:
+        return self._frame
 
-    if os.path.exists(FEEDBACK_LOG):
-        feedbacks = pd.read_json(FEEDBACK_LOG, lines=True)
-        flat_feedbacks = flatten_predictions(feedbacks)
 
-        if not flat_feedbacks.empty:
-            merged = flat_preds.merge(flat_feedbacks, on="prediction_id", how="left")
-            merged = merged[
-                [c for c in merged.columns if not c.endswith("_y") or c == "target_y"]
-            ]
-            merged = merged.rename(columns={"target_x": "prediction", "target_y": "target"})
-            merged = merged.dropna(subset=["prediction", "target"]).reset_index(drop=True)
-        else:
-            logging.warning("Flattened feedbacks dataframe is empty")
-    else:
-        logging.warning("Feedback log file does not exist")
+recent_windows = RecentWindows(DETAILED_REPORT_MAX_ROWS)
+sliding_windows = SlidingWindows(parse_windows(MONITORING_WINDOWS))
 
-    drift_report = Report(metrics=[DataDriftPreset(drift_share=0.7)])
-    result_drift_report = drift_report.run(
-        reference_data=ref_drift[["target"]],
-        current_data=flat_preds.drop(columns=["prediction_id"], errors="ignore")[["target"]],
-    )
 
-    drift_metrics_raw = result_drift_report.json()
+def ingest_logs(index: FeedbackIndex):
+    """Feed the records logged since the previous run to the index, returns the new predictions."""
+    if LOG_BACKEND == "parquet":
+        start = datetime.now() - timedelta(hours=MONITORING_LOOKBACK_HOURS) if MONITORING_LOOKBACK_HOURS else None
+        return index.ingest_segments(SEGMENT_DIR, start=start)
+    return index.ingest_jsonl(PREDICTION_LOG, COMPACT_FEEDBACK_LOG, legacy_feedback_log=FEEDBACK_LOG)
 
-    drift_metrics = json.loads(drift_metrics_raw)
 
-    drift_score = extract_drift_score(drift_metrics)
+def generate_monitoring_metrics(storage: MetricsStorage):
+    """One monitoring snapshot, processing only the records logged since the previous one.
+
+    For each of MONITORING_WINDOWS, the errors of the matched feedback are
+    summed over the index buckets of the window, and the sketches of its
+    predictions (48 inputs and prediction) are compared with the reference
+    sketches (PSI, KS, Wasserstein). MONITORING_STATUS_WINDOW gives the status.
+    """
+    if MONITORING_STATUS_WINDOW not in sliding_windows.windows:
+        raise ValueError(f"MONITORING_STATUS_WINDOW {MONITORING_STATUS_WINDOW} is not one of MONITORING_WINDOWS {MONITORING_WINDOWS}")
+
+    now = datetime.now()
+    timestamp = now.strftime("%Y-%m-%d_%H-%M-%S")
+
+    index = FeedbackIndex(FEEDBACK_INDEX_DB, bucket_seconds=MONITORING_BUCKET_MINUTES * 60)
+    new = ingest_logs(index)
+    recent_windows.add(new.X, new.target)
+
+    model_name, model_version = index.latest_model()
+    if model_name is None:
+        raise ValueError("No predictions available in the prediction logs.")
+
+    profile = load_reference_profile()
+    window_sketches = sliding_windows.update(index, profile.key, profile.sketches, new, now)
+
+    window_metrics = {}
+    drift_samples = {}
+    for window, sketches in window_sketches.items():
+        drift = sketches.compare(profile.sketches)
+        drift_score = None
+        if "target" in drift["feature"].values:
+            target = drift.loc[drift["feature"] == "target"].iloc[0]
+            drift_score = float(target["wasserstein"])
+            drift_samples[window] = target["n"]
+            storage.store_feature_drift(timestamp, window, drift)
+        window_metrics[window] = {
+            "drift_score": drift_score,
+            **index.error_metrics(start=sliding_windows.start(index, window, now)),
+        }
+    storage.store_window_metrics(timestamp, str(model_version), window_metrics)
+    index.prune(now - max(sliding_windows.windows.values()) - timedelta(hours=FEEDBACK_GRACE_HOURS))
 
     metrics = {
         "timestamp": timestamp,
         "model_name": model_name,
         "model_version": str(model_version),
-        "drift_score": drift_score,
-        "mae": None,
-        "rmse": None,
-        "r2": None,
+        **window_metrics[MONITORING_STATUS_WINDOW],
     }
+    if metrics["drift_score"] is None:
+        logging.info(f"No prediction in the last {MONITORING_STATUS_WINDOW}, drift not computed")
+    if metrics["rmse"] is None:
+        logging.warning(f"No feedback matched to a prediction of the last {MONITORING_STATUS_WINDOW}, performance metrics will remain None")
 
-    if not merged.empty:
-        merged = merged[["target", "prediction"]].dropna().copy()
+    status_drift = metrics["drift_score"]
+    if status_drift is not None and drift_samples[MONITORING_STATUS_WINDOW] < DRIFT_MIN_SAMPLES:
+        logging.info(f"Only {drift_samples[MONITORING_STATUS_WINDOW]:.0f} predictions in the last {MONITORING_STATUS_WINDOW}, drift ignored by the status")
+        status_drift = None
 
-        definition = DataDefinition(
-            regression=[Regression(target="target", prediction="prediction")]
-        )
-        reference = Dataset.from_pandas(ref_perf, data_definition=definition)
-        current = Dataset.from_pandas(merged, data_definition=definition)
+    status = compute_status(
+        status_drift,
+        metrics.get("rmse"),
+        timestamp,
+        baseline_rmse=profile.errors.get("rmse"),
+    )
+
+    metrics["status"] = status
 
-        perf_report = Report(metrics=[RegressionPreset()], include_tests=True)
-        result_perf_report = perf_report.run(reference_data=reference, current_data=current)
+    storage.store_metrics(metrics)
 
-        perf_metrics_raw = result_perf_report.json()
 
-        perf_metrics = json.loads(perf_metrics_raw)
+def generate_detailed_report(report_dir: str = os.path.join(REPORT_DIR, "drift")):
+    """Evidently data drift report of the latest windows against the reference, saved as HTML.
 
-        metrics.update(extract_perf_metrics(perf_metrics))
-    else:
-        logging.warning("Merged dataframe is empty, performance metrics will remain None")
+    Optional: skipped when evidently is not installed. Returns the report path.
+    """
+    try:
+        from evidently import Report
+        from evidently.presets import DataDriftPreset
+    except ImportError:
+        logging.warning("evidently is not installed, detailed drift report skipped")
+        return None
 
-    status = compute_status(
-        metrics.get("drift_score"),
-        metrics.get("rmse"),
-        timestamp
-    )
+    current = recent_windows.frame()
+    if current.empty:
+        logging.info("No recent prediction, detailed drift report skipped")
+        return None
 
-    metrics["status"] = status
+    reference = load_reference(get_latest_versioned_file(REFERENCE_DRIFT))
+    columns = [column for column in reference.columns if column in current.columns]
+    result = Report(metrics=[DataDriftPreset(drift_share=0.7)]).run(
+        reference_data=reference[columns],
+        current_data=current[columns],
+    )
 
-    storage.store_metrics(metrics)
\ No newline at end of file
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"drift_report_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.html")
+    result.save_html(path)
+    logging.info(f"Detailed drift report saved to {path}, target drift: {extract_drift_score(json.loads(result.json()))}")
+    return path
@@ -0,0 +1,77 @@
+import io
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.monitoring.drift import DriftSketches
+
+# Profile layout written by the create_reference_data pipeline
+PROFILE_FORMAT = 1
+MOMENTS = ["n", "mean", "std", "min", "max"]
+
+
+@dataclass(frozen=True)
+class ReferenceProfile:
+    """Summary of the reference data used by every monitoring run."""
+
+    sketches: DriftSketches
+    # One row per feature, MOMENTS columns
+    moments: pd.DataFrame
+    # Baseline errors of the model on the reference: n, mae, rmse, bias, abs_error_q50...
+    errors: Dict[str, float] = field(default_factory=dict)
+    # Versioned file it was read from
+    path: str = ""
+    # Identifies this exact profile, a file rewritten in place gets a new key
+    key: str = ""
+
+    @classmethod
+    def from_bytes(cls, data: bytes, path: str = "", key: str = "") -> "ReferenceProfile":
+        arrays = np.load(io.BytesIO(data), allow_pickle=False)
+        if "format" not in arrays.files or int(arrays["format"]) != PROFILE_FORMAT:
+            raise ValueError(f"Unsupported reference profile format in {path}, expected {PROFILE_FORMAT}")
+
+        sketches = DriftSketches.from_bytes(data)
+        moments = pd.DataFrame(
+            [arrays[f"{feature}/moments"] for feature in sketches.features],
+            index=pd.Index(sketches.features, name="feature"),
+            columns=MOMENTS,
+        )
+        errors = {}
+        if "errors/stats" in arrays.files:
+            errors = dict(zip(["n", "mae", "rmse", "bias"], arrays["errors/stats"].tolist()))
+            for level, value in zip(arrays["errors/levels"], arrays["errors/quantiles"]):
+                errors[f"abs_error_q{round(level * 100)}"] = float(value)
+        return cls(sketches, moments, errors, path, key or path)
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, path: str = "", n_bins: int = 10, capacity: int = 256, key: str = "") -> "ReferenceProfile":
+        """Profile of a reference CSV published before the pipeline wrote profiles, without baseline errors."""
+        moments = pd.DataFrame({
+            "n": df.count(),
+            "mean": df.mean(),
+            "std": df.std(ddof=0),
+            "min": df.min(),
+            "max": df.max(),
+        }).rename_axis("feature")
+        return cls(DriftSketches.from_reference(df, n_bins=n_bins, capacity=capacity), moments, {}, path, key or path)
+
+
+class ReferenceProfileCache:
+    """Latest reference profile, read again only when its path (version) or mtime changes."""
+
+    def __init__(self):
+        self._key = None
+        self._profile: Optional[ReferenceProfile] = None
+
+    def get(self, path: str) -> ReferenceProfile:
+        key = (path, os.stat(path).st_mtime_ns)
+        if key != self._key:
+            with open(path, "rb") as f:
+                self._profile = ReferenceProfile.from_bytes(f.read(), path, key=f"{path}@{key[1]}")
+            self._key = key
+            logging.info(f"Reference profile loaded from {path}")
+        return self._profile
@@ -1,4 +1,4 @@
-from src.monitoring.ml_monitoring import generate_monitoring_metrics
+from src.monitoring.ml_monitoring import generate_detailed_report, generate_monitoring_metrics
 from src.monitoring.metrics_storage import MetricsStorage
 from apscheduler.schedulers.blocking import BlockingScheduler
 import os
@@ -9,6 +9,8 @@ logging.getLogger("apscheduler").setLevel(logging.WARNING)
 
 METRICS_DB = os.getenv("METRICS_DB", "src/reports/db/metrics.db")
 INTERVAL_SECONDS = int(os.getenv("MONITORING_INTERVAL_SECONDS", "15"))
+# Evidently drift report, 0 disables it
+DETAILED_REPORT_INTERVAL_SECONDS = int(os.getenv("DETAILED_REPORT_INTERVAL_SECONDS", "3600"))
 
 def run_job():
     logging.info("Starting monitoring job")
@@ -16,12 +18,18 @@ def run_job():
     generate_monitoring_metrics(storage)
     logging.info("Monitoring job finished")
 
+def run_detailed_report():
+    logging.info("Starting detailed drift report")
+    generate_detailed_report()
+
 if __name__ == "__main__":
     scheduler = BlockingScheduler()
 
     run_job()
 
     scheduler.add_job(run_job, "interval", seconds=INTERVAL_SECONDS)
+    if DETAILED_REPORT_INTERVAL_SECONDS:
+        scheduler.add_job(run_detailed_report, "interval", seconds=DETAILED_REPORT_INTERVAL_SECONDS)
 
     logging.info(f"Scheduler started (interval={INTERVAL_SECONDS}s)")
     scheduler.start()
\ No newline at end of file
@@ -0,0 +1,88 @@
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict
+
+import numpy as np
+
+from src.monitoring.drift import DriftSketches
+from src.monitoring.feedback_index import FeedbackIndex, NewPredictions
+
+WINDOW_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_window(text: str) -> timedelta:
+    """"90m", "1h", "24h" or "7d" as a timedelta."""
+    match = re.fullmatch(r"(\d+)([mhd])", text.strip())
+    if not match:
+        raise ValueError(f"Invalid monitoring window {text!r}, expected a number followed by m, h or d")
+    return timedelta(**{WINDOW_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def parse_windows(text: str) -> Dict[str, timedelta]:
+    return {name.strip(): parse_window(name) for name in text.split(",") if name.strip()}
+
+
+def window_columns(X: np.ndarray, target: np.ndarray) -> dict:
+    """Windows and first predicted values under the column names of the reference data."""
+    columns = {f"consumption_{i + 1}": X[:, i] for i in range(X.shape[1])}
+    columns["target"] = target
+    return columns
+
+
+@dataclass
+class _CachedWindow:
+    start: int
+    reference: str
+    sketches: DriftSketches
+
+
+class SlidingWindows:
+    """Drift sketches of the predictions of sliding time windows ending now.
+
+    The predictions of each bucket of the index are sketched once and saved.
+    A window is the merge of the buckets from the one containing
+    `now - window` on, read by range scan. It is cached and extended with
+    the new predictions of each run, and rebuilt from the saved buckets
+    only when its first bucket moves forward or the reference changes.
+    """
+
+    def __init__(self, windows: Dict[str, timedelta]):
+        self.windows = windows
+        self._cache: Dict[str, _CachedWindow] = {}
+
+    def start(self, index: FeedbackIndex, name: str, now: datetime) -> int:
+        """First bucket of window `name`, in epoch seconds like the index (naive times read as UTC)."""
+        return int(index.bucket(calendar.timegm((now - self.windows[name]).timetuple())))
+
+    def update(self, index: FeedbackIndex, reference_key: str, reference: DriftSketches, new: NewPredictions, now: datetime) -> Dict[str, DriftSketches]:
+        """Add the new predictions to their buckets, returns the sketches of every window.
+
+        Buckets are saved under `reference_key`, the `ReferenceProfile.key` whose bin edges they share.
+        """
+        buckets = index.bucket(new.timestamps)
+        for bucket in np.unique(buckets):
+            rows = buckets == bucket
+            saved = index.drift_bucket(reference_key, bucket)
+            sketches = DriftSketches.from_bytes(saved) if saved is not None else reference.empty_like()
+            sketches.update(window_columns(new.X[rows], new.target[rows]))
+            index.save_drift_bucket(reference_key, bucket, sketches.to_bytes())
+
+        starts = {name: self.start(index, name, now) for name in self.windows}
+        if starts:
+            index.prune_drift_buckets(reference_key, min(starts.values()))
+
+        for name, start in starts.items():
+            cached = self._cache.get(name)
+            if cached is None or cached.start != start or cached.reference != reference_key:
+                # The saved buckets already hold the new predictions
+                sketches = reference.empty_like()
+                for saved in index.drift_buckets(reference_key, start):
+                    sketches = sketches.merge(DriftSketches.from_bytes(saved))
+                self._cache[name] = _CachedWindow(start, reference_key, sketches)
+            else:
+                rows = buckets >= start
+                if rows.any():
+                    cached.sketches.update(window_columns(new.X[rows], new.target[rows]))
+        return {name: self._cache[name].sketches for name in self.windows}
@@ -1,3 +1,4 @@
+import numpy as np
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
 from edf_forecasting_api.main import app
@@ -10,12 +11,12 @@ def test_contrat_predict():
         "n_predictions": 1
     }
 
-    fake_response = [[75059.3]]
+    fake_response = np.array([[75059.3]], dtype=np.float32)
 
     with patch("edf_forecasting_api.main.model_manager") as mock_model_manager, \
         patch("edf_forecasting_api.main.log_predictions"):
         
-        mock_model_manager.predict.return_value = fake_response
+        mock_model_manager.rollout.return_value = (fake_response, np.ones((1, 1), dtype=bool), "1")
 
         response = client.post("/predict", json=payload)
     
@@ -25,6 +26,28 @@ def test_contrat_predict():
     assert isinstance(body["predictions"], list)
     assert "prediction_id" in body
 
+def test_predict_rejects_negative_horizons():
+    client = TestClient(app)
+
+    with patch("edf_forecasting_api.main.model_manager") as mock_model_manager:
+        negative = client.post("/predict", json={"features": [[1.0]], "n_predictions": -1})
+        negative_row = client.post("/predict", json={"features": [[1.0], [2.0]], "n_predictions": [1, -2]})
+        advance = client.post("/series/advance", json={"observations": {}, "n_predictions": 0})
+
+    assert [negative.status_code, negative_row.status_code, advance.status_code] == [422, 422, 422]
+    mock_model_manager.rollout.assert_not_called()
+
+def test_predict_maps_model_value_errors_to_422():
+    client = TestClient(app)
+
+    with patch("edf_forecasting_api.main.model_manager") as mock_model_manager, \
+        patch("edf_forecasting_api.main.log_predictions"):
+        mock_model_manager.rollout.side_effect = ValueError("Expected 48 features, got 2")
+        response = client.post("/predict", json={"features": [[1.0, 2.0]], "n_predictions": 1})
+
+    assert response.status_code == 422
+    assert "48 features" in response.json()["detail"]
+
 def test_route_feedback():
     client = TestClient(app)
 
@@ -40,3 +63,215 @@ def test_route_feedback():
     assert response.status_code == 200
     body = response.json()
     assert body["message"] == "Feedback saved"
+
+def test_route_feedback_batch():
+    client = TestClient(app)
+
+    payload = {"prediction_ids": ["123abc", "123abc"], "row_indices": [0, 1], "values": [78596.2, 78601.0]}
+
+    with patch("edf_forecasting_api.main.log_feedback_batch") as mock_log:
+        response = client.post("/feedback/batch", json=payload)
+        invalid = client.post("/feedback/batch", json={**payload, "values": [78596.2]})
+
+    assert response.status_code == 200
+    mock_log.assert_called_once_with(payload["prediction_ids"], payload["row_indices"], payload["values"])
+    assert invalid.status_code == 422
+
+def test_health_endpoints():
+    client = TestClient(app)
+
+    assert client.get("/health/live").status_code == 200
+
+    with patch("edf_forecasting_api.main.model_manager") as mock_model_manager:
+        mock_model_manager.ready = False
+        assert client.get("/health/ready").status_code == 503
+
+        mock_model_manager.ready = True
+        mock_model_manager.model_name = "timeseries_xgboost_30min"
+        mock_model_manager.current_version = "3"
+        response = client.get("/health/ready")
+
+    assert response.status_code == 200
+    assert response.json()["model_version"] == "3"
+
+def test_route_model_predict():
+    client = TestClient(app)
+    manager = MagicMock(model_name="tabular_xgboost_30min")
+    manager.rollout.return_value = (np.array([[12.0]], dtype=np.float32), np.ones((1, 1), dtype=bool), "2")
+
+    with patch("edf_forecasting_api.main.model_registry.get", return_value=manager), \
+        patch("edf_forecasting_api.main.log_predictions"):
+        response = client.post("/models/tabular_xgboost_30min/predict", json={"features": [[1.0, 2.0]]})
+
+    assert response.status_code == 200
+    assert response.json()["predictions"] == [[12.0]]
+
+    assert client.post("/models/unknown/predict", json={"features": [[1.0]]}).status_code == 404
+
+def test_route_predict_direct_strategy():
+    client = TestClient(app)
+    manager = MagicMock(model_name="direct_xgboost_30min")
+    manager.rollout.return_value = (np.array([[12.0, 13.0]], dtype=np.float32), np.ones((1, 2), dtype=bool), "1")
+
+    with patch("edf_forecasting_api.main.model_registry.get", return_value=manager) as mock_get, \
+        patch("edf_forecasting_api.main.log_predictions"):
+        response = client.post("/predict?strategy=direct", json={"features": [[1.0, 2.0]], "n_predictions": 2})
+        manager.rollout.side_effect = ValueError("The model forecasts 2 steps ahead")
+        too_far = client.post("/predict?strategy=direct", json={"features": [[1.0, 2.0]], "n_predictions": 3})
+
+    assert response.status_code == 200
+    assert response.json()["predictions"] == [[12.0, 13.0]]
+    mock_get.assert_called_with("direct_xgboost_30min")
+    assert too_far.status_code == 422
+    assert client.post("/predict?strategy=unknown", json={"features": [[1.0]]}).status_code == 422
+
+def test_route_forecast_latest():
+    from datetime import datetime
+    from edf_forecasting_api.forecast_scheduler import Forecast
+
+    client = TestClient(app)
+    forecast = Forecast("national", {1: [61000.0], 48: [61000.0] * 48}, "3", datetime(2025, 1, 1, 12, 30), datetime.now(), "abc")
+
+    with patch("edf_forecasting_api.main.forecast_scheduler") as mock_scheduler:
+        mock_scheduler.latest = None
+        assert client.get("/forecast/latest").status_code == 503
+
+        mock_scheduler.latest = forecast
+        response = client.get("/forecast/latest?horizon=1")
+        missing = client.get("/forecast/latest?horizon=2")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["predictions"] == {"1": [61000.0]}
+    assert body["model_version"] == "3"
+    assert body["data_timestamp"] == "2025-01-01T12:30:00"
+    assert missing.status_code == 404
+
+def test_route_predict_stream():
+    import json
+    from edf_forecasting_api.rollout import iter_autoregressive_rollout
+
+    client = TestClient(app)
+    model = MagicMock(predict=lambda X: X[:, -1] + 1.0)
+
+    with patch("edf_forecasting_api.main.model_manager.stream_rollout") as stream_rollout, \
+        patch("edf_forecasting_api.main.log_predictions") as log:
+        stream_rollout.side_effect = lambda X, h, c: ("1", iter_autoregressive_rollout(model, X, h, c))
+        response = client.post("/predict/stream?chunk_size=2", json={"features": [[1.0, 2.0]], "n_predictions": 3})
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["step"] for line in lines] == [0, 2]
+    assert lines[0]["predictions"] == [[3.0, 4.0]] and lines[1]["predictions"] == [[5.0]]
+    assert log.call_args.args[1] == [[3.0, 4.0]]  # first chunk only
+
+
+def test_route_predict_stream_rejects_invalid_horizons_before_streaming():
+    from edf_forecasting_api.rollout import iter_autoregressive_rollout
+
+    client = TestClient(app)
+    model = MagicMock(predict=lambda X: X[:, -1] + 1.0)
+
+    with patch("edf_forecasting_api.main.model_manager.stream_rollout") as stream_rollout:
+        stream_rollout.side_effect = lambda X, h, c: ("1", iter_autoregressive_rollout(model, X, h, c))
+        ragged = client.post("/predict/stream", json={"features": [[1.0, 2.0], [1.0]], "n_predictions": 3})
+
+    assert ragged.status_code == 422
+
+def test_route_predict_stream_rejects_wrong_width_before_streaming():
+    from edf_forecasting_api.rollout import iter_autoregressive_rollout
+
+    def predict(X):
+        if X.shape[1] != 2:
+            raise ValueError(f"Feature shape mismatch, expected: 2, got {X.shape[1]}")
+        return X[:, -1] + 1.0
+
+    client = TestClient(app)
+    model = MagicMock(predict=predict)
+
+    with patch("edf_forecasting_api.main.model_manager.stream_rollout") as stream_rollout, \
+        patch("edf_forecasting_api.main.log_predictions") as log:
+        stream_rollout.side_effect = lambda X, h, c: ("1", iter_autoregressive_rollout(model, X, h, c))
+        response = client.post("/predict/stream", json={"features": [[1.0]], "n_predictions": 3})
+
+    assert response.status_code == 422
+    assert "shape mismatch" in response.json()["detail"]
+    assert "X-Prediction-Id" not in response.headers
+    log.assert_not_called()
+
+def test_route_bulk_job(tmp_path):
+    import io
+    import time
+    import pandas as pd
+    from edf_forecasting_api import main
+
+    client = TestClient(app)
+    rollout = lambda windows, horizons: (windows[:, -1:] + 1.0, np.ones((len(windows), 1), dtype=bool), "1")
+    body = pd.DataFrame({"Consommation": np.arange(10.0)}).to_csv(index=False).encode()
+
+    with patch.object(main.bulk_jobs, "rollout_fn", rollout), patch.object(main.bulk_jobs, "root", str(tmp_path)):
+        response = client.post("/jobs?layout=series&window_size=4", content=body, headers={"content-type": "text/csv"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        for _ in range(500):
+            if client.get(f"/jobs/{job_id}").json()["status"] == "done":
+                break
+            time.sleep(0.01)
+        result = client.get(f"/jobs/{job_id}/result")
+
+    assert result.status_code == 200
+    assert pd.read_parquet(io.BytesIO(result.content))["row"].tolist() == list(range(7))
+
+def test_interrupted_upload_deletes_the_job(tmp_path):
+    from starlette.requests import ClientDisconnect
+    from edf_forecasting_api import main
+
+    async def disconnected(self):
+        yield b"Consommation\n1.0\n"
+        raise ClientDisconnect()
+
+    client = TestClient(app, raise_server_exceptions=False)
+    jobs = set(main.bulk_jobs._jobs)
+
+    with patch.object(main.bulk_jobs, "root", str(tmp_path)), \
+        patch("starlette.requests.Request.stream", disconnected), \
+        patch.object(main.bulk_jobs, "start") as start:
+        client.post("/jobs?layout=series", content=b"", headers={"content-type": "text/csv"})
+
+    start.assert_not_called()
+    assert set(main.bulk_jobs._jobs) == jobs
+    assert list(tmp_path.iterdir()) == []
+
+def test_route_series_advance():
+    from edf_forecasting_api import main
+    from edf_forecasting_api.series_store import SeriesStore
+
+    client = TestClient(app)
+    rollout = lambda windows, horizons: (windows[:, -1:] + 1.0, np.ones((len(windows), 1), dtype=bool), "1")
+
+    with patch.object(main, "series_store", SeriesStore(window_size=2)), \
+        patch("edf_forecasting_api.main.model_manager.rollout", side_effect=rollout), \
+        patch("edf_forecasting_api.main.log_predictions") as log:
+        assert client.post("/series", json={"series_id": "paris", "history": [1.0]}).status_code == 201
+        assert client.post("/series/paris/predict").status_code == 409
+
+        response = client.post("/series/advance", json={"observations": {"paris": 2.0}})
+        assert response.json()["predictions"] == {"paris": [3.0]}
+        logged = log.call_args.args[1]
+        assert isinstance(logged, list) and logged == [[3.0]]  # ragged outputs, like /predict
+        assert client.post("/series/advance", json={"observations": {"lyon": 2.0}}).status_code == 404
+
+def test_predict_records_stage_metrics():
+    from prometheus_client import REGISTRY
+
+    client = TestClient(app)
+    labels = lambda stage: {"stage": stage, "model_name": "stage_model", "model_version": "9"}
+    before = {stage: REGISTRY.get_sample_value("predict_stage_seconds_count", labels(stage)) or 0 for stage in ("parse", "queue", "predict", "log", "encode")}
+
+    with patch("edf_forecasting_api.main.model_manager") as mock_model_manager, \
+        patch("edf_forecasting_api.main.log_predictions"):
+        mock_model_manager.model_name = "stage_model"
+        mock_model_manager.rollout.return_value = (np.array([[1.0]], dtype=np.float32), np.ones((1, 1), dtype=bool), "9")
+        client.post("/predict", json={"features": [[1.0]], "n_predictions": 1})
+
+    for stage, count in before.items():
+        assert REGISTRY.get_sample_value("predict_stage_seconds_count", labels(stage)) == count + 1
@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from edf_forecasting_api.batching import MicroBatcher
+from edf_forecasting_api.rollout import autoregressive_rollout, to_ragged_list
+
+
+class LastValueModel:
+    def predict(self, X):
+        return X[:, -1] + 1.0
+
+
+def test_concurrent_requests_share_one_rollout():
+    calls = []
+
+    def rollout(windows, horizons, n_requests):
+        calls.append((len(windows), n_requests))
+        predictions, mask = autoregressive_rollout(LastValueModel(), windows, horizons)
+        return predictions, mask, "1"
+
+    async def scenario():
+        batcher = MicroBatcher(rollout, max_batch_size=64, max_wait_ms=50)
+        batcher.start()
+        results = await asyncio.gather(
+            batcher.submit([[1.0, 2.0]], 2),
+            batcher.submit([[10.0, 20.0], [5.0, 6.0]], [1, 3]),
+            batcher.submit([[0.0, 0.0]], 1),
+        )
+        await batcher.stop()
+        return [(to_ragged_list(predictions, mask), version) for predictions, mask, version in results]
+
+    results = asyncio.run(scenario())
+
+    assert calls == [(4, 3)]
+    assert results == [
+        ([[3.0, 4.0]], "1"),
+        ([[21.0], [7.0, 8.0, 9.0]], "1"),
+        ([[1.0]], "1"),
+    ]
+
+
+def test_rollout_error_is_sent_to_every_caller():
+    def rollout(windows, horizons, n_requests):
+        raise RuntimeError("Model not loaded")
+
+    async def scenario():
+        batcher = MicroBatcher(rollout, max_wait_ms=1)
+        batcher.start()
+        results = await asyncio.gather(batcher.submit([[1.0]], 1), batcher.submit([[2.0]], 1), return_exceptions=True)
+        await batcher.stop()
+        return results
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_a_failing_request_does_not_fail_its_batch():
+    def rollout(windows, horizons, n_requests):
+        if (windows == 0).all(axis=1).any():
+            raise ValueError("Empty window")
+        predictions, mask = autoregressive_rollout(LastValueModel(), windows, horizons)
+        return predictions, mask, "1"
+
+    async def scenario():
+        batcher = MicroBatcher(rollout, max_batch_size=64, max_wait_ms=50)
+        batcher.start()
+        with pytest.raises(ValueError):
+            await batcher.submit([[1.0, 2.0]], -1)
+        results = await asyncio.gather(
+            batcher.submit([[1.0, 2.0]], 2),
+            batcher.submit([[0.0, 0.0]], 1),
+            return_exceptions=True,
+        )
+        await batcher.stop()
+        return results
+
+    valid, failed = asyncio.run(scenario())
+
+    assert to_ragged_list(valid[0], valid[1]) == [[3.0, 4.0]]
+    assert isinstance(failed, ValueError)
+
@@ -0,0 +1,102 @@
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from edf_forecasting_api.bulk_jobs import BulkJobManager
+from edf_forecasting_api.rollout import autoregressive_rollout
+
+
+class LastValueModel:
+    def predict(self, X):
+        return X[:, -1] + 1.0
+
+
+def rollout(windows, horizons):
+    predictions, mask = autoregressive_rollout(LastValueModel(), windows, horizons)
+    return predictions, mask, "1"
+
+
+def wait(job, timeout=10):
+    deadline = time.time() + timeout
+    while job.status in ("pending", "running") and time.time() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_series_job_matches_sliding_windows(tmp_path):
+    manager = BulkJobManager(rollout, str(tmp_path), chunk_rows=7, max_workers=2)
+    values = np.arange(50, dtype=np.float32)
+    job = manager.create("csv", "series", n_predictions=2, window_size=4)
+    pd.DataFrame({"Consommation": values}).to_csv(job.input_path, index=False)
+
+    manager.start(job)
+    wait(job)
+
+    result = pq.read_table(job.output_path).to_pandas()
+    assert job.status == "done" and job.rows_done == 47
+    assert result["row"].tolist() == list(range(47))
+    # Window i ends with value i + 3, the model adds one per step
+    assert [list(p) for p in result["predictions"][:2]] == [[4.0, 5.0], [5.0, 6.0]]
+    manager.shutdown()
+
+
+def test_parquet_windows_job(tmp_path):
+    manager = BulkJobManager(rollout, str(tmp_path), chunk_rows=3)
+    windows = np.random.rand(10, 5).astype(np.float32)
+    job = manager.create("parquet", "windows")
+    features = pa.FixedSizeListArray.from_arrays(pa.array(windows.reshape(-1)), 5)
+    pq.write_table(pa.table({"features": features}), job.input_path)
+
+    manager.start(job)
+    wait(job)
+
+    result = pq.read_table(job.output_path)
+    np.testing.assert_allclose(np.array(result["predictions"].to_pylist()).ravel(), windows[:, -1] + 1.0)
+    manager.shutdown()
+
+
+def test_failed_job_reports_error(tmp_path):
+    def broken(windows, horizons):
+        raise ValueError("feature mismatch")
+
+    manager = BulkJobManager(broken, str(tmp_path))
+    job = manager.create("csv", "windows")
+    pd.DataFrame(np.ones((3, 2))).to_csv(job.input_path, index=False)
+
+    manager.start(job)
+    wait(job)
+
+    assert job.status == "failed" and "feature mismatch" in job.error
+    manager.shutdown()
+
+
+def test_series_job_rejects_missing_values(tmp_path):
+    manager = BulkJobManager(rollout, str(tmp_path), chunk_rows=7)
+    values = np.arange(20, dtype=np.float32)
+    values[9] = np.nan
+    job = manager.create("csv", "series", window_size=4)
+    pd.DataFrame({"Consommation": values}).to_csv(job.input_path, index=False)
+
+    manager.start(job)
+    wait(job)
+
+    assert job.status == "failed" and "row 9" in job.error
+    manager.shutdown()
+
+
+def test_finished_jobs_expire(tmp_path):
+    manager = BulkJobManager(rollout, str(tmp_path), ttl_seconds=60)
+    job = manager.create("csv", "windows")
+    pd.DataFrame(np.ones((3, 2))).to_csv(job.input_path, index=False)
+    manager.start(job)
+    wait(job)
+
+    manager.expire()
+    assert manager.get(job.job_id) is job
+
+    job.finished_at = "2000-01-01T00:00:00"
+    manager.expire()
+    assert manager.get(job.job_id) is None
+    assert not (tmp_path / job.job_id).exists()
+    manager.shutdown()
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.monitoring.drift import DriftSketches, HistogramSketch, QuantileSketch
+
+
+def test_merged_histograms_equal_the_histogram_of_the_union():
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=1000), rng.normal(1, 2, size=500)
+    edges = np.linspace(-3, 3, 9)
+
+    left, right, union = HistogramSketch(edges), HistogramSketch(edges), HistogramSketch(edges)
+    left.update(a)
+    right.update(b)
+    union.update(np.concatenate([a, b]))
+
+    np.testing.assert_array_equal(left.merge(right).counts, union.counts)
+
+
+def test_quantile_sketch_distances_are_close_to_exact_ones():
+    rng = np.random.default_rng(0)
+    reference, current = rng.normal(size=20000), rng.normal(0.3, 1.2, size=20000)
+
+    expected, actual = QuantileSketch(256), QuantileSketch(256)
+    expected.update(reference)
+    # Updated batch by batch, then merged with a sketch of the last batch
+    for batch in np.array_split(current[:15000], 30):
+        actual.update(batch)
+    last = QuantileSketch(256)
+    last.update(current[15000:])
+    actual = actual.merge(last)
+
+    assert abs(actual.ks(expected) - stats.ks_2samp(current, reference).statistic) < 0.01
+    assert abs(actual.wasserstein(expected) - stats.wasserstein_distance(current, reference)) < 0.01
+    np.testing.assert_allclose(actual.quantiles([0.1, 0.5, 0.9]), np.quantile(current, [0.1, 0.5, 0.9]), atol=0.02)
+
+
+def test_drift_sketches_compare_and_round_trip():
+    rng = np.random.default_rng(0)
+    reference = DriftSketches.from_reference(pd.DataFrame({
+        "consumption_1": rng.normal(60000, 5000, 5000),
+        "target": rng.normal(60000, 5000, 5000),
+    }))
+
+    current = reference.empty_like()
+    current.update({"consumption_1": rng.normal(60000, 5000, 2000), "target": rng.normal(65000, 5000, 2000), "other": [1.0]})
+    drift = current.compare(reference).set_index("feature")
+
+    assert drift.index.tolist() == ["consumption_1", "target"]
+    assert drift.loc["consumption_1", "psi"] < 0.05 < drift.loc["target", "psi"]
+    assert abs(drift.loc["target", "wasserstein"] - 1.0) < 0.1  # shifted by one standard deviation
+
+    restored = DriftSketches.from_bytes(current.to_bytes())
+    pd.testing.assert_frame_equal(restored.compare(reference), current.compare(reference))
@@ -0,0 +1,165 @@
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+from edf_forecasting_api.log_store import SegmentLogStore
+from src.monitoring.feedback_index import FeedbackIndex, read_new_lines
+
+
+def prediction_record(prediction_id, window_size=4, timestamp=None):
+    return {
+        "timestamp": (timestamp or datetime.now()).isoformat(),
+        "model_name": "timeseries_xgboost_30min",
+        "model_version": "2",
+        "prediction_id": prediction_id,
+        "n_predictions": 2,
+        "inputs": [[1.0] * window_size, [2.0] * window_size],
+        "outputs": [[10.0, 11.0], [20.0, 21.0]],
+    }
+
+
+def feedback_record(prediction_ids, row_indices, values):
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "prediction_ids": prediction_ids,
+        "row_indices": row_indices,
+        "values": values,
+    }
+
+
+def matched(index):
+    """(prediction_id, target, prediction) of every feedback matched to its prediction."""
+    with sqlite3.connect(index.db_path) as conn:
+        df = pd.read_sql_query("SELECT prediction_id, row_index, target, prediction FROM ground_truth", conn)
+    df["prediction_id"] = df["prediction_id"] + "_" + df["row_index"].astype(str)
+    return df.drop(columns=["row_index"]).sort_values("prediction_id")
+
+
+def append(path, records):
+    with open(path, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def test_read_new_lines_skips_partial_line(tmp_path):
+    path = tmp_path / "log.jsonl"
+    path.write_text('{"a": 1}\n{"a": 2')
+
+    records, offset = read_new_lines(str(path), 0)
+    assert records == [{"a": 1}]
+
+    with open(path, "a") as f:
+        f.write("}\n")
+    records, offset = read_new_lines(str(path), offset)
+    assert records == [{"a": 2}]
+    assert offset == path.stat().st_size
+
+
+def test_feedback_matched_incrementally(tmp_path):
+    predictions, feedback = tmp_path / "predictions.jsonl", tmp_path / "ground_truth_compact.jsonl"
+    index = FeedbackIndex(str(tmp_path / "db" / "index.db"))
+
+    append(predictions, [prediction_record("a")])
+    append(feedback, [feedback_record(["a", "b"], [1, 0], [19.0, 9.0])])
+    index.ingest_jsonl(str(predictions), str(feedback))
+
+    rows = matched(index)
+    assert rows["prediction_id"].tolist() == ["a_1"]
+    assert rows[["target", "prediction"]].values.tolist() == [[19.0, 20.0]]
+
+    # Feedback of "b" stays pending until its prediction is logged
+    append(predictions, [prediction_record("b")])
+    index.ingest_jsonl(str(predictions), str(feedback))
+
+    rows = matched(index)
+    assert rows["prediction_id"].tolist() == ["a_1", "b_0"]
+    assert rows["prediction"].tolist() == [20.0, 10.0]
+
+    # Offsets are kept in the database, a new index does not re-read the logs
+    assert len(matched(FeedbackIndex(index.db_path))) == 2
+
+
+def test_feedback_matched_from_segments(tmp_path):
+    store = SegmentLogStore(str(tmp_path / "segments"), window_size=4)
+    store.write("predictions", [prediction_record("a")])
+    store.write("ground_truth_compact", [feedback_record(["a", "a"], [0, 1], [9.5, 19.5])])
+    store.close()
+
+    index = FeedbackIndex(str(tmp_path / "index.db"))
+    index.ingest_segments(str(tmp_path / "segments"))
+    index.ingest_segments(str(tmp_path / "segments"))
+
+    rows = matched(index)
+    assert rows["prediction_id"].tolist() == ["a_0", "a_1"]
+    assert rows[["target", "prediction"]].values.tolist() == [[9.5, 10.0], [19.5, 20.0]]
+
+
+def test_error_metrics_are_running_sums(tmp_path):
+    predictions, feedback = tmp_path / "predictions.jsonl", tmp_path / "ground_truth_compact.jsonl"
+    legacy_feedback = tmp_path / "ground_truth.jsonl"
+    index = FeedbackIndex(str(tmp_path / "index.db"))
+    assert index.error_metrics() == {"mae": None, "rmse": None, "r2": None}
+
+    append(predictions, [prediction_record("a"), prediction_record("b")])
+    append(feedback, [feedback_record(["a"], [0], [12.0])])
+    new = index.ingest_jsonl(str(predictions), str(feedback), str(legacy_feedback))
+    assert new.target.tolist() == [10.0, 20.0, 10.0, 20.0]
+    assert new.X.shape == (4, 4)
+    assert len(new.timestamps) == 4
+    assert index.latest_model() == ("timeseries_xgboost_30min", "2")
+
+    # /feedback records, with their historical "timespamp" key
+    append(legacy_feedback, [{"timespamp": datetime.now().isoformat(), "prediction_id": "b", "inputs": [[1.0]], "outputs": [[9.0], [24.0]]}])
+    # A second feedback of an already matched row is not counted twice
+    append(feedback, [feedback_record(["a"], [0], [100.0])])
+    assert index.ingest_jsonl(str(predictions), str(feedback), str(legacy_feedback)).target.size == 0
+
+    errors = [2.0, -1.0, 4.0]
+    targets = [12.0, 9.0, 24.0]
+    metrics = index.error_metrics()
+    assert metrics["mae"] == pytest.approx(sum(abs(e) for e in errors) / 3)
+    assert metrics["rmse"] == pytest.approx((sum(e * e for e in errors) / 3) ** 0.5)
+    mean = sum(targets) / 3
+    assert metrics["r2"] == pytest.approx(1 - sum(e * e for e in errors) / sum((t - mean) ** 2 for t in targets))
+
+
+def test_error_metrics_over_a_range_of_buckets(tmp_path):
+    predictions, feedback = tmp_path / "predictions.jsonl", tmp_path / "ground_truth_compact.jsonl"
+    index = FeedbackIndex(str(tmp_path / "index.db"), bucket_seconds=3600)
+    old = datetime(2025, 1, 1, 10, 30)
+
+    append(predictions, [prediction_record("old", timestamp=old), prediction_record("new", timestamp=old + timedelta(hours=2))])
+    append(feedback, [feedback_record(["old", "new"], [0, 0], [20.0, 11.0])])
+    new = index.ingest_jsonl(str(predictions), str(feedback))
+
+    assert index.bucket(new.timestamps).tolist() == [1735725600] * 2 + [1735732800] * 2  # 10:00 and 12:00 UTC
+    assert index.error_metrics()["mae"] == 5.5
+    assert index.error_metrics(start=1735729200)["mae"] == 1.0
+    assert index.error_metrics(start=1735736400)["mae"] is None
+
+
+def test_prune_drops_old_rows(tmp_path):
+    predictions, feedback = tmp_path / "predictions.jsonl", tmp_path / "ground_truth_compact.jsonl"
+    index = FeedbackIndex(str(tmp_path / "index.db"), bucket_seconds=3600)
+    now = datetime.now()
+
+    append(predictions, [prediction_record("old", timestamp=now - timedelta(days=10)), prediction_record("new", timestamp=now)])
+    append(feedback, [
+        {**feedback_record(["old"], [0], [11.0]), "timestamp": (now - timedelta(days=10)).isoformat()},
+        feedback_record(["new", "never"], [0, 0], [12.0, 1.0]),
+    ])
+    index.ingest_jsonl(str(predictions), str(feedback))
+    with sqlite3.connect(index.db_path) as conn:
+        conn.execute("INSERT INTO log_offsets VALUES (?, 1)", (str(tmp_path / "deleted_segment.parquet"),))
+
+    index.prune(now - timedelta(days=1))
+
+    assert matched(index)["prediction_id"].tolist() == ["new_0"]
+    assert index.error_metrics()["mae"] == 2.0
+    with sqlite3.connect(index.db_path) as conn:
+        assert conn.execute("SELECT prediction_id FROM predictions").fetchall() == [("new",), ("new",)]
+        assert conn.execute("SELECT COUNT(*) FROM pending_feedback").fetchone() == (1,)  # "never", still recent
+        assert conn.execute("SELECT COUNT(*) FROM log_offsets").fetchone() == (2,)  # predictions and feedback logs
+
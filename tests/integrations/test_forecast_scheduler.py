@@ -0,0 +1,90 @@
+import time
+from datetime import datetime
+
+import numpy as np
+from unittest.mock import MagicMock, patch
+from edf_forecasting_api.forecast_scheduler import ForecastScheduler
+from edf_forecasting_api.series_store import SeriesStore
+
+
+def fake_manager(version="1"):
+    manager = MagicMock(model_name="timeseries_xgboost_30min", ready=True, current_version=version)
+
+    def rollout(windows, horizon):
+        # Last value + 1, + 2, ...
+        predictions = windows[:, -1:] + np.arange(1, horizon + 1, dtype=np.float32)
+        return predictions, np.ones(predictions.shape, dtype=bool), manager.current_version
+
+    manager.rollout.side_effect = rollout
+    return manager
+
+
+def test_forecast_recomputed_only_on_new_data_or_version():
+    store = SeriesStore(window_size=3)
+    manager = fake_manager()
+    scheduler = ForecastScheduler(manager, store, "national", horizons=(1, 4))
+
+    with patch("edf_forecasting_api.forecast_scheduler.log_predictions"):
+        assert scheduler.refresh() is None  # series not registered yet
+
+        store.register("national", [1.0, 2.0, 3.0])
+        observed_at = datetime(2025, 1, 1, 12, 30)
+        scheduler.notify("national", observed_at)
+        forecast = scheduler.refresh()
+
+        assert forecast.predictions == {1: [4.0], 4: [4.0, 5.0, 6.0, 7.0]}
+        assert forecast.model_version == "1"
+        assert forecast.data_timestamp == observed_at
+
+        scheduler.notify("other", datetime.now())
+        assert scheduler.refresh() is forecast
+        assert manager.rollout.call_count == 1
+
+        manager.current_version = "2"
+        assert scheduler.refresh().model_version == "2"
+
+        store.push("national", [10.0])
+        scheduler.notify("national")
+        assert scheduler.latest.predictions[1] == [4.0]  # stale until the next refresh
+        assert scheduler.refresh().predictions[1] == [11.0]
+        assert manager.rollout.call_count == 3
+
+
+def test_same_timestamp_resend_recomputes_and_delete_forgets():
+    store = SeriesStore(window_size=2)
+    manager = fake_manager()
+    scheduler = ForecastScheduler(manager, store, "national", horizons=(1,))
+    observed_at = datetime(2025, 1, 1, 12, 30)
+
+    with patch("edf_forecasting_api.forecast_scheduler.log_predictions"):
+        store.register("national", [1.0, 2.0])
+        scheduler.notify("national", observed_at)
+        assert scheduler.refresh().predictions[1] == [3.0]
+
+        # Corrected value sent again with the same timestamp
+        store.push("national", [5.0])
+        scheduler.notify("national", observed_at)
+        assert scheduler.refresh().predictions[1] == [6.0]
+
+        store.remove("national")
+        scheduler.forget("national")
+        assert scheduler.latest is None
+        assert scheduler.refresh() is None
+
+
+def test_scheduler_thread_computes_on_notify():
+    store = SeriesStore(window_size=2)
+    scheduler = ForecastScheduler(fake_manager(), store, "national", horizons=(2,), check_interval=60)
+
+    with patch("edf_forecasting_api.forecast_scheduler.log_predictions"):
+        scheduler.start()
+        try:
+            store.register("national", [1.0, 2.0])
+            scheduler.notify("national")
+            deadline = time.time() + 5
+            while scheduler.latest is None and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            scheduler.stop()
+
+    assert scheduler.latest.predictions == {2: [3.0, 4.0]}
@@ -0,0 +1,48 @@
+import json
+import threading
+from edf_forecasting_api.logger_utils import BackgroundLogWriter, JsonlLogSink
+
+
+def test_background_writer_flushes_on_stop(tmp_path):
+    path = str(tmp_path / "predictions.jsonl")
+    writer = BackgroundLogWriter(JsonlLogSink({"predictions": path}), batch_size=1000, flush_interval=60)
+    writer.start()
+
+    for i in range(10):
+        writer.submit("predictions", {"prediction_id": str(i)})
+    writer.stop()
+
+    with open(path) as f:
+        records = [json.loads(line) for line in f]
+    assert [r["prediction_id"] for r in records] == [str(i) for i in range(10)]
+
+
+def test_background_writer_counts_dropped_records(tmp_path):
+    path = str(tmp_path / "predictions.jsonl")
+    writer = BackgroundLogWriter(JsonlLogSink({"predictions": path}), max_queue_size=2)
+
+    # Not started, nothing consumes the queue
+    accepted = [writer.submit("predictions", {"i": i}) for i in range(5)]
+
+    assert accepted == [True, True, False, False, False]
+    assert writer.dropped == 3
+
+
+def test_background_writer_keeps_running_when_stop_times_out(tmp_path):
+    path = str(tmp_path / "predictions.jsonl")
+    sink = JsonlLogSink({"predictions": path})
+    release = threading.Event()
+    write = sink.write
+    sink.write = lambda stream, records: (release.wait(5), write(stream, records))
+    writer = BackgroundLogWriter(sink, batch_size=1)
+    writer.start()
+
+    writer.submit("predictions", {"i": 0})
+    writer.stop(timeout=0.05)
+    assert writer.running
+
+    release.set()
+    writer.stop()
+    assert not writer.running
+    with open(path) as f:
+        assert [json.loads(line) for line in f] == [{"i": 0}]
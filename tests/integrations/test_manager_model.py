@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import pytest
 from unittest.mock import MagicMock, patch
@@ -34,7 +35,7 @@ def test_load_model_no_production_version():
 
     with patch("mlflow.tracking.MlflowClient") as MockClient:
         client = MockClient.return_value
-        client.search_model_versions.return_value = []
+        client.get_latest_versions.return_value = []
 
         manager.load_model()
 
@@ -52,7 +53,7 @@ def test_load_model_new_version_detected():
         patch("mlflow.pyfunc.load_model") as mock_load:
 
         client = MockClient.return_value
-        client.search_model_versions.return_value = [fake_version]
+        client.get_latest_versions.return_value = [fake_version]
 
         mock_model = MagicMock()
         mock_load.return_value = mock_model
@@ -61,3 +62,205 @@ def test_load_model_new_version_detected():
     
     assert manager.model is mock_model
     assert manager.current_version == "2"
+
+
+def test_native_model_predicts_like_xgboost(tmp_path):
+    import mlflow
+    from xgboost import XGBRegressor
+    from edf_forecasting_api.model_manager import load_native_model
+
+    X = np.random.rand(50, 4)
+    model = XGBRegressor(n_estimators=5).fit(X, X.sum(axis=1))
+    mlflow.xgboost.save_model(model, str(tmp_path / "model"))
+
+    native = load_native_model(str(tmp_path / "model"))
+
+    np.testing.assert_allclose(native.predict(X), model.predict(X), rtol=1e-5)
+
+
+def test_direct_model_forecasts_all_steps_in_one_call(tmp_path):
+    import mlflow
+    from xgboost import XGBRegressor
+
+    X = np.random.rand(50, 4).astype(np.float32)
+    y = np.stack([X.sum(axis=1) + step for step in range(3)], axis=1)
+    model = XGBRegressor(n_estimators=5, multi_strategy="multi_output_tree", tree_method="hist").fit(X, y)
+    mlflow.xgboost.save_model(model, str(tmp_path / "model"))
+
+    manager = ModelManager("direct_xgboost_30min", serving_mode="native", kind="direct", model_uri=str(tmp_path / "model"))
+    assert manager.load_model()
+
+    predictions, mask, version = manager.rollout(X[:2], [3, 2])
+
+    assert version == "local"
+    np.testing.assert_allclose(predictions[0], model.predict(X[:1])[0], rtol=1e-5)
+    assert mask.tolist() == [[True, True, True], [True, True, False]]
+
+
+def test_load_model_native_falls_back_to_pyfunc():
+    manager = ModelManager(model_name="timeseries_xgboost_30min", serving_mode="native")
+
+    fake_version = MagicMock()
+    fake_version.version = "3"
+    fake_version.current_stage = "Production"
+
+    with patch("mlflow.tracking.MlflowClient") as MockClient, \
+        patch("edf_forecasting_api.model_manager.load_native_model", side_effect=OSError("no xgboost flavor")), \
+        patch("mlflow.pyfunc.load_model") as mock_load:
+
+        MockClient.return_value.get_latest_versions.return_value = [fake_version]
+        mock_load.return_value = MagicMock()
+
+        manager.load_model()
+
+    assert manager.model is mock_load.return_value
+    assert manager.current_version == "3"
+
+
+def test_hot_swap_does_not_interrupt_in_flight_prediction():
+    import threading
+
+    manager = ModelManager(model_name="timeseries_xgboost_30min")
+    started, release = threading.Event(), threading.Event()
+
+    class SlowModel:
+        def predict(self, X):
+            started.set()
+            release.wait(timeout=5)
+            return np.zeros(len(X))
+
+    manager.model, manager.current_version = SlowModel(), "1"
+
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(out=manager.predict_with_version([[1.0, 2.0]], 1)))
+    worker.start()
+    started.wait(timeout=5)
+
+    # The new version is published while the rollout still runs on v1
+    fake_version = MagicMock(version="2", current_stage="Production")
+    with patch("mlflow.tracking.MlflowClient") as MockClient, patch("mlflow.pyfunc.load_model"):
+        MockClient.return_value.get_latest_versions.return_value = [fake_version]
+        manager.load_model()
+    assert manager.current_version == "2"
+
+    release.set()
+    worker.join(timeout=5)
+    assert result["out"] == ([[0.0]], "1")
+
+
+def test_requests_served_counter_per_version():
+    from prometheus_client import REGISTRY
+
+    manager = ModelManager(model_name="counter_test_model")
+    manager.model, manager.current_version = MagicMock(predict=lambda X: np.zeros(len(X))), "7"
+
+    manager.predict([[1.0, 2.0]], 1)
+    manager.predict([[1.0, 2.0]], 2)
+
+    labels = {"model_name": "counter_test_model", "model_version": "7"}
+    assert REGISTRY.get_sample_value("model_requests_served_total", labels) == 2
+
+
+def _fake_download(files):
+    def download(artifact_uri, dst_path):
+        model_dir = os.path.join(dst_path, "model")
+        os.makedirs(model_dir)
+        for name, content in files.items():
+            with open(os.path.join(model_dir, name), "w") as f:
+                f.write(content)
+        return model_dir
+    return download
+
+
+def test_artifact_cache_downloads_once_and_detects_corruption(tmp_path):
+    from edf_forecasting_api.artifact_cache import ArtifactCache
+
+    cache = ArtifactCache(str(tmp_path))
+    with patch("mlflow.artifacts.download_artifacts", side_effect=_fake_download({"model.xgb": "v4"})) as download:
+        path = cache.fetch("m", "4")
+        assert cache.fetch("m", "4") == path
+    assert download.call_count == 1
+    assert cache.latest("m") == ("4", path)
+
+    with open(os.path.join(path, "model.xgb"), "w") as f:
+        f.write("tampered")
+    assert cache.get("m", "4") is None
+    assert not os.path.exists(path)
+
+
+def test_load_model_uses_cache_when_registry_unreachable(tmp_path):
+    from edf_forecasting_api.artifact_cache import ArtifactCache
+
+    cache = ArtifactCache(str(tmp_path))
+    with patch("mlflow.artifacts.download_artifacts", side_effect=_fake_download({"model.xgb": "v5"})):
+        path = cache.fetch("timeseries_xgboost_30min", "5")
+
+    manager = ModelManager(model_name="timeseries_xgboost_30min", artifact_cache=cache)
+    with patch("mlflow.tracking.MlflowClient") as MockClient, patch("mlflow.pyfunc.load_model") as mock_load:
+        MockClient.return_value.get_latest_versions.side_effect = ConnectionError("registry down")
+        assert manager.load_model() is False
+
+    mock_load.assert_called_once_with(path)
+    assert manager.current_version == "5"
+
+
+def test_model_uri_skips_registry():
+    manager = ModelManager(model_name="timeseries_xgboost_30min", model_uri="/models/local")
+
+    with patch("mlflow.tracking.MlflowClient") as MockClient, patch("mlflow.pyfunc.load_model") as mock_load:
+        manager.load_model()
+
+    MockClient.assert_not_called()
+    mock_load.assert_called_once_with("/models/local")
+    assert manager.current_version == "local"
+
+
+def test_watcher_backoff_grows_and_is_capped():
+    manager = ModelManager(model_name="m", check_interval=100, retry_base=1.0, max_backoff=8.0)
+
+    assert 90 <= manager._next_check_delay(0) <= 110
+    assert 0.5 <= manager._next_check_delay(1) <= 1.0
+    assert 4.0 <= manager._next_check_delay(10) <= 8.0
+
+
+def test_warm_up_runs_before_publish():
+    manager = ModelManager(model_name="timeseries_xgboost_30min", warmup_batch_sizes=(1, 16))
+    fake_model = MagicMock(n_features=4)
+    fake_model.predict.side_effect = lambda X: np.zeros(len(X))
+
+    with patch("mlflow.tracking.MlflowClient") as MockClient, patch("mlflow.pyfunc.load_model", return_value=fake_model):
+        MockClient.return_value.get_latest_versions.return_value = [MagicMock(version="2")]
+        manager.load_model()
+
+    batch_shapes = [call.args[0].shape for call in fake_model.predict.call_args_list]
+    assert (1, 4) in batch_shapes and (16, 4) in batch_shapes
+    assert manager.ready
+
+
+def test_failed_warm_up_keeps_previous_version():
+    manager = ModelManager(model_name="timeseries_xgboost_30min", warmup_batch_sizes=(1,))
+    previous = MagicMock(predict=lambda X: np.zeros(len(X)))
+    manager.model, manager.current_version = previous, "1"
+    broken = MagicMock(n_features=4)
+    broken.predict.side_effect = ValueError("feature mismatch")
+
+    with patch("mlflow.tracking.MlflowClient") as MockClient, patch("mlflow.pyfunc.load_model", return_value=broken):
+        MockClient.return_value.get_latest_versions.return_value = [MagicMock(version="2")]
+        manager.load_model()
+
+    assert manager.model is previous
+    assert manager.current_version == "1"
+
+
+def test_rollout_records_step_metrics():
+    from prometheus_client import REGISTRY
+
+    manager = ModelManager(model_name="step_metrics_model")
+    manager.model, manager.current_version = MagicMock(predict=lambda X: np.zeros(len(X))), "1"
+
+    manager.predict([[1.0, 2.0], [3.0, 4.0]], 3)
+
+    labels = {"model_name": "step_metrics_model", "model_version": "1"}
+    assert REGISTRY.get_sample_value("rollout_step_seconds_count", labels) == 3
+    assert REGISTRY.get_sample_value("rollout_steps_sum", labels) == 3
+    assert REGISTRY.get_sample_value("rollout_batch_size_sum", labels) == 2
@@ -0,0 +1,217 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from unittest.mock import MagicMock
+from src.monitoring import ml_monitoring
+from src.monitoring.feedback_index import FeedbackIndex, NewPredictions
+from src.monitoring.windows import SlidingWindows, parse_windows
+
+
+def write_logs(log_dir, prediction_ids, timestamp=None):
+    timestamp = (timestamp or datetime.now()).isoformat()
+    with open(log_dir / "predictions.jsonl", "a") as f:
+        for prediction_id in prediction_ids:
+            f.write(json.dumps({
+                "timestamp": timestamp,
+                "model_name": "timeseries_xgboost_30min",
+                "model_version": "3",
+                "prediction_id": prediction_id,
+                "inputs": [[60000.0] * 4],
+                "outputs": [[60000.0 + len(prediction_id)]],
+            }) + "\n")
+    with open(log_dir / "ground_truth_compact.jsonl", "a") as f:
+        f.write(json.dumps({
+            "timestamp": timestamp,
+            "prediction_ids": prediction_ids,
+            "row_indices": [0] * len(prediction_ids),
+            "values": [60010.0] * len(prediction_ids),
+        }) + "\n")
+
+
+def write_reference(reference, version, seed=0):
+    (reference / version).mkdir(parents=True)
+    pd.DataFrame({"target": np.random.default_rng(seed).normal(60000, 5000, 500)}).to_csv(reference / version / reference.name, index=False)
+
+
+def configure(monkeypatch, tmp_path):
+    """Monitoring reading tmp_path/logs, with the reference CSV under tmp_path, returns the logs directory."""
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    monkeypatch.setattr(ml_monitoring, "LOG_BACKEND", "jsonl")
+    monkeypatch.setattr(ml_monitoring, "PREDICTION_LOG", str(log_dir / "predictions.jsonl"))
+    monkeypatch.setattr(ml_monitoring, "FEEDBACK_LOG", str(log_dir / "ground_truth.jsonl"))
+    monkeypatch.setattr(ml_monitoring, "COMPACT_FEEDBACK_LOG", str(log_dir / "ground_truth_compact.jsonl"))
+    monkeypatch.setattr(ml_monitoring, "FEEDBACK_INDEX_DB", str(tmp_path / "db" / "index.db"))
+    monkeypatch.setattr(ml_monitoring, "REFERENCE_DRIFT", str(tmp_path / "reference_data_drift.csv"))
+    monkeypatch.setattr(ml_monitoring, "REFERENCE_PROFILE", str(tmp_path / "reference_profile.npz"))
+    monkeypatch.setattr(ml_monitoring, "sliding_windows", SlidingWindows(parse_windows("1h,24h,7d")))
+    return log_dir
+
+
+def feature_drift(storage, window):
+    """Per-feature drift stored for `window`, by run."""
+    return [call.args[2].set_index("feature") for call in storage.store_feature_drift.call_args_list if call.args[1] == window]
+
+
+def test_monitoring_runs_only_process_new_records(tmp_path, monkeypatch):
+    log_dir = configure(monkeypatch, tmp_path)
+    write_reference(tmp_path / "reference_data_drift.csv", "v1")
+    storage = MagicMock()
+
+    write_logs(log_dir, ["a", "bb"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+    write_logs(log_dir, ["ccc"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+    ml_monitoring.generate_monitoring_metrics(storage)
+
+    runs = [call.args[0] for call in storage.store_metrics.call_args_list]
+
+    assert [metrics["model_version"] for metrics in runs] == ["3", "3", "3"]
+    assert runs[0]["mae"] == 8.5  # |10 - 1| and |10 - 2|
+    assert runs[1]["mae"] == 8.0  # running sums include the third prediction
+    assert runs[2]["mae"] == 8.0
+    assert runs[0]["drift_score"] is not None
+    assert runs[2]["drift_score"] == runs[1]["drift_score"]  # no new window, same sketches
+    assert [drift.loc["target", "n"] for drift in feature_drift(storage, "24h")] == [2, 3, 3]
+
+
+def test_drift_sketches_restart_with_a_new_reference(tmp_path, monkeypatch):
+    log_dir = configure(monkeypatch, tmp_path)
+    reference = tmp_path / "reference_data_drift.csv"
+    write_reference(reference, "v1")
+    storage = MagicMock()
+
+    write_logs(log_dir, ["a", "bb"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+    write_reference(reference, "v2", seed=1)
+    write_logs(log_dir, ["ccc"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+
+    assert [drift.loc["target", "n"] for drift in feature_drift(storage, "1h")] == [2, 1]
+
+
+def test_metrics_are_computed_over_sliding_windows(tmp_path, monkeypatch):
+    log_dir = configure(monkeypatch, tmp_path)
+    write_reference(tmp_path / "reference_data_drift.csv", "v1")
+    storage = MagicMock()
+
+    write_logs(log_dir, ["a"], timestamp=datetime.now() - timedelta(days=2))
+    write_logs(log_dir, ["bb"], timestamp=datetime.now() - timedelta(days=30))
+    ml_monitoring.generate_monitoring_metrics(storage)
+    write_logs(log_dir, ["cccc"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+
+    runs = [call.args[2] for call in storage.store_window_metrics.call_args_list]
+    assert runs[0]["1h"] == {"drift_score": None, "mae": None, "rmse": None, "r2": None}
+    assert runs[0]["7d"]["mae"] == 9.0
+    assert runs[1]["1h"]["mae"] == 6.0
+    assert runs[1]["7d"]["mae"] == 7.5
+    assert storage.store_metrics.call_args.args[0]["mae"] == 6.0  # MONITORING_STATUS_WINDOW, 24h
+
+    # Extended in memory by the second run, same as rebuilt from the saved buckets
+    assert [drift.loc["target", "n"] for drift in feature_drift(storage, "7d")] == [1, 2]
+    index = FeedbackIndex(str(tmp_path / "db" / "index.db"))
+    profile = ml_monitoring.load_reference_profile()
+    nothing_new = NewPredictions(np.empty(0, dtype=np.int64), np.empty((0, 4)), np.empty(0))
+    cached = ml_monitoring.sliding_windows.update(index, profile.key, profile.sketches, nothing_new, datetime.now())["7d"]
+    rebuilt = SlidingWindows(parse_windows("7d")).update(index, profile.key, profile.sketches, nothing_new, datetime.now())["7d"]
+    np.testing.assert_array_equal(cached.histograms["target"].counts, rebuilt.histograms["target"].counts)
+    assert sorted(cached.quantiles["target"].means) == sorted(rebuilt.quantiles["target"].means)
+
+
+def test_drift_of_a_few_predictions_does_not_change_the_status(tmp_path, monkeypatch):
+    log_dir = configure(monkeypatch, tmp_path)
+    write_reference(tmp_path / "reference_data_drift.csv", "v1")
+    storage = MagicMock()
+
+    # Every prediction at the reference mean: about 0.8 std from the whole reference distribution
+    write_logs(log_dir, ["a", "bb"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+    monkeypatch.setattr(ml_monitoring, "DRIFT_MIN_SAMPLES", 1)
+    ml_monitoring.generate_monitoring_metrics(storage)
+
+    runs = [call.args[0] for call in storage.store_metrics.call_args_list]
+    assert runs[0]["drift_score"] > ml_monitoring.DRIFT_CRITICAL_THRESHOLD
+    assert [metrics["status"] for metrics in runs] == ["OK", "DEGRADED"]
+
+
+def test_flatten_predictions_matches_row_by_row_layout():
+    df = pd.DataFrame({
+        "prediction_id": ["a", "b", "c"],
+        "inputs": [[[1.0, 2.0], [3.0, 4.0]], None, [[5.0, 6.0, 7.0]]],
+        "outputs": [[[10.0, 11.0]], [[1.0]], [[20.0]]],
+    })
+
+    flat = ml_monitoring.flatten_predictions(df)
+
+    assert flat["prediction_id"].tolist() == ["a_0", "c_0"]
+    assert flat["target"].tolist() == [10.0, 20.0]
+    X = flat[["consumption_1", "consumption_2", "consumption_3"]].to_numpy()
+    assert X.dtype == np.float32
+    np.testing.assert_array_equal(X, [[1.0, 2.0, np.nan], [5.0, 6.0, 7.0]])
+
+
+def test_flatten_predictions_skips_scalar_inputs():
+    df = pd.DataFrame({
+        "prediction_id": ["a", "b"],
+        "inputs": [[5.0, [1.0, 2.0], 6.0], [[3.0, 4.0]]],
+        "outputs": [[7.0, 10.0, 8.0], [[20.0]]],
+    })
+
+    flat = ml_monitoring.flatten_predictions(df)
+
+    assert flat["prediction_id"].tolist() == ["a_1", "b_0"]
+    assert flat["target"].tolist() == [10.0, 20.0]
+    np.testing.assert_array_equal(flat[["consumption_1", "consumption_2"]].to_numpy(), [[1.0, 2.0], [3.0, 4.0]])
+
+
+def test_monitoring_reads_the_reference_profile_instead_of_the_csv(tmp_path, monkeypatch):
+    from edf_forecasting.pipelines.create_reference_data.nodes import create_reference_profile
+
+    log_dir = configure(monkeypatch, tmp_path)
+    ref_drift = pd.DataFrame({"target": np.random.default_rng(0).normal(60000, 5000, 500)})
+    ref_perf = ref_drift.assign(prediction=ref_drift["target"] + 1.0)
+    profile = tmp_path / "reference_profile.npz"
+    (profile / "v1").mkdir(parents=True)
+    (profile / "v1" / profile.name).write_bytes(create_reference_profile(ref_drift, ref_perf, {}))
+
+    monkeypatch.setattr(ml_monitoring, "REFERENCE_PROFILE", str(profile))
+    monkeypatch.setattr(ml_monitoring, "RMSE_BASELINE_RATIO", 2.0)
+    monkeypatch.setattr(ml_monitoring, "DRIFT_CRITICAL_THRESHOLD", 10.0)
+    storage = MagicMock()
+
+    write_logs(log_dir, ["a", "bb"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+
+    metrics = storage.store_metrics.call_args.args[0]
+    assert metrics["drift_score"] is not None
+    assert metrics["status"] == "WARNING"  # RMSE about 8.5, baseline 1.0
+
+
+def test_drift_buckets_restart_when_the_profile_is_rewritten_in_place(tmp_path, monkeypatch):
+    from edf_forecasting.pipelines.create_reference_data.nodes import create_reference_profile
+
+    log_dir = configure(monkeypatch, tmp_path)
+    profile = tmp_path / "reference_profile.npz" / "v1" / "reference_profile.npz"
+    profile.parent.mkdir(parents=True)
+    storage = MagicMock()
+
+    def write_profile(seed):
+        ref_drift = pd.DataFrame({"target": np.random.default_rng(seed).normal(60000 + seed * 1000, 5000, 500)})
+        profile.write_bytes(create_reference_profile(ref_drift, ref_drift.assign(prediction=ref_drift["target"]), {}))
+
+    write_profile(0)
+    write_logs(log_dir, ["a", "bb"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+
+    # Same version, new bin edges
+    write_profile(1)
+    stat = profile.stat()
+    os.utime(profile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    write_logs(log_dir, ["ccc"])
+    ml_monitoring.generate_monitoring_metrics(storage)
+
+    assert [drift.loc["target", "n"] for drift in feature_drift(storage, "1h")] == [2, 1]
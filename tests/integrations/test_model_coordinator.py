@@ -0,0 +1,51 @@
+import os
+import time
+from unittest.mock import MagicMock, patch
+from edf_forecasting_api.model_coordinator import ModelCoordinator
+from edf_forecasting_api.model_manager import ModelManager
+from edf_forecasting_api.shared_model import manifest_path, read_manifest, write_manifest
+
+
+def fake_download(artifact_uri, dst_path):
+    model_dir = os.path.join(dst_path, "model")
+    os.makedirs(model_dir)
+    with open(os.path.join(model_dir, "model.xgb"), "w") as f:
+        f.write(artifact_uri)
+    return model_dir
+
+
+def test_coordinator_publishes_new_versions(tmp_path):
+    coordinator = ModelCoordinator(str(tmp_path), swap_delay=0)
+    manager = coordinator.add("m")
+
+    with patch("mlflow.tracking.MlflowClient") as MockClient, \
+        patch("mlflow.artifacts.download_artifacts", side_effect=fake_download), \
+        patch("mlflow.pyfunc.load_model"):
+        for version in ("1", "2", "3"):
+            MockClient.return_value.get_latest_versions.return_value = [MagicMock(version=version)]
+            manager.load_model()
+
+    manifest = read_manifest(manifest_path(str(tmp_path), "m"))
+    assert manifest["version"] == "3"
+    assert manifest["path"] == coordinator.artifact_cache.get("m", "3")
+    # The previous version stays for workers still loading it
+    assert coordinator.artifact_cache.get("m", "2") is not None
+    assert coordinator.artifact_cache.get("m", "1") is None
+
+
+def test_worker_follows_manifest_and_swaps_at_activation(tmp_path):
+    manifest = manifest_path(str(tmp_path), "m")
+    worker = ModelManager("m", shared_manifest=manifest)
+
+    worker.load_model()
+    assert worker.model is None
+
+    write_manifest(manifest, "4", "/shared/m/4", swap_delay=0.3)
+    with patch("mlflow.tracking.MlflowClient") as MockClient, patch("mlflow.pyfunc.load_model") as mock_load:
+        start = time.time()
+        worker.load_model()
+
+    MockClient.assert_not_called()
+    mock_load.assert_called_once_with("/shared/m/4")
+    assert time.time() - start >= 0.25
+    assert worker.current_version == "4" and worker.ready
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from edf_forecasting_api.model_manager import ModelManager
+from edf_forecasting_api.model_registry import ModelNotAvailable, ModelRegistry, UnknownModel
+
+
+class FakeManager:
+    def __init__(self, name, n_bytes=100, loadable=True):
+        self.model_name = name
+        self.memory_bytes = n_bytes
+        self.loadable = loadable
+        self.ready = False
+        self.loads = 0
+        self.watching = False
+
+    def load_model(self):
+        self.loads += 1
+        self.ready = self.loadable
+
+    def start_watcher(self):
+        self.watching = True
+
+    def stop_watcher(self):
+        self.watching = False
+
+
+def test_models_are_loaded_lazily_once():
+    registry = ModelRegistry(FakeManager, names=["a", "b"])
+
+    assert registry.loaded() == {}
+    manager = registry.get("a")
+
+    assert registry.get("a") is manager
+    assert manager.loads == 1 and manager.watching
+    assert list(registry.loaded()) == ["a"]
+
+
+def test_unknown_and_unavailable_models():
+    registry = ModelRegistry(lambda name: FakeManager(name, loadable=False), names=["a"])
+
+    with pytest.raises(UnknownModel):
+        registry.get("missing")
+    with pytest.raises(ModelNotAvailable):
+        registry.get("a")
+    assert registry.loaded() == {}
+
+
+def test_least_recently_used_model_is_evicted_over_budget():
+    registry = ModelRegistry(FakeManager, names=["a", "b", "c"], memory_budget_bytes=350)
+    pinned = FakeManager("main")
+    pinned.ready = True
+    registry.add(pinned, pinned=True)
+
+    a = registry.get("a")
+    registry.get("b")
+    registry.get("c")
+
+    assert set(registry.loaded()) == {"main", "b", "c"}
+    assert not a.watching
+
+
+def test_tabular_manager_predicts_once_per_row():
+    manager = ModelManager(model_name="tabular_xgboost_30min", kind="tabular")
+    manager.model, manager.current_version = type("M", (), {"predict": lambda self, X: X.sum(axis=1)})(), "1"
+
+    predictions, mask, _ = manager.rollout([[1.0, 2.0], [3.0, 4.0]], 1)
+
+    np.testing.assert_allclose(predictions, [[3.0], [7.0]])
+    assert mask.all()
+    with pytest.raises(ValueError):
+        manager.rollout([[1.0, 2.0]], 3)
@@ -0,0 +1,90 @@
+import numpy as np
+import pyarrow as pa
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from edf_forecasting_api.main import app
+from edf_forecasting_api.payload_formats import (
+    ARROW_STREAM,
+    FLOAT32,
+    SHAPE_HEADER,
+    decode_windows,
+    encode_predictions,
+    negotiate_response,
+)
+
+
+def arrow_body(windows, n_predictions=None):
+    columns = {"features": pa.FixedSizeListArray.from_arrays(pa.array(windows.reshape(-1)), windows.shape[1])}
+    if n_predictions is not None:
+        columns["n_predictions"] = pa.array(n_predictions)
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_decode_float32_is_zero_copy():
+    windows = np.arange(6, dtype="<f4").reshape(2, 3)
+    body = SHAPE_HEADER.pack(2, 3) + windows.tobytes()
+
+    decoded, horizons = decode_windows(FLOAT32, body, 4)
+
+    np.testing.assert_array_equal(decoded, windows)
+    assert decoded.base is not None and not decoded.flags.owndata
+    assert horizons.tolist() == 4
+
+
+def test_decode_arrow_with_per_row_horizons():
+    windows = np.arange(8, dtype=np.float32).reshape(2, 4)
+
+    decoded, horizons = decode_windows(ARROW_STREAM, arrow_body(windows, [1, 3]))
+
+    np.testing.assert_array_equal(decoded, windows)
+    assert horizons.tolist() == [1, 3]
+
+
+def test_encode_arrow_keeps_ragged_rows():
+    predictions = np.array([[1.0, np.nan], [2.0, 3.0]], dtype=np.float32)
+    mask = ~np.isnan(predictions)
+
+    table = pa.ipc.open_stream(encode_predictions(ARROW_STREAM, predictions, mask)).read_all()
+
+    assert table["predictions"].to_pylist() == [[1.0], [2.0, 3.0]]
+
+
+def test_negotiate_response_defaults_to_json():
+    assert negotiate_response(None) == "application/json"
+    assert negotiate_response("text/html, */*") == "application/json"
+    assert negotiate_response(f"{FLOAT32};q=0.9") == FLOAT32
+
+
+def test_predict_binary_round_trip():
+    client = TestClient(app)
+    windows = np.ones((3, 48), dtype="<f4")
+    predictions = np.full((3, 2), 5.0, dtype=np.float32)
+
+    with patch("edf_forecasting_api.main.model_manager") as mock_model_manager, \
+        patch("edf_forecasting_api.main.log_predictions"):
+
+        mock_model_manager.rollout.return_value = (predictions, np.ones((3, 2), dtype=bool), "4")
+
+        response = client.post(
+            "/predict?n_predictions=2",
+            content=SHAPE_HEADER.pack(3, 48) + windows.tobytes(),
+            headers={"Content-Type": FLOAT32, "Accept": FLOAT32},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["X-Model-Version"] == "4"
+    rows, cols = SHAPE_HEADER.unpack_from(response.content)
+    decoded = np.frombuffer(response.content, dtype="<f4", offset=SHAPE_HEADER.size).reshape(rows, cols)
+    np.testing.assert_array_equal(decoded, predictions)
+
+
+def test_predict_unsupported_content_type():
+    client = TestClient(app)
+
+    response = client.post("/predict", content=b"a,b", headers={"Content-Type": "text/csv"})
+
+    assert response.status_code == 415
@@ -0,0 +1,47 @@
+import numpy as np
+from edf_forecasting_api.model_manager import ModelManager
+from edf_forecasting_api.prediction_cache import PredictionCache, ENTRY_OVERHEAD
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = 0
+
+    def predict(self, X):
+        self.rows += len(X)
+        return X[:, -1] + 1.0
+
+
+def test_mixed_batch_only_rolls_out_misses():
+    manager = ModelManager(model_name="timeseries_xgboost_30min", cache_max_bytes=1_000_000)
+    model = CountingModel()
+    manager.model, manager.current_version = model, "1"
+
+    first = manager.predict([[1.0, 2.0]], 3)
+    model.rows = 0
+    second = manager.predict([[1.0, 2.0], [5.0, 6.0]], [3, 2])
+
+    assert second == [first[0], [7.0, 8.0]]
+    assert model.rows == 2  # one miss, rolled out for two steps
+
+
+def test_cache_is_invalidated_on_model_swap():
+    manager = ModelManager(model_name="timeseries_xgboost_30min", cache_max_bytes=1_000_000)
+    manager.model, manager.current_version = CountingModel(), "1"
+    manager.predict([[1.0, 2.0]], 1)
+    assert len(manager.cache) == 1
+
+    manager.current_version = "2"
+
+    assert len(manager.cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = PredictionCache(max_bytes=2 * (4 + ENTRY_OVERHEAD))
+    keys = PredictionCache.keys(np.eye(3, dtype=np.float32), np.ones(3, dtype=int), version=None)
+
+    cache.put_many(keys[:2], [np.ones(1)] * 2)
+    cache.get_many([keys[0]])
+    cache.put_many(keys[2:], [np.ones(1)])
+
+    assert [value is not None for value in cache.get_many(keys)] == [True, False, True]
@@ -0,0 +1,71 @@
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from edf_forecasting.pipelines.create_reference_data.nodes import REFERENCE_PROFILE_FORMAT, create_reference_profile
+from src.monitoring.reference_profile import PROFILE_FORMAT, ReferenceProfile, ReferenceProfileCache
+
+
+def reference_frames(seed=0):
+    rng = np.random.default_rng(seed)
+    ref_drift = pd.DataFrame({"consumption_1": rng.normal(60000, 5000, 2000), "target": rng.normal(60000, 5000, 2000)})
+    ref_perf = ref_drift.copy()
+    ref_perf["prediction"] = ref_perf["target"] + rng.normal(0, 300, 2000)
+    return ref_drift, ref_perf
+
+
+def test_pipeline_profile_matches_the_csv_profile():
+    ref_drift, ref_perf = reference_frames()
+    params = {"profile_bins": 10, "profile_quantiles": 256}
+
+    profile = ReferenceProfile.from_bytes(create_reference_profile(ref_drift, ref_perf, params))
+    from_csv = ReferenceProfile.from_dataframe(ref_drift)
+
+    for feature in ["consumption_1", "target"]:
+        np.testing.assert_allclose(profile.sketches.histograms[feature].edges, from_csv.sketches.histograms[feature].edges)
+        np.testing.assert_allclose(profile.sketches.histograms[feature].counts, from_csv.sketches.histograms[feature].counts)
+    pd.testing.assert_frame_equal(profile.moments, from_csv.moments, check_dtype=False)
+    assert abs(profile.errors["rmse"] - 300) < 20
+    assert profile.errors["abs_error_q50"] < profile.errors["abs_error_q99"]
+    assert from_csv.errors == {}
+
+    # Same reference, same drift
+    current = profile.sketches.empty_like()
+    current.update({"target": ref_drift["target"].to_numpy()[:500]})
+    assert current.compare(profile.sketches)["psi"].iloc[0] < 0.05
+
+
+def test_pipeline_profile_has_the_layout_of_the_monitoring_sketches():
+    ref_drift, ref_perf = reference_frames()
+    ref_drift.iloc[::7, 0] = np.nan
+    written = create_reference_profile(ref_drift, ref_perf, {"profile_bins": 8, "profile_quantiles": 64})
+    from_csv = ReferenceProfile.from_dataframe(ref_drift, n_bins=8, capacity=64)
+
+    assert REFERENCE_PROFILE_FORMAT == PROFILE_FORMAT
+    arrays = np.load(io.BytesIO(written))
+    sketches = np.load(io.BytesIO(from_csv.sketches.to_bytes()))
+    for name in sketches.files:
+        np.testing.assert_allclose(arrays[name], sketches[name], err_msg=name)
+
+    profile = ReferenceProfile.from_bytes(written)
+    assert profile.sketches.features == from_csv.sketches.features
+    pd.testing.assert_frame_equal(profile.moments, from_csv.moments, check_dtype=False)
+
+
+def test_profile_cache_reloads_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "reference_profile.npz"
+    path.write_bytes(create_reference_profile(*reference_frames(0), {}))
+    cache = ReferenceProfileCache()
+
+    first = cache.get(str(path))
+    assert cache.get(str(path)) is first
+
+    path.write_bytes(create_reference_profile(*reference_frames(1), {}))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = cache.get(str(path))
+    assert second is not first
+    assert second.errors["rmse"] != first.errors["rmse"]
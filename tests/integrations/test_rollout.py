@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+from edf_forecasting_api.rollout import RolloutStream, autoregressive_rollout, direct_forecast, iter_autoregressive_rollout, to_ragged_list
+
+
+class LastValueModel:
+    """Predicts the last value of each window plus one."""
+
+    def predict(self, X):
+        return X[:, -1] + 1.0
+
+
+def naive_rollout(model, X, n_predictions):
+    X = np.array(X, dtype=np.float32)
+    predictions = []
+    for _ in range(n_predictions):
+        y_pred = np.array(model.predict(X)).reshape(-1, 1)
+        predictions.append(y_pred)
+        X = np.hstack([X[:, 1:], y_pred])
+    return np.concatenate(predictions, axis=1)
+
+
+def test_rollout_matches_hstack_loop():
+    model = type("MeanModel", (), {"predict": lambda self, X: X.mean(axis=1)})()
+    X = np.random.rand(5, 8) * 100
+
+    predictions, mask = autoregressive_rollout(model, X, 6)
+
+    assert mask.all()
+    np.testing.assert_allclose(predictions, naive_rollout(model, X, 6), rtol=1e-5)
+
+
+def test_rollout_mixed_horizons_are_masked():
+    X = [[1.0, 2.0], [10.0, 20.0], [5.0, 6.0]]
+
+    predictions, mask = autoregressive_rollout(LastValueModel(), X, [1, 3, 2])
+
+    assert predictions.shape == (3, 3)
+    assert mask.tolist() == [[True, False, False], [True, True, True], [True, True, False]]
+    assert to_ragged_list(predictions, mask) == [[3.0], [21.0, 22.0, 23.0], [7.0, 8.0]]
+
+
+def test_direct_forecast_single_call_and_masked():
+    class StepsModel:
+        """Predicts last value + 1, + 2, ... + 4 in one call."""
+        calls = 0
+
+        def predict(self, X):
+            self.calls += 1
+            return X[:, -1:] + np.arange(1, 5, dtype=np.float32)
+
+    model = StepsModel()
+    predictions, mask = direct_forecast(model, [[1.0, 2.0], [5.0, 10.0]], [1, 3])
+
+    assert model.calls == 1
+    assert to_ragged_list(predictions, mask) == [[3.0], [11.0, 12.0, 13.0]]
+
+    with pytest.raises(ValueError):
+        direct_forecast(model, [[1.0, 2.0]], 5)
+
+
+def test_rollout_rejects_non_2d_windows():
+    with pytest.raises(ValueError):
+        autoregressive_rollout(LastValueModel(), [1.0, 2.0], 1)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 4, 50])
+def test_streamed_rollout_matches_full_rollout(chunk_size):
+    model = type("MeanModel", (), {"predict": lambda self, X: X.mean(axis=1)})()
+    X = np.random.rand(4, 8) * 100
+    horizons = [7, 2, 10, 0]
+
+    chunks = list(iter_autoregressive_rollout(model, X, horizons, chunk_size))
+    predictions, mask = autoregressive_rollout(model, X, horizons)
+
+    assert [step for step, _, _ in chunks] == list(range(0, 10, chunk_size))
+    np.testing.assert_allclose(np.hstack([c[1] for c in chunks]), predictions, rtol=1e-5)
+    assert (np.hstack([c[2] for c in chunks]) == mask).all()
+
+
+def test_streamed_rollout_checks_inputs_eagerly():
+    with pytest.raises(ValueError):
+        iter_autoregressive_rollout(LastValueModel(), [[1.0, 2.0]], -1)
+    with pytest.raises(ValueError):
+        iter_autoregressive_rollout(LastValueModel(), [1.0, 2.0], 1)
+
+
+def test_rollout_stream_closed_while_a_chunk_is_computed():
+    import threading
+
+    started, release = threading.Event(), threading.Event()
+
+    class SlowModel:
+        def predict(self, X):
+            started.set()
+            release.wait(5)
+            return X[:, -1]
+
+    stream = RolloutStream(iter_autoregressive_rollout(SlowModel(), [[1.0, 2.0]], 10, chunk_size=1))
+    chunks = []
+    worker = threading.Thread(target=lambda: chunks.append(stream.next_chunk()))
+    worker.start()
+    started.wait(5)
+    stream.close()  # would raise "generator already executing" on the bare generator
+    release.set()
+    worker.join(5)
+
+    assert chunks[0][0] == 0
+    assert stream.next_chunk() is None
+
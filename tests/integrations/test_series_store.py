@@ -0,0 +1,54 @@
+import pytest
+from edf_forecasting_api.series_store import SeriesStore
+
+
+def test_ring_buffer_keeps_latest_window_in_order():
+    store = SeriesStore(window_size=4)
+    store.register("a", history=[1.0, 2.0, 3.0])
+
+    assert store.windows()[0] == []
+    store.push("a", [4.0, 5.0, 6.0])
+
+    series_ids, windows = store.windows()
+    assert series_ids == ["a"]
+    assert windows.tolist() == [[3.0, 4.0, 5.0, 6.0]]
+
+
+def test_push_many_advances_every_series():
+    store = SeriesStore(window_size=3, initial_capacity=2)
+    for i, series_id in enumerate(["a", "b", "c"]):  # grows past the initial capacity
+        store.register(series_id, history=[i, i, i])
+
+    store.push_many({"a": 10.0, "c": 30.0})
+
+    series_ids, windows = store.windows()
+    assert series_ids == ["a", "b", "c"]
+    assert windows.tolist() == [[0.0, 0.0, 10.0], [1.0, 1.0, 1.0], [2.0, 2.0, 30.0]]
+
+
+def test_removed_slot_is_reused_and_reset():
+    store = SeriesStore(window_size=2, max_series=2)
+    store.register("a", history=[1.0, 2.0])
+    store.register("b", history=[3.0, 4.0])
+
+    with pytest.raises(OverflowError):
+        store.register("c")
+    store.remove("a")
+    store.register("c", history=[5.0])
+
+    assert store.windows(["c", "b"])[0] == ["b"]
+    with pytest.raises(KeyError):
+        store.push("a", [1.0])
+
+
+def test_revision_changes_with_the_series():
+    store = SeriesStore(window_size=2)
+    store.register("a", history=[1.0, 2.0])
+    store.register("b")
+    revision = store.revision("a")
+
+    store.push("b", [1.0])
+    assert store.revision("a") == revision
+    store.push_many({"a": 3.0})
+    assert store.revision("a") > revision
+    assert store.revision("c") is None
@@ -1,7 +1,9 @@
 from edf_forecasting.pipelines.create_reference_data.nodes import (
     create_reference_data,
-    add_predictions_to_reference
+    add_predictions_to_reference,
+    create_reference_profile
 )
+import io
 import pandas as pd
 import numpy as np
 import pytest
@@ -67,4 +69,19 @@ def test_add_predictions_to_reference():
 
     assert "prediction" in out.columns
     assert out["prediction"].iloc[0] == 42.0
-    model.predict.assert_called()
\ No newline at end of file
+    model.predict.assert_called()
+
+def test_create_reference_profile():
+    ref_drift = create_reference_data(pd.DataFrame({"consumption": np.arange(1000.0)}), target_col="consumption", window_size=5)
+    ref_perf = ref_drift.copy()
+    ref_perf["prediction"] = ref_perf["target"] + np.where(np.arange(len(ref_perf)) % 2, 2.0, -2.0)
+
+    profile = np.load(io.BytesIO(create_reference_profile(ref_drift, ref_perf, {"profile_bins": 4, "profile_quantiles": 16})))
+
+    assert len(profile["target/edges"]) == 3
+    assert profile["target/counts"].sum() == len(ref_drift)
+    assert profile["target/weights"].sum() == len(ref_drift)
+    assert len(profile["target/means"]) == 16
+    np.testing.assert_allclose(profile["target/moments"][[0, 3, 4]], [len(ref_drift), 5.0, 999.0])
+    np.testing.assert_allclose(profile["errors/stats"], [len(ref_perf), 2.0, 2.0, 0.0], atol=1e-2)
+
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from edf_forecasting.components.eco2mix_train_xgboost_direct_30min import (
+    Eco2mixTrainGBoostDirect30min,
+    create_direct_windows,
+)
+
+
+def test_create_direct_windows_targets_follow_each_window():
+    X, y = create_direct_windows(np.arange(10), windows_size=4, horizon=3)
+
+    assert X.shape == (4, 4)
+    assert y.shape == (4, 3)
+    assert X[1].tolist() == [1, 2, 3, 4]
+    assert y[1].tolist() == [5, 6, 7]
+
+
+def test_direct_trainer_predicts_every_horizon_at_once():
+    df_train = pd.DataFrame({"Consommation": np.sin(np.arange(300) / 8) * 1000 + 50000})
+
+    trainer = Eco2mixTrainGBoostDirect30min(
+        df_train=df_train,
+        training_params={"n_estimators": 10, "max_depth": 3},
+        windows_size=12,
+        horizon=6,
+        target_col="Consommation",
+    )
+    model, scores, metadata = trainer.run()
+
+    assert model.predict(trainer.X_train[:5]).shape == (5, 6)
+    assert metadata["horizon"] == 6
+    assert scores["r2_score"] > 0.5